@@ -0,0 +1,156 @@
+import cv2
+import numpy as np
+from typing import NamedTuple, Tuple
+
+from .page_features import Box, PageFeatures
+from .pages import current_registry
+from .timing import timed
+
+# Checkbox side as a share of page width (about 7 to 24 pt on A4)
+MIN_BOX = 0.012
+MAX_BOX = 0.04
+# Interior ink share above which a checkbox counts as ticked
+FILL_THRESHOLD = 0.15
+
+
+class CheckboxTable(NamedTuple):
+    """Checkboxes found on a page, one row per box"""
+    boxes: np.ndarray  # (n, 4) int32 x1, y1, x2, y2 in page pixels
+    fill: np.ndarray  # (n,) interior ink share
+
+    def __len__(self) -> int:
+        return len(self.fill)
+
+    def within(self, box: Box) -> np.ndarray:
+        """Indexes of checkboxes whose centre lies inside a rectangle"""
+        x1, y1, x2, y2 = box
+        cx = (self.boxes[:, 0] + self.boxes[:, 2]) / 2
+        cy = (self.boxes[:, 1] + self.boxes[:, 3]) / 2
+        return np.flatnonzero((cx >= x1) & (cx < x2) & (cy >= y1) & (cy < y2))
+
+    def checked(self, threshold: float = FILL_THRESHOLD) -> np.ndarray:
+        """Mask of ticked checkboxes"""
+        return self.fill > threshold
+
+
+def detect_checkboxes(features: PageFeatures, min_box: float = MIN_BOX,
+                      max_box: float = MAX_BOX) -> CheckboxTable:
+    """Find square checkbox outlines on a page and score how filled they are
+
+    Horizontal and vertical strokes at least most of a minimum box side
+    long are isolated with two morphological openings; each connected
+    component of those strokes is a candidate. Candidates are filtered as
+    arrays: square bounding box of checkbox size (ruled tables, whose
+    lines all connect, fail this), a stroke along most of each of the four
+    sides meeting at square corners (letters fail this), and not nested in
+    another box. Ticks are diagonal or short and do not survive the
+    openings; fill is the ink share of each box's interior.
+
+    A thin outline has about as many pixels as its perimeter. Boxes that
+    were blacked out or scribbled over have far more; they are checked as
+    boxes with a one-pixel outline, and their interior ink scores them as
+    filled. A solid square alone is as likely a bullet, so such boxes are
+    kept only when the page has an outlined box of the same size.
+    """
+    with timed('checkboxes'):
+        height, width = features.shape
+        min_side = max(6, int(min_box * width))
+        max_side = max(min_side + 1, int(max_box * width))
+
+        ink = features.ink_mask()
+        stroke = max(3, int(min_side * 0.8))
+        horizontal = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (stroke, 1)))
+        vertical = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, stroke)))
+        lines = cv2.bitwise_or(horizontal, vertical)
+
+        _, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            lines, 8, cv2.CV_32S, cv2.CCL_GRANA
+        )
+        x, y, w, h, area = stats[1:].T
+        side = np.maximum(w, h)
+        # Outline pixels per unit of perimeter, i.e. the line thickness
+        thickness = area / np.maximum(2 * (w + h), 1)
+        square = ((w >= min_side) & (h >= min_side) & (side <= max_side)
+                  & (np.minimum(w, h) >= 0.85 * side))
+        dense = thickness > np.maximum(2, 0.2 * side)
+        keep = np.flatnonzero(square & (thickness >= 0.5))
+        empty = CheckboxTable(np.zeros((0, 4), dtype=np.int32), np.zeros(0, dtype=np.float32))
+        if not len(keep):
+            return empty
+
+        x, y, w, h, dense = x[keep], y[keep], w[keep], h[keep], dense[keep]
+        thickness = np.where(dense, 1.0, thickness[keep])
+        x2, y2 = x + w, y + h
+        band = np.minimum(np.ceil(thickness).astype(np.intp) + 2, np.minimum(w, h) // 2)
+
+        # Each side must carry a stroke covering at least 80% of its length
+        # (band sums are normalized by the outline thickness)
+        h_sum = cv2.integral(horizontal // 255, sdepth=cv2.CV_32S)
+        v_sum = cv2.integral(vertical // 255, sdepth=cv2.CV_32S)
+
+        def band_sum(integral, bx1, by1, bx2, by2):
+            return (integral[by2, bx2].astype(np.int64) - integral[by1, bx2]
+                    - integral[by2, bx1] + integral[by1, bx1])
+
+        rows = np.maximum(1, np.round(thickness))
+        closed = ((band_sum(h_sum, x, y, x2, y + band) >= 0.8 * w * rows)
+                  & (band_sum(h_sum, x, y2 - band, x2, y2) >= 0.8 * w * rows)
+                  & (band_sum(v_sum, x, y, x + band, y2) >= 0.8 * h * rows)
+                  & (band_sum(v_sum, x2 - band, y, x2, y2) >= 0.8 * h * rows))
+
+        # Square corners: both strokes reach each corner (rounded letters fail)
+        for cx1, cy1 in ((x, y), (x2 - band, y), (x, y2 - band), (x2 - band, y2 - band)):
+            corner = (band_sum(h_sum, cx1, cy1, cx1 + band, cy1 + band)
+                      + band_sum(v_sum, cx1, cy1, cx1 + band, cy1 + band))
+            closed &= corner >= 1.5 * band * rows
+
+        # A box drawn inside another (e.g. by a bold tick) is part of it
+        inner = ((x[:, None] > x[None, :]) & (y[:, None] > y[None, :])
+                 & (x2[:, None] < x2[None, :]) & (y2[:, None] < y2[None, :])
+                 & closed[None, :]).any(axis=1)
+        closed &= ~inner
+
+        # Dense boxes need an outlined sibling of their size (within 10%)
+        outlined = closed & ~dense
+        if (closed & dense).any():
+            tolerance = np.maximum(2, 0.1 * np.maximum(w, h))[:, None]
+            sibling = ((np.abs(w[:, None] - w[None, outlined]) <= tolerance)
+                       & (np.abs(h[:, None] - h[None, outlined]) <= tolerance)).any(axis=1)
+            closed &= ~dense | sibling
+        if not closed.any():
+            return empty
+
+        boxes = np.stack([x, y, x2, y2], axis=1)[closed].astype(np.int32)
+        # Interior past the outline
+        inset = band[closed].astype(np.int32)
+        interior = boxes + np.stack([inset, inset, -inset, -inset], axis=1)
+        interior[:, 2] = np.maximum(interior[:, 2], interior[:, 0])
+        interior[:, 3] = np.maximum(interior[:, 3], interior[:, 1])
+        fill = features.ink_fractions(interior).astype(np.float32)
+
+        # Reading order: top to bottom, then left to right
+        order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+        boxes = boxes[order]
+        boxes.flags.writeable = False
+        return CheckboxTable(boxes, fill[order])
+
+
+def page_checkboxes(image: np.ndarray) -> Tuple[CheckboxTable, Box]:
+    """Checkboxes covering an image, with the image's rect in page coordinates
+
+    For a crop of a page tracked by the current form's registry, the
+    whole page is searched once and the table is shared by every caller;
+    any other image is searched on its own.
+    """
+    registry = current_registry()
+    located = registry.locate(image) if registry is not None else None
+    if located is not None:
+        page_id, box = located
+        table = registry.product(
+            page_id, 'checkboxes',
+            lambda page: detect_checkboxes(registry.product(page_id, 'features', PageFeatures))
+        )
+        return table, box
+
+    height, width = image.shape[:2]
+    return detect_checkboxes(PageFeatures(image)), (0, 0, width, height)
@@ -1,17 +1,158 @@
+import hashlib
 import json
+import threading
 from pathlib import Path
 import numpy as np
 from PIL import Image
 import cv2
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .fingerprint import FingerprintIndex, FingerprintMatch
+from .template_index import CompiledTemplate, TemplateIndex
+from .timing import count, timed
+from ..utils.image import to_gray
+
+
+class SectionScores:
+    """Feature scores of page rects, memoized for one detection call
+
+    _match_features does not depend on the template, so templates sharing a
+    section rect on a page reuse its score. Each page is converted to
+    grayscale once rather than once per section crop.
+    """
+
+    def __init__(self, images: Sequence[np.ndarray], score: Callable[[np.ndarray], float]):
+        self.images = images
+        self.score_features = score
+        self._gray: Dict[int, np.ndarray] = {}
+        self._scores: Dict[Tuple[int, int, int, int, int], float] = {}
+
+    def gray_page(self, page_num: int) -> np.ndarray:
+        page = self._gray.get(page_num)
+        if page is None:
+            page = self.images[page_num]
+            page = to_gray(page)
+            self._gray[page_num] = page
+        return page
+
+    def score(self, page_num: int, x1: int, y1: int, x2: int, y2: int) -> float:
+        key = (page_num, x1, y1, x2, y2)
+        feature_score = self._scores.get(key)
+        if feature_score is None:
+            feature_score = self.score_features(self.gray_page(page_num)[y1:y2, x1:x2])
+            self._scores[key] = feature_score
+        else:
+            count('feature_score_hits')
+        return feature_score
+
+
+def template_signature(template_dir: Path) -> Tuple[Tuple[str, int, int], ...]:
+    """Name, mtime and size of every template file; changes when any template does"""
+    if not template_dir.exists():
+        return ()
+    signature = []
+    for file in template_dir.glob("*.json"):
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+        signature.append((file.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+
+def template_version(signature: Tuple) -> str:
+    """Short version string of a template signature"""
+    return hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+
+
+class TemplateSet(NamedTuple):
+    """Loaded templates and the indexes built from them, published as one snapshot
+
+    A reload builds a new set and swaps it in with a single assignment, so
+    a detection running meanwhile keeps using one consistent set.
+    """
+    templates: Dict[str, Dict]
+    errors: Dict[str, str]
+    # Sections compiled once into rect tables shared by every detection
+    index: TemplateIndex
+    # Reference fingerprints saved with templates; templates without one
+    # are only reachable through template matching
+    fingerprints: FingerprintIndex
+    signature: Tuple
+    version: str
+
+    @classmethod
+    def build(cls, templates: Dict[str, Dict], errors: Optional[Dict[str, str]] = None,
+              signature: Tuple = ()) -> 'TemplateSet':
+        return cls(templates, errors or {}, TemplateIndex(templates), FingerprintIndex(templates),
+                   signature, template_version(signature))
+
+    def unfingerprinted(self) -> List[str]:
+        """Keys of scorable templates that have no usable fingerprint"""
+        return [template.key for template in self.index if template.key not in self.fingerprints]
+
 
 class FormDetector:
     def __init__(self, template_dir: Path = Path("templates")):
         self.template_dir = template_dir
         self.setup_logging()  # Setup logging first
-        self.templates = self._load_templates()
         self.confidence_threshold = 0.5
+        self.fingerprint_min_similarity = 0.85
+        self.fingerprint_min_margin = 0.1
+        self._reload_lock = threading.Lock()
+        self._set_templates(template_signature(template_dir))
+
+    def _set_templates(self, signature: Tuple):
+        """Load templates and publish them with their indexes as one snapshot"""
+        templates, errors = self._load_templates()
+        self.template_set = TemplateSet.build(templates, errors, signature)
+        missing = self.template_set.unfingerprinted()
+        if missing and self.template_set.fingerprints:
+            self.logger.warning(
+                f"Templates without a fingerprint: {', '.join(missing)}; every template is "
+                f"scored until they are fingerprinted (Teach mode, Saved Templates)"
+            )
+
+    @property
+    def templates(self) -> Dict[str, Dict]:
+        return self.template_set.templates
+
+    @property
+    def template_errors(self) -> Dict[str, str]:
+        return self.template_set.errors
+
+    @property
+    def template_index(self) -> TemplateIndex:
+        return self.template_set.index
+
+    @property
+    def fingerprint_index(self) -> FingerprintIndex:
+        return self.template_set.fingerprints
+
+    @property
+    def template_signature(self) -> Tuple:
+        return self.template_set.signature
+
+    @property
+    def template_version(self) -> str:
+        return self.template_set.version
+
+    def refresh_templates(self) -> bool:
+        """Reload templates if files in the template directory changed
+
+        Only stats the template files, so it is cheap enough to call before
+        every use of a long-lived detector. Returns True if reloaded.
+        """
+        signature = template_signature(self.template_dir)
+        if signature == self.template_signature:
+            return False
+        with self._reload_lock:
+            if signature == self.template_signature:
+                return False
+            self.logger.info("Template directory changed, reloading templates")
+            self._set_templates(signature)
+            return True
 
     def setup_logging(self):
         """Setup logging configuration"""
@@ -25,9 +166,10 @@ class FormDetector:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
 
-    def _load_templates(self) -> Dict:
-        """Load all saved templates"""
+    def _load_templates(self) -> Tuple[Dict, Dict[str, str]]:
+        """Load all saved templates, and the errors of files that failed to load"""
         templates = {}
+        errors = {}
         if self.template_dir.exists():
             for file in self.template_dir.glob("*.json"):
                 try:
@@ -37,66 +179,57 @@ class FormDetector:
                         templates[file.stem] = data
                 except Exception as e:
                     self.logger.error(f"Error loading template {file}: {e}")
-        return templates
+                    errors[file.name] = str(e)
+        return templates, errors
 
-    def match_template(self, images: List[np.ndarray], template_data: Dict) -> float:
+    def match_template(self, images: Sequence[np.ndarray], template_data: Dict) -> float:
         """Match images against a template"""
+        index = TemplateIndex({template_data.get('name', ''): template_data})
+        if not index.templates:
+            return 0.0
+        return self._match_compiled(images, index.templates[0], index,
+                                    SectionScores(images, self._match_features))
+
+    def _match_compiled(self, images: Sequence[np.ndarray], template: CompiledTemplate,
+                        index: TemplateIndex, scores: SectionScores) -> float:
+        """Match images against a compiled template"""
         try:
             total_confidence = 0.0
             sections_checked = 0
-            
-            # Get sections grouped by page
-            sections_by_page = {}
-            for section in template_data['sections']:
-                page = section['page']
-                if page not in sections_by_page:
-                    sections_by_page[page] = []
-                sections_by_page[page].append(section)
-                
+
             # Check each page that has sections
-            for page_num, sections in sections_by_page.items():
-                if page_num < len(images):  # Make sure we have this page
-                    image = images[page_num]
-                    page_confidence = self._match_page_sections(image, sections)
+            for table in template.pages:
+                if table.page < len(images):  # Make sure we have this page
+                    height, width = images[table.page].shape[:2]
+                    rects = index.rects(table, height, width)
+                    page_confidence = self._match_page_sections(
+                        scores, table.page, rects, table.names
+                    )
                     total_confidence += page_confidence
-                    sections_checked += len(sections)
+                    sections_checked += len(table.names)
 
             # Calculate average confidence
             return total_confidence / sections_checked if sections_checked > 0 else 0.0
-            
+
         except Exception as e:
             self.logger.error(f"Error in match_template: {e}")
             return 0.0
 
-    def _match_page_sections(self, image: np.ndarray, sections: List[Dict]) -> float:
-        """Match sections on a single page"""
+    def _match_page_sections(self, scores: SectionScores, page_num: int,
+                             rects: np.ndarray, names: Tuple[str, ...]) -> float:
+        """Match sections on a single page given their pixel rects"""
         try:
-            height, width = image.shape[:2]
             total_score = 0.0
-            
-            for section in sections:
-                coords = section['coordinates']
-                x1 = int(coords['x'] * width)
-                y1 = int(coords['y'] * height)
-                x2 = int((coords['x'] + coords['width']) * width)
-                y2 = int((coords['y'] + coords['height']) * height)
-                
-                # Ensure coordinates are within bounds
-                x1, y1 = max(0, x1), max(0, y1)
-                x2, y2 = min(width, x2), min(height, y2)
-                
+
+            for (x1, y1, x2, y2), name in zip(rects.tolist(), names):
                 if x2 > x1 and y2 > y1:  # Valid section size
-                    section_img = image[y1:y2, x1:x2]
-                    if len(section_img.shape) == 3:
-                        section_img = cv2.cvtColor(section_img, cv2.COLOR_BGR2GRAY)
-                    
-                    feature_score = self._match_features(section_img)
+                    feature_score = scores.score(page_num, x1, y1, x2, y2)
                     total_score += feature_score
-                    
-                    self.logger.debug(f"Section {section['name']} score: {feature_score}")
-            
-            return total_score / len(sections) if sections else 0.0
-            
+
+                    self.logger.debug(f"Section {name} score: {feature_score}")
+
+            return total_score / len(names) if names else 0.0
+
         except Exception as e:
             self.logger.error(f"Error matching page sections: {e}")
             return 0.0
@@ -155,30 +288,87 @@ class FormDetector:
             self.logger.error(f"Error detecting text regions: {e}")
             return 0
 
-    def detect_form_type(self, images: List[np.ndarray]) -> Tuple[str, float]:
-        """Detect form type from images"""
+    def _classify_fingerprint(self, fingerprints: FingerprintIndex,
+                              images: Sequence[np.ndarray]) -> Optional[FingerprintMatch]:
+        """Classify by page fingerprint; None when ambiguous or unavailable"""
+        if not fingerprints:
+            return None
         try:
+            with timed('fingerprint'):
+                match = fingerprints.classify(images)
+        except Exception as e:
+            self.logger.error(f"Error classifying fingerprint: {e}")
+            return None
+
+        margin = f"{match.margin:.2%}" if match.margin is not None else "n/a"
+        if (match.similarity >= self.fingerprint_min_similarity
+                and match.margin is not None and match.margin >= self.fingerprint_min_margin):
+            self.logger.info(
+                f"Fingerprint match: {match.form_type} via {match.template} "
+                f"(similarity {match.similarity:.2%}, margin {margin})"
+            )
+            return match
+
+        self.logger.info(
+            f"Fingerprint ambiguous: {match.form_type} (similarity {match.similarity:.2%}, "
+            f"margin {margin}), falling back to template matching"
+        )
+        return None
+
+    def _score_template(self, images: Sequence[np.ndarray], template: CompiledTemplate,
+                        index: TemplateIndex, scores: SectionScores) -> float:
+        with timed(f"match_template.{template.key}"):
+            confidence = self._match_compiled(images, template, index, scores)
+        self.logger.info(f"Template {template.key} confidence: {confidence:.2%}")
+        return confidence
+
+    def _decide(self, form_type: Optional[str], confidence: float) -> Tuple[str, float]:
+        """Report a match only above the confidence threshold, otherwise Unknown"""
+        if form_type is not None and confidence > self.confidence_threshold:
+            self.logger.info(f"Found match: {form_type} ({confidence:.2%})")
+            return form_type, confidence
+        self.logger.warning(f"No match found. Best confidence: {confidence:.2%}")
+        return "Unknown", confidence
+
+    def detect_form_type(self, images: Sequence[np.ndarray],
+                         preview: Optional[Sequence[np.ndarray]] = None) -> Tuple[str, float]:
+        """Detect form type from images
+
+        preview may hold low-resolution renders of the pages. Fingerprints
+        do not depend on resolution, so they are computed from the preview;
+        template scoring uses pixel-sized thresholds and always runs on images.
+        """
+        try:
+            # One snapshot for the whole call, even if templates are reloaded meanwhile
+            template_set = self.template_set
+            index = template_set.index
+
+            # Fast path: an unambiguous nearest reference fingerprint decides
+            # the form type without scoring any template; its similarity is
+            # the confidence. A template without a fingerprint could match
+            # better, so the fast path only applies once every template has one.
+            if template_set.fingerprints and not template_set.unfingerprinted():
+                match = self._classify_fingerprint(template_set.fingerprints,
+                                                   preview if preview is not None else images)
+                if match is not None:
+                    return self._decide(match.form_type, match.similarity)
+
+            self.logger.info(f"Checking {len(images)} pages against {len(index)} templates")
             best_match = None
             best_confidence = 0.0
-            
-            self.logger.info(f"Checking {len(images)} pages against {len(self.templates)} templates")
+            # Templates share section scores between them
+            scores = SectionScores(images, self._match_features)
             
             # Match against each template
-            for template_name, template_data in self.templates.items():
-                confidence = self.match_template(images, template_data)
-                self.logger.info(f"Template {template_name} confidence: {confidence:.2%}")
+            for template in index:
+                confidence = self._score_template(images, template, index, scores)
                 
                 if confidence > best_confidence:
                     best_confidence = confidence
-                    best_match = template_data['form_type']
+                    best_match = template.form_type
             
-            if best_confidence > self.confidence_threshold:
-                self.logger.info(f"Found match: {best_match} ({best_confidence:.2%})")
-                return best_match, best_confidence
-            else:
-                self.logger.warning(f"No match found. Best confidence: {best_confidence:.2%}")
-                return "Unknown", best_confidence
-                
+            return self._decide(best_match, best_confidence)
+
         except Exception as e:
             self.logger.error(f"Error in form detection: {e}")
             return "Error", 0.0
\ No newline at end of file
@@ -0,0 +1,101 @@
+import re
+import sys
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern
+
+from .timing import count
+from ..utils.cache import LRUCache
+
+# Field patterns shared by all validators, compiled once. OCR text is
+# lowercased; (?ai:...) matches code-like fields (IFSC, PAN) in either case,
+# and their values are reported upper-cased.
+FIELD_PATTERNS: Dict[str, Pattern] = {
+    'amount': re.compile(r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?'),
+    'number': re.compile(r'\d+(?:\.\d+)?'),
+    'digits': re.compile(r'\d+'),
+    'account_number': re.compile(r'\d{9,18}'),
+    'ifsc': re.compile(r'(?ai:[A-Z]{4}0[A-Z0-9]{6})'),
+    'pan': re.compile(r'(?ai:[A-Z]{5}[0-9]{4}[A-Z]{1})'),
+    'date': re.compile(r'\d{2}[-/]\d{2}[-/]\d{2,4}'),
+    'period': re.compile(r'\d+\s*(?:month|year|yr)', re.IGNORECASE),
+    'folio': re.compile(r'folio.*\d+', re.IGNORECASE),
+    'contact': re.compile(r'\d{10}|\d{3}[-\s]\d{8}'),
+}
+UPPER_FIELDS = {'ifsc', 'pan'}
+
+# Budget for field matches of recent texts, counted by text size
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+
+class FieldMatch(NamedTuple):
+    field: str
+    start: int
+    end: int
+    value: str
+
+
+class FieldMatches:
+    """Field matches of one text, each field scanned at most once
+
+    all() holds what re.findall would return for the field's pattern, with
+    offsets; found() only searches up to the first match unless the field
+    has already been scanned in full.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._all: Dict[str, List[FieldMatch]] = {}
+        self._first: Dict[str, Optional[FieldMatch]] = {}
+        self._lock = threading.Lock()
+
+    def _match(self, field: str, match: re.Match) -> FieldMatch:
+        value = match.group()
+        return FieldMatch(field, match.start(), match.end(),
+                          value.upper() if field in UPPER_FIELDS else value)
+
+    def all(self, field: str) -> List[FieldMatch]:
+        """Non-overlapping matches of a field, in text order"""
+        with self._lock:
+            matches = self._all.get(field)
+            if matches is None:
+                count('field_scans')
+                matches = self._all[field] = [
+                    self._match(field, match) for match in FIELD_PATTERNS[field].finditer(self.text)
+                ]
+            return matches
+
+    def values(self, field: str) -> List[str]:
+        """Matched strings of a field, as re.findall returns them"""
+        return [match.value for match in self.all(field)]
+
+    def first(self, field: str) -> Optional[FieldMatch]:
+        """First match of a field, if any"""
+        with self._lock:
+            if field in self._all:
+                return self._all[field][0] if self._all[field] else None
+            if field not in self._first:
+                count('field_scans')
+                match = FIELD_PATTERNS[field].search(self.text)
+                self._first[field] = self._match(field, match) if match else None
+            return self._first[field]
+
+    def found(self, field: str) -> bool:
+        """Whether a field occurs in the text"""
+        return self.first(field) is not None
+
+    def extract(self, fields: Optional[Iterable[str]] = None) -> List[FieldMatch]:
+        """Matches of several fields (default all), ordered by offset"""
+        matches = [match for field in (fields or FIELD_PATTERNS) for match in self.all(field)]
+        return sorted(matches, key=lambda match: (match.start, match.end))
+
+
+_recent = LRUCache(DEFAULT_MAX_BYTES, sizeof=lambda matches: sys.getsizeof(matches.text))
+
+
+def text_fields(text: str) -> FieldMatches:
+    """Field matches of a text, shared by every validator that reads it"""
+    matches = _recent.get(text)
+    if matches is None:
+        matches = FieldMatches(text)
+        _recent.put(text, matches)
+    return matches
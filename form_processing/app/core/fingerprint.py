@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+FINGERPRINT_VERSION = 1
+# Ink-density grid per page (rows, columns) and number of leading pages used
+GRID = (32, 24)
+PAGES = 2
+
+
+def page_fingerprint(image: np.ndarray, grid: Tuple[int, int] = GRID) -> np.ndarray:
+    """Downsampled ink-density grid of a page, values in [0, 1]"""
+    rows, cols = grid
+    if image.ndim == 3:
+        # Green channel stands in for luminance; it is all the grid needs
+        image = image[:, :, 1]
+
+    # Subsample large pages so each grid cell still averages ~256 pixels
+    step = max(1, min(image.shape[0] // (rows * 16), image.shape[1] // (cols * 16)))
+    sampled = np.ascontiguousarray(image[::step, ::step])
+    small = cv2.resize(sampled, (cols, rows), interpolation=cv2.INTER_AREA)
+    return 1.0 - small.astype(np.float32) / 255.0
+
+
+def form_fingerprint(images: Sequence[np.ndarray], grid: Tuple[int, int] = GRID,
+                     pages: int = PAGES) -> np.ndarray:
+    """Normalized fingerprint of a form's leading pages
+
+    Missing pages count as blank. Vectors are mean-centred and unit length,
+    so the dot product of two fingerprints is their correlation.
+    """
+    parts = []
+    for page_num in range(pages):
+        if page_num < len(images):
+            parts.append(page_fingerprint(images[page_num], grid).ravel())
+        else:
+            parts.append(np.zeros(grid[0] * grid[1], dtype=np.float32))
+
+    vector = np.concatenate(parts)
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def template_fingerprint(images: Sequence[np.ndarray]) -> Dict:
+    """Fingerprint entry stored in a template's JSON"""
+    return {
+        'version': FINGERPRINT_VERSION,
+        'grid': list(GRID),
+        'pages': PAGES,
+        'vector': [round(float(v), 5) for v in form_fingerprint(images)]
+    }
+
+
+class FingerprintMatch(NamedTuple):
+    template: str
+    form_type: str
+    similarity: float
+    # Similarity lead over the best template of another form type; None
+    # when the index holds no other form type to compare against
+    margin: Optional[float]
+
+
+class FingerprintIndex:
+    """Nearest-neighbour index over reference fingerprints of templates
+
+    All references are rows of one matrix, so classifying a form is a
+    single matrix-vector product regardless of the number of templates.
+    """
+
+    def __init__(self, templates: Dict[str, Dict]):
+        keys, form_types, vectors = [], [], []
+        size = PAGES * GRID[0] * GRID[1]
+
+        for key, data in templates.items():
+            fingerprint = data.get('fingerprint')
+            if not self._compatible(fingerprint) or len(fingerprint['vector']) != size:
+                continue
+            keys.append(key)
+            form_types.append(data['form_type'])
+            vectors.append(fingerprint['vector'])
+
+        self.keys: Tuple[str, ...] = tuple(keys)
+        self.form_types: Tuple[str, ...] = tuple(form_types)
+        self._type_ids = np.array([sorted(set(form_types)).index(t) for t in form_types], dtype=np.int32)
+        self._matrix = np.array(vectors, dtype=np.float32).reshape(len(vectors), size)
+        self._key_set = frozenset(keys)
+
+    @staticmethod
+    def _compatible(fingerprint: Optional[Dict]) -> bool:
+        return (isinstance(fingerprint, dict)
+                and fingerprint.get('version') == FINGERPRINT_VERSION
+                and tuple(fingerprint.get('grid', ())) == GRID
+                and fingerprint.get('pages') == PAGES)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_set
+
+    def classify(self, images: Sequence[np.ndarray]) -> Optional[FingerprintMatch]:
+        """Nearest reference template for a form, or None if the index is empty"""
+        if not self.keys:
+            return None
+
+        similarities = self._matrix @ form_fingerprint(images)
+        best = int(np.argmax(similarities))
+        others = similarities[self._type_ids != self._type_ids[best]]
+
+        return FingerprintMatch(
+            template=self.keys[best],
+            form_type=self.form_types[best],
+            similarity=float(similarities[best]),
+            margin=float(similarities[best] - others.max()) if others.size else None
+        )
@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .ocr_engine import OCREngine, get_ocr_engine
+
+
+class Word(NamedTuple):
+    text: str
+    conf: float
+    left: int
+    top: int
+    width: int
+    height: int
+    block: int
+    paragraph: int
+    line: int
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        return self.left + self.width / 2, self.top + self.height / 2
+
+
+class PageLayout:
+    """Word-level OCR result for one page with a uniform-grid spatial index"""
+
+    def __init__(self, words: List[Word], width: int, height: int, grid_size: int = 16):
+        self.words = words
+        self.width = width
+        self.height = height
+        self.grid_size = grid_size
+        self._cell_width = max(1.0, width / grid_size)
+        self._cell_height = max(1.0, height / grid_size)
+
+        # Bucket word indices by the grid cell holding the word centre
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for index, word in enumerate(words):
+            cx, cy = word.center
+            self._grid.setdefault(self._cell(cx, cy), []).append(index)
+
+    @classmethod
+    def from_ocr_data(cls, data: Dict[str, List], width: int, height: int,
+                      min_conf: float = 0.0) -> 'PageLayout':
+        """Build layout from image_to_data style output (dict of columns)"""
+        words = []
+        for i, text in enumerate(data['text']):
+            text = str(text).strip()
+            conf = float(data['conf'][i])
+            if not text or conf < min_conf:
+                continue
+            words.append(Word(
+                text=text,
+                conf=conf,
+                left=int(data['left'][i]),
+                top=int(data['top'][i]),
+                width=int(data['width'][i]),
+                height=int(data['height'][i]),
+                block=int(data['block_num'][i]),
+                paragraph=int(data['par_num'][i]),
+                line=int(data['line_num'][i])
+            ))
+        return cls(words, width, height)
+
+    @classmethod
+    def from_tsv(cls, tsv: str, width: int, height: int, min_conf: float = 0.0) -> 'PageLayout':
+        """Build layout from Tesseract TSV output"""
+        lines = tsv.strip().splitlines()
+        if not lines:
+            return cls([], width, height)
+
+        header = lines[0].split('\t')
+        data = {column: [] for column in header}
+        for line in lines[1:]:
+            values = line.split('\t')
+            if len(values) < len(header):
+                values += [''] * (len(header) - len(values))
+            for column, value in zip(header, values):
+                data[column].append(value)
+        return cls.from_ocr_data(data, width, height, min_conf)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        col = min(self.grid_size - 1, max(0, int(x / self._cell_width)))
+        row = min(self.grid_size - 1, max(0, int(y / self._cell_height)))
+        return col, row
+
+    def words_in_box(self, x1: float, y1: float, x2: float, y2: float) -> List[Word]:
+        """Words whose centre lies inside a pixel rectangle, in reading order"""
+        col1, row1 = self._cell(x1, y1)
+        col2, row2 = self._cell(x2, y2)
+
+        indices = []
+        for col in range(col1, col2 + 1):
+            for row in range(row1, row2 + 1):
+                for index in self._grid.get((col, row), ()):
+                    cx, cy = self.words[index].center
+                    if x1 <= cx < x2 and y1 <= cy < y2:
+                        indices.append(index)
+
+        return [self.words[index] for index in sorted(indices)]
+
+    def words_in(self, coords: Dict) -> List[Word]:
+        """Words inside a normalized rectangle ({'x', 'y', 'width', 'height'})"""
+        x1 = coords['x'] * self.width
+        y1 = coords['y'] * self.height
+        x2 = (coords['x'] + coords['width']) * self.width
+        y2 = (coords['y'] + coords['height']) * self.height
+        return self.words_in_box(x1, y1, x2, y2)
+
+    @staticmethod
+    def join_words(words: List[Word]) -> str:
+        """Join words into lowercase text, one Tesseract line per text line"""
+        lines = []
+        current_line = None
+        for word in words:
+            line_id = (word.block, word.paragraph, word.line)
+            if line_id != current_line:
+                lines.append([])
+                current_line = line_id
+            lines[-1].append(word.text)
+        return '\n'.join(' '.join(line) for line in lines).strip().lower()
+
+    def text_in_box(self, x1: float, y1: float, x2: float, y2: float) -> str:
+        """Text inside a pixel rectangle"""
+        return self.join_words(self.words_in_box(x1, y1, x2, y2))
+
+    def text_in(self, coords: Dict) -> str:
+        """Text inside a normalized rectangle"""
+        return self.join_words(self.words_in(coords))
+
+
+def build_page_layout(image: np.ndarray, ocr_config: str = r'--oem 3 --psm 3',
+                      engine: Optional[OCREngine] = None) -> PageLayout:
+    """OCR a whole (preprocessed) page once with word-level boxes"""
+    engine = engine or get_ocr_engine()
+    height, width = image.shape[:2]
+    data = engine.image_to_data(image, ocr_config)
+    return PageLayout.from_ocr_data(data, width, height)
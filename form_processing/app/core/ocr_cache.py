@@ -0,0 +1,42 @@
+import hashlib
+import numpy as np
+from typing import Tuple
+
+from ..utils.cache import LRUCache
+
+# Default budget for cached OCR text; a page worth of text is a few KB
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_ocr_cache = LRUCache(DEFAULT_MAX_BYTES)
+
+
+def get_ocr_cache() -> LRUCache:
+    """Return the process-wide OCR result cache"""
+    return _ocr_cache
+
+
+def configure_ocr_cache(max_bytes: int) -> LRUCache:
+    """Resize the process-wide OCR result cache"""
+    _ocr_cache.max_bytes = max_bytes
+    if _ocr_cache.current_bytes > max_bytes:
+        _ocr_cache.clear()
+    return _ocr_cache
+
+
+def image_digest(image: np.ndarray) -> str:
+    """Fast content hash of image pixels, shape and dtype"""
+    pixels = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{pixels.shape}|{pixels.dtype.str}".encode())
+    digest.update(pixels.data)
+    return digest.hexdigest()
+
+
+def ocr_cache_key(image: np.ndarray, ocr_config: str, preprocessing: str,
+                  engine: str = 'pytesseract') -> Tuple[str, str, str, str]:
+    """Build cache key for an OCR call
+
+    image is the raw crop with the profile it is preprocessed with, or the
+    already binarized crop with preprocessing 'binarized'.
+    """
+    return image_digest(image), ocr_config, preprocessing, engine
@@ -0,0 +1,199 @@
+import os
+import shlex
+import threading
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+import pytesseract
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Columns produced by image_to_data, matching pytesseract's DICT output
+DATA_COLUMNS = [
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text'
+]
+
+
+def parse_ocr_config(config: str) -> Tuple[Optional[int], Optional[int], Dict[str, str]]:
+    """Split a Tesseract CLI config string into (oem, psm, variables)"""
+    oem, psm, variables = None, None, {}
+    tokens = shlex.split(config or '')
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('--oem', '--psm') and i + 1 < len(tokens):
+            value = int(tokens[i + 1])
+            if token == '--oem':
+                oem = value
+            else:
+                psm = value
+            i += 2
+        elif token == '-c' and i + 1 < len(tokens) and '=' in tokens[i + 1]:
+            name, value = tokens[i + 1].split('=', 1)
+            variables[name] = value
+            i += 2
+        else:
+            i += 1
+    return oem, psm, variables
+
+
+class OCREngine(ABC):
+    """Interface implemented by OCR backends"""
+    name = 'base'
+
+    @abstractmethod
+    def image_to_string(self, image: np.ndarray, config: str = '') -> str:
+        """Recognize all text in an image"""
+
+    @abstractmethod
+    def image_to_data(self, image: np.ndarray, config: str = '') -> Dict[str, List]:
+        """Recognize words with boxes, returned as image_to_data style columns"""
+
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract executable once per call via pytesseract"""
+    name = 'pytesseract'
+
+    def __init__(self, lang: str = 'eng'):
+        self.lang = lang
+
+    def image_to_string(self, image: np.ndarray, config: str = '') -> str:
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def image_to_data(self, image: np.ndarray, config: str = '') -> Dict[str, List]:
+        return pytesseract.image_to_data(
+            image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT
+        )
+
+
+class TesserocrEngine(OCREngine):
+    """In-process libtesseract backend
+
+    Each worker thread keeps its own initialized API handle per OCR engine
+    mode and set of -c variables, so language data is loaded once per
+    thread and configuration, and calls skip the process spawn and
+    temp-file round trip of pytesseract. Variables are never changed on a
+    cached handle, so one call's variables (e.g. a whitelist) cannot leak
+    into calls with another config.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, lang: str = 'eng', tessdata_path: Optional[str] = None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.tessdata_path = tessdata_path or os.environ.get('TESSDATA_PREFIX')
+        self._local = threading.local()
+
+    def _api(self, config: str):
+        oem, psm, variables = parse_ocr_config(config)
+        if oem is None:
+            oem = self._tesserocr.OEM.DEFAULT
+
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+
+        key = (oem, tuple(sorted(variables.items())))
+        api = apis.get(key)
+        if api is None:
+            kwargs = {'lang': self.lang, 'oem': oem}
+            if self.tessdata_path:
+                kwargs['path'] = self.tessdata_path
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            for name, value in variables.items():
+                api.SetVariable(name, value)
+            apis[key] = api
+
+        api.SetPageSegMode(psm if psm is not None else self._tesserocr.PSM.SINGLE_BLOCK)
+        return api
+
+    @staticmethod
+    def _set_image(api, image: np.ndarray):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+    def image_to_string(self, image: np.ndarray, config: str = '') -> str:
+        api = self._api(config)
+        self._set_image(api, image)
+        return api.GetUTF8Text()
+
+    def image_to_data(self, image: np.ndarray, config: str = '') -> Dict[str, List]:
+        RIL = self._tesserocr.RIL
+        api = self._api(config)
+        self._set_image(api, image)
+        api.Recognize()
+
+        data = {column: [] for column in DATA_COLUMNS}
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+
+        block = paragraph = line = word = 0
+        for item in self._tesserocr.iterate_level(iterator, RIL.WORD):
+            if item.IsAtBeginningOf(RIL.BLOCK):
+                block, paragraph, line = block + 1, 0, 0
+            if item.IsAtBeginningOf(RIL.PARA):
+                paragraph, line = paragraph + 1, 0
+            if item.IsAtBeginningOf(RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+
+            box = item.BoundingBox(RIL.WORD)
+            if box is None:
+                continue
+            x1, y1, x2, y2 = box
+            values = [5, 1, block, paragraph, line, word,
+                      x1, y1, x2 - x1, y2 - y1,
+                      item.Confidence(RIL.WORD), item.GetUTF8Text(RIL.WORD) or '']
+            for column, value in zip(DATA_COLUMNS, values):
+                data[column].append(value)
+        return data
+
+
+_engines: Dict[str, OCREngine] = {}
+_engines_lock = threading.Lock()
+
+
+def _tesserocr_usable(lang: str) -> bool:
+    try:
+        import tesserocr
+    except ImportError:
+        return False
+    path = os.environ.get('TESSDATA_PREFIX')
+    try:
+        _, languages = tesserocr.get_languages(path) if path else tesserocr.get_languages()
+    except Exception as e:
+        logger.warning(f"tesserocr unusable, falling back to pytesseract: {e}")
+        return False
+    return lang in languages
+
+
+def get_ocr_engine(name: str = 'auto', lang: str = 'eng') -> OCREngine:
+    """Return a shared OCR engine by name ('auto', 'tesserocr', 'pytesseract')"""
+    with _engines_lock:
+        engine = _engines.get(f"{name}:{lang}")
+        if engine is not None:
+            return engine
+
+        resolved = name
+        if name == 'auto':
+            resolved = 'tesserocr' if _tesserocr_usable(lang) else 'pytesseract'
+
+        engine = _engines.get(f"{resolved}:{lang}")
+        if engine is None:
+            if resolved == 'tesserocr':
+                engine = TesserocrEngine(lang)
+            elif resolved == 'pytesseract':
+                engine = PytesseractEngine(lang)
+            else:
+                raise ValueError(f"Unknown OCR engine: {name}")
+            logger.info(f"Using OCR engine: {resolved}")
+
+        _engines[f"{name}:{lang}"] = engine
+        _engines[f"{resolved}:{lang}"] = engine
+        return engine
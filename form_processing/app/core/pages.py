@@ -0,0 +1,164 @@
+import threading
+import weakref
+from collections.abc import Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+import numpy as np
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_current_registry: ContextVar = ContextVar('page_registry', default=None)
+
+
+def current_registry() -> Optional['PageRegistry']:
+    """Return the page registry of the form being processed, if any"""
+    return _current_registry.get()
+
+
+@contextmanager
+def use_registry(registry: 'PageRegistry'):
+    """Make registry the current page registry for the enclosed block"""
+    token = _current_registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _current_registry.reset(token)
+
+
+class PageRegistry:
+    """Per-form registry of page images and products derived from them
+
+    Validators receive crops that are NumPy views into page arrays. The
+    registry maps such a view back to its page and pixel rectangle, so
+    per-page products (e.g. an OCR layout) can be computed once and
+    queried for any crop.
+
+    Pages are identified by their index in the form, so a page rendered
+    again (e.g. after a PDFPageSource evicted it) keeps its id and its
+    products. Page arrays are held weakly: the page source decides how
+    long a page stays decoded, and a crop keeps its page alive through
+    its base array.
+    """
+
+    def __init__(self, use_layout: bool = False):
+        self.use_layout = use_layout
+        self._pages: Dict[int, weakref.ref] = {}
+        self._page_sizes: Dict[int, int] = {}
+        self._products: Dict[Tuple[int, str], Any] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[int, str], threading.Lock] = {}
+
+    def track(self, images: Sequence) -> 'TrackedPages':
+        """Wrap a page sequence so every accessed page gets registered"""
+        return TrackedPages(images, self)
+
+    def add_page(self, image: np.ndarray, index: Optional[int] = None) -> int:
+        """Register a page and return its id
+
+        index is the page's position in the form and becomes its id;
+        without one a page is matched by identity, or gets the next free id.
+        """
+        with self._lock:
+            if index is None:
+                for page_id, ref in self._pages.items():
+                    if ref() is image:
+                        return page_id
+                index = max(self._pages, default=-1) + 1
+            elif self._pages.get(index, lambda: None)() is image:
+                return index
+            self._pages[index] = weakref.ref(image)
+            self._page_sizes[index] = image.nbytes
+            return index
+
+    def page_bytes(self) -> int:
+        """Total size of the form's registered pages, each counted once"""
+        with self._lock:
+            return sum(self._page_sizes.values())
+
+    def page(self, page_id: int) -> np.ndarray:
+        """Return registered page by id, if its array is still alive"""
+        with self._lock:
+            page = self._pages[page_id]()
+        if page is None:
+            raise LookupError(f"page {page_id} is no longer held by its source")
+        return page
+
+    def locate(self, image: np.ndarray) -> Optional[Tuple[int, Tuple[int, int, int, int]]]:
+        """Find the registered page an image is a view of
+
+        Returns (page_id, (x1, y1, x2, y2)) in page pixels, or None if the
+        image does not share memory with any registered page.
+        """
+        if not isinstance(image, np.ndarray) or image.ndim < 2 or image.size == 0:
+            return None
+
+        address = image.__array_interface__['data'][0]
+        height, width = image.shape[:2]
+
+        with self._lock:
+            pages = [(page_id, ref()) for page_id, ref in self._pages.items()]
+
+        for page_id, page in pages:
+            if page is None:
+                continue
+            if (page.dtype != image.dtype or page.ndim != image.ndim
+                    or page.strides != image.strides
+                    or page.shape[2:] != image.shape[2:]):
+                continue
+
+            offset = address - page.__array_interface__['data'][0]
+            if offset < 0 or offset >= page.strides[0] * page.shape[0]:
+                continue
+
+            y1, remainder = divmod(offset, page.strides[0])
+            x1, misaligned = divmod(remainder, page.strides[1])
+            if misaligned:
+                continue
+
+            x2, y2 = x1 + width, y1 + height
+            if x2 <= page.shape[1] and y2 <= page.shape[0]:
+                return page_id, (x1, y1, x2, y2)
+
+        return None
+
+    def product(self, page_id: int, name: str, factory: Callable[[np.ndarray], Any]) -> Any:
+        """Return a per-page product, computing it once with factory(page)"""
+        key = (page_id, name)
+        with self._lock:
+            if key in self._products:
+                return self._products[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._products:
+                    return self._products[key]
+
+            value = factory(self.page(page_id))
+
+            with self._lock:
+                self._products[key] = value
+            return value
+
+
+class TrackedPages(Sequence):
+    """Page sequence view that registers pages with a registry on access
+
+    Pages are registered under their index in the original sequence, also
+    when accessed through a slice.
+    """
+
+    def __init__(self, images: Sequence, registry: PageRegistry, indices: Optional[range] = None):
+        self._images = images
+        self._registry = registry
+        self._indices = indices if indices is not None else range(len(images))
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TrackedPages(self._images[index], self._registry, self._indices[index])
+
+        page = self._images[index]
+        self._registry.add_page(page, self._indices[index])
+        return page
@@ -0,0 +1,57 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+
+class PageExecutor:
+    """Runs per-page work on a shared thread pool, yielding results in page order
+
+    OpenCV and Tesseract release the GIL, so page tasks scale across cores
+    with threads. With max_workers=1 work runs inline in the caller's thread.
+    Each task runs in a copy of the caller's context, so context-scoped state
+    (the current page registry) is visible to the workers.
+    """
+
+    def __init__(self, max_workers: Optional[int] = 1):
+        self.max_workers = max_workers or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='page'
+                )
+            return self._executor
+
+    def map(self, func: Callable[[Any], Any], items: Sequence) -> Iterator[Any]:
+        """Apply func to each item, yielding results in input order
+
+        Closing the iterator early (e.g. breaking out of a loop) cancels
+        tasks that have not started yet.
+        """
+        if self.max_workers <= 1 or len(items) < 2:
+            for item in items:
+                yield func(item)
+            return
+
+        pool = self._pool()
+        futures = [
+            pool.submit(contextvars.copy_context().run, func, item)
+            for item in items
+        ]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        """Shut down worker threads"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
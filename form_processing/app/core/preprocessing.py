@@ -0,0 +1,208 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+from .pages import current_registry
+from .timing import count
+from ..utils.image import BilevelPage, to_gray
+
+DEFAULT_PROFILE = 'accurate'
+
+# fastNlMeansDenoising windows; an output pixel depends on input pixels up
+# to half the search window plus half the template window away
+NLMEANS_TEMPLATE_WINDOW = 7
+NLMEANS_SEARCH_WINDOW = 21
+NLMEANS_REACH = NLMEANS_SEARCH_WINDOW // 2 + NLMEANS_TEMPLATE_WINDOW // 2
+# Fewest rows per strip worth handing to another thread
+MIN_STRIP_ROWS = 256
+# Rows per band of a page preprocessed on demand
+BAND_ROWS = 128
+
+_current_profile: ContextVar = ContextVar('preprocessing_profile', default=None)
+
+_denoise_workers = os.cpu_count() or 1
+_denoise_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def configure_denoise_workers(workers: int):
+    """Set how many threads may denoise strips of one image (1 disables tiling)"""
+    global _denoise_workers, _denoise_pool
+    with _pool_lock:
+        _denoise_workers = max(1, workers)
+        if _denoise_pool is not None:
+            _denoise_pool.shutdown(wait=False)
+            _denoise_pool = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _denoise_pool
+    with _pool_lock:
+        if _denoise_pool is None:
+            _denoise_pool = ThreadPoolExecutor(_denoise_workers, thread_name_prefix='denoise')
+        return _denoise_pool
+
+
+def denoise(gray: np.ndarray) -> np.ndarray:
+    """Non-local means denoising, split into row strips across threads for large images
+
+    Strips overlap by the filter's reach and only their own rows are kept,
+    so the result is identical to denoising the whole image at once.
+    """
+    height = gray.shape[0]
+    strips = min(_denoise_workers, height // MIN_STRIP_ROWS)
+    if strips <= 1:
+        return cv2.fastNlMeansDenoising(gray, None, 3, NLMEANS_TEMPLATE_WINDOW, NLMEANS_SEARCH_WINDOW)
+
+    bounds = np.linspace(0, height, strips + 1).astype(int)
+    out = np.empty_like(gray)
+
+    def run(top: int, bottom: int):
+        lo, hi = max(0, top - NLMEANS_REACH), min(height, bottom + NLMEANS_REACH)
+        strip = cv2.fastNlMeansDenoising(gray[lo:hi], None, 3, NLMEANS_TEMPLATE_WINDOW,
+                                         NLMEANS_SEARCH_WINDOW)
+        out[top:bottom] = strip[top - lo:bottom - lo]
+
+    for future in [_pool().submit(run, top, bottom) for top, bottom in zip(bounds, bounds[1:])]:
+        future.result()
+    return out
+
+
+def adaptive(gray: np.ndarray) -> np.ndarray:
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+
+def fast(gray: np.ndarray) -> np.ndarray:
+    """Otsu threshold only, for clean digital scans"""
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+
+def balanced(gray: np.ndarray) -> np.ndarray:
+    """3x3 median blur and adaptive threshold, for ordinary scans"""
+    return adaptive(cv2.medianBlur(gray, 3))
+
+
+def accurate(gray: np.ndarray) -> np.ndarray:
+    """Non-local means denoising and adaptive threshold, for noisy or faxed scans"""
+    return adaptive(denoise(gray))
+
+
+# Every profile returns a bilevel (0/255) image, so pages can be held packed
+PROFILES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'fast': fast,
+    'balanced': balanced,
+    'accurate': accurate,
+}
+
+# Rows around an output row a profile reads (adaptive threshold: 5, median
+# blur: 1); None for profiles with a global step (Otsu picks one threshold
+# per image), which are applied to whole pages only
+PROFILE_REACH: Dict[str, Optional[int]] = {
+    'fast': None,
+    'balanced': 1 + 5,
+    'accurate': NLMEANS_REACH + 5,
+}
+
+
+def check_profile(name: str) -> str:
+    """Return name if it is a known profile, else raise ValueError"""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown preprocessing profile {name!r} (expected one of {', '.join(PROFILES)})")
+    return name
+
+
+def current_profile() -> str:
+    """Return the preprocessing profile in effect for the current context"""
+    return _current_profile.get() or DEFAULT_PROFILE
+
+
+@contextmanager
+def use_profile(name: Optional[str]):
+    """Make name the preprocessing profile for the enclosed block (None keeps the current one)"""
+    token = _current_profile.set(check_profile(name) if name else _current_profile.get())
+    try:
+        yield current_profile()
+    finally:
+        _current_profile.reset(token)
+
+
+def preprocess(image: np.ndarray, profile: Optional[str] = None) -> np.ndarray:
+    """Binarize an image for OCR with a profile (default: the current one)"""
+    return PROFILES[check_profile(profile or current_profile())](to_gray(image))
+
+
+class PreprocessedPage:
+    """A page preprocessed with one profile, band by band as crops ask for it
+
+    Runs of missing bands are preprocessed together with enough extra rows
+    on each side for the result to equal preprocessing the whole page, so
+    overlapping crops share work and a crop of half the page costs about
+    half a page. The result is held packed (one bit per pixel, an eighth
+    of the page's grayscale size) and crops are unpacked on request.
+    """
+
+    def __init__(self, page: np.ndarray, profile: str, band_rows: int = BAND_ROWS):
+        self.gray = to_gray(page)
+        self.profile = check_profile(profile)
+        self.band_rows = band_rows
+        self.image = BilevelPage.blank(*self.gray.shape[:2])
+        self._done = np.zeros(-(-self.gray.shape[0] // band_rows), dtype=bool)
+        self._lock = threading.Lock()
+
+    def crop(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Preprocessed pixels of the page covering (x1, y1, x2, y2)"""
+        x1, y1, x2, y2 = box
+        self._ensure(y1, y2)
+        return self.image.unpack(y1, y2, x1, x2)
+
+    def _ensure(self, y1: int, y2: int):
+        height = self.gray.shape[0]
+        reach = PROFILE_REACH.get(self.profile)
+        if reach is None:
+            y1, y2 = 0, height
+        first, last = y1 // self.band_rows, max(y1, y2 - 1) // self.band_rows
+
+        with self._lock:
+            band = first
+            while band <= last:
+                if self._done[band]:
+                    band += 1
+                    continue
+                end = band
+                while end + 1 <= last and not self._done[end + 1]:
+                    end += 1
+
+                top, bottom = band * self.band_rows, min(height, (end + 1) * self.band_rows)
+                lo = top if reach is None else max(0, top - reach)
+                hi = bottom if reach is None else min(height, bottom + reach)
+                count('preprocessed_rows', bottom - top)
+                result = PROFILES[self.profile](self.gray[lo:hi])
+                self.image.set_rows(top, result[top - lo:bottom - lo])
+                self._done[band:end + 1] = True
+                band = end + 1
+
+
+def preprocessed(image: np.ndarray, profile: Optional[str] = None) -> np.ndarray:
+    """Preprocessed version of an image, cut from its page's when it is a crop of a tracked page
+
+    Each row of a page of the current form is preprocessed at most once
+    per profile, on first need; every crop of it (overlapping section
+    strips, repeated crops, the page itself for a layout pass) is then cut
+    from that result. Other images are preprocessed on their own.
+    """
+    profile = check_profile(profile or current_profile())
+    registry = current_registry()
+    located = registry.locate(image) if registry is not None else None
+    if located is None:
+        return preprocess(image, profile)
+
+    page_id, box = located
+    page = registry.product(page_id, f'preprocessed:{profile}',
+                            lambda page: PreprocessedPage(page, profile))
+    return page.crop(box)
@@ -288,30 +288,64 @@ import cv2
 import numpy as np
 from pathlib import Path
 import logging
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from PIL import Image
 import re
 
 from .detector import FormDetector
+from .ocr_engine import get_ocr_engine
+from .pages import PageRegistry, use_registry
+from .parallel import PageExecutor
+from .preprocessing import DEFAULT_PROFILE, check_profile, use_profile
+from .template_index import section_rect
+from .timing import StageTimer, timed, use_timer
 from .validators.base_validator import BaseSectionValidator
 from .validators.caf_validator import CAFValidator
 from .validators.sip_validator import SIPValidator
 from .validators.multiple_sip_validator import MultipleSIPValidator
 from .validators.ctf_validator import CTFValidator
+from ..utils.image import to_gray
+from ..utils.pdf import PDFPageSource
+
+# Bump when a change alters the results produced for the same input, so
+# cached results from earlier versions are not reused
+PROCESSOR_VERSION = 11
 
 class FormProcessor:
-    def __init__(self, template_dir: Path = Path("templates")):
+    def __init__(self, template_dir: Path = Path("templates"), use_page_layout: bool = False,
+                 ocr_engine: str = 'auto', page_workers: int = 1,
+                 collect_timings: bool = False, trace_memory: bool = False,
+                 preprocessing: str = DEFAULT_PROFILE,
+                 preprocessing_overrides: Optional[Dict[str, str]] = None):
         self.template_dir = template_dir
+        self.use_page_layout = use_page_layout
+        # OCR preprocessing profile, overridable per form type ("SIP Form")
+        # or per section ("SIP Form/bank_mandate", named as in timings)
+        self.preprocessing = check_profile(preprocessing)
+        self.preprocessing_overrides = {
+            key: check_profile(profile) for key, profile in (preprocessing_overrides or {}).items()
+        }
+        self.collect_timings = collect_timings
+        self.trace_memory = trace_memory
         self.setup_logging()
         
         # Initialize detector
         self.detector = FormDetector(template_dir)
         
-        # Initialize form-specific validators
-        self.caf_validator = CAFValidator()
-        self.sip_validator = SIPValidator()
-        self.ctf_validator = CTFValidator()
-        self.multiple_sip_validator = MultipleSIPValidator()
+        # Initialize form-specific validators sharing one OCR backend
+        self.ocr_engine = get_ocr_engine(ocr_engine)
+        self.caf_validator = CAFValidator(self.ocr_engine)
+        self.sip_validator = SIPValidator(self.ocr_engine)
+        self.ctf_validator = CTFValidator(self.ocr_engine)
+        self.multiple_sip_validator = MultipleSIPValidator(self.ocr_engine)
+
+        # Per-page work of multi-page forms shares one worker pool
+        self.page_executor = PageExecutor(page_workers)
+        for validator in (self.caf_validator, self.sip_validator,
+                          self.ctf_validator, self.multiple_sip_validator):
+            validator.page_executor = self.page_executor
         
         self.current_form_type = None
 
@@ -326,8 +360,131 @@ class FormProcessor:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
 
-    def process_form(self, images: List[np.ndarray]) -> Dict:
-        """Process form images and return results"""
+    def preprocessing_profile(self, form_type: Optional[str], section: Optional[str] = None) -> str:
+        """Preprocessing profile for a form type, or for one of its sections"""
+        overrides = self.preprocessing_overrides
+        if section is not None and f"{form_type}/{section}" in overrides:
+            return overrides[f"{form_type}/{section}"]
+        return overrides.get(form_type, self.preprocessing)
+
+    @contextmanager
+    def _validating(self, results: Dict, section: str):
+        """Time a section's validation and run it with the section's preprocessing profile"""
+        profile = self.preprocessing_profile(results['form_type'], section)
+        if profile != results['preprocessing']:
+            results.setdefault('preprocessing_overrides', {})[section] = profile
+        with use_profile(profile), timed(f'validate.{section}'):
+            yield
+
+    def process_form(self, images: Sequence[np.ndarray],
+                     timer: Optional[StageTimer] = None) -> Dict:
+        """Process form images and return results
+
+        images may be a PDFPageSource: detection then runs on its
+        low-resolution pass, and only the pages and sections validators
+        need are rendered at OCR resolution.
+
+        When timings are collected (collect_timings, or a timer passed in by
+        a caller that already timed e.g. rendering) results get a 'timings'
+        block with per-stage wall time, OCR counters and page memory.
+        """
+        if timer is None and self.collect_timings:
+            timer = StageTimer(trace_memory=self.trace_memory)
+
+        # Pages accessed while processing are registered so that section crops
+        # can share per-page work (e.g. a single OCR layout pass per page)
+        registry = PageRegistry(use_layout=self.use_page_layout)
+        source = images if isinstance(images, PDFPageSource) else None
+
+        # Pages are carried as single-channel uint8 from here on (sources
+        # render gray directly), so validators skip per-crop conversions
+        if isinstance(images, (list, tuple)):
+            images = [to_gray(image) for image in images]
+        with use_registry(registry), use_timer(timer):
+            with timed('process_form'):
+                results = self._process_form(registry.track(images), source)
+
+        if timer is not None:
+            results['timings'] = timer.as_dict(page_bytes=registry.page_bytes())
+        return results
+
+    def process_many(self, sources: Iterable[Union[Sequence[np.ndarray], Callable[[], Sequence[np.ndarray]]]],
+                     ordered: bool = True, max_workers: int = 1,
+                     max_pending: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+        """Process forms one after another, yielding (index, results) as each completes
+
+        A source is a page sequence or a callable returning one, so files
+        can be opened (and PDFs rendered) only when their turn comes; pages
+        with a close() method (PDFPageSource) are closed after processing.
+        With max_workers > 1 forms are processed on a thread pool, at most
+        max_pending (default 2 * max_workers) at a time, including results
+        held back to keep them in order. With ordered=False results are
+        yielded as soon as each form completes.
+        """
+        if max_workers <= 1:
+            for index, source in enumerate(sources):
+                yield index, self._process_source(source)
+            return
+
+        max_pending = max_pending or 2 * max_workers
+        items = enumerate(sources)
+        pending = {}
+        completed: Dict[int, Dict] = {}
+        next_index = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='form') as pool:
+            try:
+                while True:
+                    # Keep the pool fed without reading ahead of the bound
+                    while len(pending) + len(completed) < max_pending:
+                        item = next(items, None)
+                        if item is None:
+                            break
+                        index, source = item
+                        pending[pool.submit(self._process_source, source)] = index
+
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        if ordered:
+                            completed[index] = future.result()
+                        else:
+                            yield index, future.result()
+
+                    while next_index in completed:
+                        yield next_index, completed.pop(next_index)
+                        next_index += 1
+            finally:
+                # Stopped early: drop forms that have not started
+                for future in pending:
+                    future.cancel()
+
+    def _process_source(self, source) -> Dict:
+        """Open a process_many source if needed, process it and release it"""
+        try:
+            images = source() if callable(source) else source
+        except Exception as e:
+            self.logger.error(f"Error opening form: {e}")
+            return {'status': 'error', 'message': str(e), 'total_pages': 0}
+
+        try:
+            if not len(images):
+                return {
+                    'status': 'error',
+                    'message': 'Failed to extract images from file',
+                    'total_pages': 0
+                }
+            return self.process_form(images)
+        finally:
+            if hasattr(images, 'close'):
+                images.close()
+
+    def _process_form(self, images: Sequence[np.ndarray],
+                      source: Optional[PDFPageSource] = None) -> Dict:
+        """Detect form type and run the form-specific validation"""
         try:
             results = {
                 'status': 'success',
@@ -340,24 +497,28 @@ class FormProcessor:
             }
 
             # Detect form type
-            form_type, confidence = self.detector.detect_form_type(images)
+            with timed('detect_form_type'):
+                preview = source.detection_images() if source is not None else None
+                form_type, confidence = self.detector.detect_form_type(images, preview)
             self.current_form_type = form_type
             results['form_type'] = form_type
             results['confidence'] = confidence
+            results['preprocessing'] = self.preprocessing_profile(form_type)
 
             self.logger.info(f"Detected form type: {form_type} with confidence: {confidence}")
 
-            if form_type == "CA Form":
-                self._process_caf_form(images, results)
-            elif form_type == "SIP Form":
-                self._process_sip_form(images, results)
-            elif form_type == "Multiple SIP Form":
-                self._process_multiple_sip_form(images, results)
-            elif form_type == "CTF Form":
-                self._process_ctf(images, results)
-            else:
-                results['status'] = 'error'
-                results['message'] = 'Unknown form type'
+            with use_profile(results['preprocessing']):
+                if form_type == "CA Form":
+                    self._process_caf_form(images, results, source)
+                elif form_type == "SIP Form":
+                    self._process_sip_form(images, results)
+                elif form_type == "Multiple SIP Form":
+                    self._process_multiple_sip_form(images, results)
+                elif form_type == "CTF Form":
+                    self._process_ctf(images, results)
+                else:
+                    results['status'] = 'error'
+                    results['message'] = 'Unknown form type'
 
             return results
 
@@ -373,23 +534,25 @@ class FormProcessor:
         """Extract section from image using coordinates"""
         height, width = image.shape[:2]
         coords = section['coordinates']
-        
-        x1 = int(coords['x'] * width)
-        y1 = int(coords['y'] * height)
-        x2 = int((coords['x'] + coords['width']) * width)
-        y2 = int((coords['y'] + coords['height']) * height)
-        
-        # Ensure coordinates are within bounds
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(width, x2), min(height, y2)
-        
-        if x2 > x1 and y2 > y1:
+
+        # Rects are resolved with the detector's arithmetic and cached per page size
+        rect = section_rect(coords, height, width)
+        if rect is not None:
+            x1, y1, x2, y2 = rect
             return image[y1:y2, x1:x2]
         else:
             self.logger.error(f"Invalid section coordinates: {coords}")
             return np.array([])
 
-    def _process_caf_form(self, images: List[np.ndarray], results: Dict):
+    def _section_image(self, images: Sequence[np.ndarray], page_num: int, coords: Dict,
+                       source: Optional[PDFPageSource] = None) -> np.ndarray:
+        """Section crop of a page, rendering only the section when a page source is given"""
+        if source is not None:
+            return source.render_region(page_num, coords)
+        return self._extract_section(images[page_num], {'coordinates': coords})
+
+    def _process_caf_form(self, images: Sequence[np.ndarray], results: Dict,
+                          source: Optional[PDFPageSource] = None):
         """Process CAF form"""
         try:
             # Process Section 8 (page 2)
@@ -400,8 +563,9 @@ class FormProcessor:
                     'width': 1.0,
                     'height': 0.5
                 }
-                section8_img = self._extract_section(images[1], {'coordinates': section8_coords})
-                is_filled, details = self.caf_validator.validate_section8(section8_img)
+                section8_img = self._section_image(images, 1, section8_coords, source)
+                with self._validating(results, 'section8'):
+                    is_filled, details = self.caf_validator.validate_section8(section8_img)
                 results['sections']['section8'] = {
                     'filled': is_filled,
                     'details': details
@@ -416,8 +580,9 @@ class FormProcessor:
                     'width': 1.0,
                     'height': 0.5
                 }
-                otm_img = self._extract_section(images[2], {'coordinates': otm_coords})
-                is_filled, details = self.caf_validator.validate_otm_section(otm_img)
+                otm_img = self._section_image(images, 2, otm_coords, source)
+                with self._validating(results, 'otm'):
+                    is_filled, details = self.caf_validator.validate_otm_section(otm_img)
                 results['sections']['otm'] = {
                     'filled': is_filled,
                     'details': details
@@ -431,18 +596,20 @@ class FormProcessor:
             results['status'] = 'error'
             results['message'] = f"Error processing CAF: {str(e)}"
 
-    def _process_sip_form(self, images: List[np.ndarray], results: Dict):
+    def _process_sip_form(self, images: Sequence[np.ndarray], results: Dict):
         """Process SIP form"""
         try:
             # Process first page sections
-            is_valid, trx_results = self.sip_validator.validate_transaction_type(images[0])
+            with self._validating(results, 'transaction_type'):
+                is_valid, trx_results = self.sip_validator.validate_transaction_type(images[0])
             results['sections']['transaction_type'] = {
                 'filled': is_valid,
                 'details': trx_results
             }
 
             # Validate SIP Details
-            is_valid, sip_results = self.sip_validator.validate_sip_details(images[0])
+            with self._validating(results, 'sip_details'):
+                is_valid, sip_results = self.sip_validator.validate_sip_details(images[0])
             results['sections']['sip_details'] = {
                 'filled': is_valid,
                 'details': sip_results
@@ -451,7 +618,8 @@ class FormProcessor:
 
             # Process OTM Section (page 2)
             if len(images) >= 2:
-                is_valid, otm_results = self.sip_validator.validate_bank_mandate(images[1])
+                with self._validating(results, 'bank_mandate'):
+                    is_valid, otm_results = self.sip_validator.validate_bank_mandate(images[1])
                 results['sections']['otm'] = {
                     'filled': is_valid,
                     'details': otm_results
@@ -463,17 +631,19 @@ class FormProcessor:
             results['status'] = 'error'
             results['message'] = f"Error processing SIP: {str(e)}"
 
-    def _process_multiple_sip_form(self, images: List[np.ndarray], results: Dict):
+    def _process_multiple_sip_form(self, images: Sequence[np.ndarray], results: Dict):
         """Process Multiple SIP form"""
         try:
             # Validate all schemes
-            is_valid, schemes_results = self.multiple_sip_validator.validate_all_schemes(images)
+            with self._validating(results, 'schemes'):
+                is_valid, schemes_results = self.multiple_sip_validator.validate_all_schemes(images)
             results['sections']['schemes'] = schemes_results
             results['sip_details_filled'] = is_valid
 
             # Process bank details
             if len(images) >= 2:
-                is_valid, bank_results = self.multiple_sip_validator.validate_bank_details(images[1])
+                with self._validating(results, 'bank_details'):
+                    is_valid, bank_results = self.multiple_sip_validator.validate_bank_details(images[1])
                 results['sections']['bank_details'] = bank_results
                 results['otm_details_filled'] = is_valid
 
@@ -483,11 +653,12 @@ class FormProcessor:
             results['message'] = f"Error processing Multiple SIP: {str(e)}"
 
 
-    def _process_ctf(self, images: List[np.ndarray], results: Dict):
+    def _process_ctf(self, images: Sequence[np.ndarray], results: Dict):
         """Process CTF form"""
         try:
             # Validate complete form
-            ctf_results = self.ctf_validator.validate_form(images)
+            with self._validating(results, 'ctf'):
+                ctf_results = self.ctf_validator.validate_form(images)
             
             # Update results
             results.update(ctf_results)
@@ -0,0 +1,147 @@
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SectionTable(NamedTuple):
+    """Sections of one template page as a read-only rect table"""
+    page: int
+    names: Tuple[str, ...]
+    types: Tuple[str, ...]
+    fractions: np.ndarray  # (n, 4) normalized x, y, width, height
+    start: int  # row range in the index-wide section table
+    stop: int
+
+
+class CompiledTemplate(NamedTuple):
+    key: str
+    name: str
+    form_type: str
+    pages: Tuple[SectionTable, ...]  # in order of first appearance in the template
+    section_count: int
+
+
+def resolve_rects(fractions: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Pixel rects (x1, y1, x2, y2) clipped to the image for normalized sections
+
+    Same arithmetic as the per-section int(coord * size) computation, so
+    crops are pixel-identical to those taken from the template dicts.
+    """
+    x, y, w, h = fractions.T
+    rects = np.stack([
+        np.trunc(x * width),
+        np.trunc(y * height),
+        np.trunc((x + w) * width),
+        np.trunc((y + h) * height)
+    ], axis=1).astype(np.int64)
+
+    np.maximum(rects[:, :2], 0, out=rects[:, :2])
+    np.minimum(rects[:, 2], width, out=rects[:, 2])
+    np.minimum(rects[:, 3], height, out=rects[:, 3])
+    rects.flags.writeable = False
+    return rects
+
+
+@lru_cache(maxsize=256)
+def _section_rect(x: float, y: float, w: float, h: float,
+                  height: int, width: int) -> Tuple[int, int, int, int]:
+    rect = resolve_rects(np.array([[x, y, w, h]], dtype=np.float64), height, width)[0]
+    return tuple(int(v) for v in rect)
+
+
+def section_rect(coords: Dict, height: int, width: int) -> Optional[Tuple[int, int, int, int]]:
+    """Pixel rect for a single coordinates dict, or None if it is empty"""
+    x1, y1, x2, y2 = _section_rect(
+        float(coords['x']), float(coords['y']),
+        float(coords['width']), float(coords['height']),
+        height, width
+    )
+    if x2 > x1 and y2 > y1:
+        return x1, y1, x2, y2
+    return None
+
+
+class TemplateIndex:
+    """Immutable index of templates compiled for matching
+
+    Section coordinates of all templates live in one (N, 4) array, so
+    resolving every template against a page size is a single vectorized
+    computation. Resolved rects are kept for the last few page sizes.
+    """
+
+    def __init__(self, templates: Dict[str, Dict], cache_size: int = 8):
+        self.cache_size = cache_size
+        compiled = []
+        fractions = []
+        offset = 0
+
+        for key, data in templates.items():
+            try:
+                pages: Dict[int, List[Dict]] = {}
+                for section in data['sections']:
+                    pages.setdefault(section['page'], []).append(section)
+
+                tables = []
+                for page, sections in pages.items():
+                    table = np.array([
+                        [s['coordinates']['x'], s['coordinates']['y'],
+                         s['coordinates']['width'], s['coordinates']['height']]
+                        for s in sections
+                    ], dtype=np.float64).reshape(-1, 4)
+                    table.flags.writeable = False
+                    tables.append(SectionTable(
+                        page=page,
+                        names=tuple(s.get('name', '') for s in sections),
+                        types=tuple(s.get('type', '') for s in sections),
+                        fractions=table,
+                        start=offset,
+                        stop=offset + len(sections)
+                    ))
+                    fractions.append(table)
+                    offset += len(sections)
+
+                compiled.append(CompiledTemplate(
+                    key=key,
+                    name=data.get('name', key),
+                    form_type=data['form_type'],
+                    pages=tuple(tables),
+                    section_count=sum(len(t.names) for t in tables)
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Error compiling template {key}: {e}")
+
+        self.templates: Tuple[CompiledTemplate, ...] = tuple(compiled)
+        self._fractions = np.concatenate(fractions) if fractions else np.empty((0, 4))
+        self._resolved: 'OrderedDict[Tuple[int, int], np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def __iter__(self):
+        return iter(self.templates)
+
+    def _resolve(self, height: int, width: int) -> np.ndarray:
+        size = (height, width)
+        with self._lock:
+            rects = self._resolved.get(size)
+            if rects is not None:
+                self._resolved.move_to_end(size)
+                return rects
+
+        rects = resolve_rects(self._fractions, height, width)
+
+        with self._lock:
+            self._resolved[size] = rects
+            while len(self._resolved) > self.cache_size:
+                self._resolved.popitem(last=False)
+        return rects
+
+    def rects(self, table: SectionTable, height: int, width: int) -> np.ndarray:
+        """Pixel rects of a page's sections for an image of the given size"""
+        return self._resolve(height, width)[table.start:table.stop]
@@ -0,0 +1,145 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+import numpy as np
+from typing import Dict, Optional
+
+_current_timer: ContextVar = ContextVar('stage_timer', default=None)
+
+# tracemalloc is process-wide: timers tracing memory at the same time would
+# reset each other's peaks, so overlapping traces report no peak at all
+_trace_lock = threading.Lock()
+_active_traces: set = set()
+_started_tracing = False
+
+
+class StageTimer:
+    """Accumulates wall time per processing stage plus OCR and memory counters
+
+    Stage times are summed, so a stage entered several times (e.g. one
+    validator called per page) reports its total. With page-parallel
+    execution stage times can add up to more than the form's wall time.
+
+    Peak traced memory is only reported for a form whose trace did not
+    overlap another form's (e.g. process_many with several workers in one
+    process), since tracemalloc keeps a single peak per process.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.peak_traced_bytes: Optional[int] = None
+        self._trace_overlapped = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_ocr(self, image: np.ndarray):
+        """Count one Tesseract invocation on image"""
+        with self._lock:
+            self.counters['ocr_calls'] = self.counters.get('ocr_calls', 0) + 1
+            self.counters['ocr_pixels'] = (
+                self.counters.get('ocr_pixels', 0) + int(image.shape[0] * image.shape[1])
+            )
+
+    def start_memory_trace(self):
+        """Start tracking peak traced allocations (NumPy arrays included)"""
+        global _started_tracing
+        if not self.trace_memory:
+            return
+        with _trace_lock:
+            self._trace_overlapped = bool(_active_traces)
+            for timer in _active_traces:
+                timer._trace_overlapped = True
+            _active_traces.add(self)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+            elif not self._trace_overlapped:
+                tracemalloc.reset_peak()
+
+    def stop_memory_trace(self):
+        global _started_tracing
+        with _trace_lock:
+            if self not in _active_traces:
+                return
+            _active_traces.discard(self)
+            if not self._trace_overlapped and tracemalloc.is_tracing():
+                _, self.peak_traced_bytes = tracemalloc.get_traced_memory()
+            if not _active_traces and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+
+    def as_dict(self, page_bytes: int = 0) -> Dict:
+        """Timings block included in processing results"""
+        with self._lock:
+            memory = {'page_array_bytes': page_bytes}
+            if self.peak_traced_bytes is not None:
+                memory['peak_traced_bytes'] = self.peak_traced_bytes
+            return {
+                'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+                'counters': dict(self.counters),
+                'memory': memory
+            }
+
+
+def current_timer() -> Optional[StageTimer]:
+    """Return the timer of the form being processed, if timings are collected"""
+    return _current_timer.get()
+
+
+@contextmanager
+def use_timer(timer: Optional[StageTimer]):
+    """Make timer the current timer for the enclosed block"""
+    token = _current_timer.set(timer)
+    if timer is not None:
+        timer.start_memory_trace()
+    try:
+        yield timer
+    finally:
+        if timer is not None:
+            timer.stop_memory_trace()
+        _current_timer.reset(token)
+
+
+@contextmanager
+def timed(name: str):
+    """Time the enclosed block on the current timer (no-op without one)"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def record_ocr(image: np.ndarray):
+    """Count an OCR invocation on the current timer"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.record_ocr(image)
+
+
+def count(name: str, amount: int = 1):
+    """Increment a counter on the current timer"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.count(name, amount)
@@ -210,24 +210,37 @@
 
 import cv2
 import numpy as np
-import pytesseract
-from typing import Dict, List, Tuple
-import re
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from .fields import text_fields
+from .ocr_cache import get_ocr_cache, ocr_cache_key
+from .ocr_engine import OCREngine, get_ocr_engine
+from .page_features import page_features
+from .timing import count, record_ocr, timed
+
 class SectionValidator:
-    def __init__(self):
+    def __init__(self, ocr_engine: Optional[OCREngine] = None):
         self.logger = logging.getLogger(__name__)
-        self.setup_ocr()
+        self.setup_ocr(ocr_engine)
 
-    def setup_ocr(self):
+    def setup_ocr(self, ocr_engine: Optional[OCREngine] = None):
         """Setup OCR configuration"""
+        self.ocr_engine = ocr_engine or get_ocr_engine()
         custom_config = r'--oem 3 --psm 6'
         self.ocr_config = custom_config
+        self.preprocessing = 'otsu'
+        self.ocr_cache = get_ocr_cache()
 
     def extract_text(self, image: np.ndarray) -> str:
         """Extract text from image"""
         try:
+            cache_key = ocr_cache_key(image, self.ocr_config, self.preprocessing, self.ocr_engine.name)
+            cached = self.ocr_cache.get(cache_key)
+            if cached is not None:
+                count('ocr_cache_hits')
+                return cached
+
             # Convert to grayscale if needed
             if len(image.shape) == 3:
                 image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -239,8 +252,12 @@ class SectionValidator:
             )[1]
             
             # Extract text
-            text = pytesseract.image_to_string(image, config=self.ocr_config)
-            return text.strip().lower()
+            record_ocr(image)
+            with timed('ocr.tesseract'):
+                text = self.ocr_engine.image_to_string(image, self.ocr_config)
+            text = text.strip().lower()
+            self.ocr_cache.put(cache_key, text)
+            return text
             
         except Exception as e:
             self.logger.error(f"Error extracting text: {e}")
@@ -264,13 +281,11 @@ class SectionValidator:
             )
             
             # Check amount
-            amount_pattern = r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?'
-            details["amount_found"] = bool(
-                re.search(amount_pattern, text)
-            )
+            fields = text_fields(text)
+            details["amount_found"] = fields.found('amount')
             
             # Check fields
-            details["fields_filled"] = len(re.findall(r'\d+', text)) >= 3
+            details["fields_filled"] = len(fields.all('digits')) >= 3
             
             is_filled = any(details.values())
             return is_filled, details
@@ -290,16 +305,11 @@ class SectionValidator:
             }
             
             # Check account number
-            account_pattern = r'\d{9,18}'
-            details["account_number_found"] = bool(
-                re.search(account_pattern, text)
-            )
+            fields = text_fields(text)
+            details["account_number_found"] = fields.found('account_number')
             
             # Check IFSC
-            ifsc_pattern = r'[A-Z]{4}0[A-Z0-9]{6}'
-            details["ifsc_found"] = bool(
-                re.search(ifsc_pattern, text.upper())
-            )
+            details["ifsc_found"] = fields.found('ifsc')
             
             is_filled = all(details.values())
             return is_filled, details
@@ -344,21 +354,11 @@ class SectionValidator:
     def _check_for_marking(self, image: np.ndarray) -> bool:
         """Check for markings or checked boxes"""
         try:
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply threshold
-            _, thresh = cv2.threshold(
-                image, 0, 255, 
-                cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-            )
-            
-            # Count dark pixels
-            dark_pixels = np.sum(thresh > 0)
-            total_pixels = thresh.size
+            # Dark pixels counted on the page's shared ink map
+            features, box = page_features(image)
             
             # If more than 5% pixels are dark, consider it marked
-            return (dark_pixels / total_pixels) > 0.05
+            return features.ink_fraction(box) > 0.05
             
         except Exception as e:
             self.logger.error(f"Error checking for marking: {e}")
@@ -1,44 +1,101 @@
-import cv2
 import numpy as np
-import pytesseract
-import re
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 import logging
 from PIL import Image
 
+from ..checkboxes import page_checkboxes
+from ..fields import text_fields
+from ..layout import PageLayout, build_page_layout
+from ..ocr_cache import get_ocr_cache, ocr_cache_key
+from ..ocr_engine import OCREngine, get_ocr_engine
+from ..page_features import Box, PageFeatures, page_features
+from ..pages import current_registry
+from ..preprocessing import current_profile, preprocessed
+from ..parallel import PageExecutor
+from ..timing import count, record_ocr, timed
+
+# Ink share above which a checkbox counts as checked, and edge share above
+# which a region counts as signed
+CHECKBOX_INK_FRACTION = 0.1
+SIGNATURE_EDGE_FRACTION = 0.01
+
 class BaseSectionValidator:
-    def __init__(self):
+    def __init__(self, ocr_engine: Optional[OCREngine] = None):
         self.logger = logging.getLogger(__name__)
-        self.setup_ocr()
+        self.page_executor = PageExecutor()
+        self.setup_ocr(ocr_engine)
 
-    def setup_ocr(self):
+    def setup_ocr(self, ocr_engine: Optional[OCREngine] = None):
         """Setup OCR configuration"""
+        self.ocr_engine = ocr_engine or get_ocr_engine()
         self.ocr_config = r'--oem 3 --psm 6'
+        self.layout_ocr_config = r'--oem 3 --psm 3'
+        self.ocr_cache = get_ocr_cache()
+
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        """Binarize an image for OCR with the current preprocessing profile"""
+        # Crops of a page are views into the page, preprocessed once
+        return preprocessed(image)
+
+    def build_layout(self, page: np.ndarray) -> PageLayout:
+        """OCR a whole page once with word boxes"""
+        with timed('ocr.preprocess'):
+            thresh = self.preprocess(page)
+        record_ocr(thresh)
+        with timed('ocr.layout'):
+            return build_page_layout(thresh, self.layout_ocr_config, self.ocr_engine)
+
+    def _text_from_layout(self, image: np.ndarray) -> Optional[str]:
+        """Answer extract_text from the page layout when in layout mode"""
+        registry = current_registry()
+        if registry is None or not registry.use_layout:
+            return None
+
+        located = registry.locate(image)
+        if located is None:
+            return None
+
+        page_id, box = located
+        layout = registry.product(page_id, f'layout:{current_profile()}', self.build_layout)
+        return layout.text_in_box(*box)
 
     def extract_text(self, image: np.ndarray) -> str:
         """Extract text from image with preprocessing"""
         try:
-            # Convert to grayscale if needed
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply preprocessing
-            # Denoise
-            denoised = cv2.fastNlMeansDenoising(image)
-            
-            # Adaptive thresholding
-            thresh = cv2.adaptiveThreshold(
-                denoised,
-                255,
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY,
-                11,
-                2
-            )
+            # In layout mode, crops of a page are served from one page-level OCR pass
+            layout_text = self._text_from_layout(image)
+            if layout_text is not None:
+                return layout_text
+
+            # Identical crops are only OCRed once. A crop of a tracked page is
+            # binarized with the page rows around it, so the same pixels can
+            # binarize differently on another page: it is keyed on its
+            # binarized pixels. Other crops are keyed on their raw pixels and
+            # the profile, which skips preprocessing on a hit.
+            registry = current_registry()
+            thresh = None
+            if registry is not None and registry.locate(image) is not None:
+                with timed('ocr.preprocess'):
+                    thresh = self.preprocess(image)
+                cache_key = ocr_cache_key(thresh, self.ocr_config, 'binarized', self.ocr_engine.name)
+            else:
+                cache_key = ocr_cache_key(image, self.ocr_config, current_profile(), self.ocr_engine.name)
+            cached = self.ocr_cache.get(cache_key)
+            if cached is not None:
+                count('ocr_cache_hits')
+                return cached
+
+            if thresh is None:
+                with timed('ocr.preprocess'):
+                    thresh = self.preprocess(image)
 
             # Extract text
-            text = pytesseract.image_to_string(thresh, config=self.ocr_config)
-            return text.strip().lower()
+            record_ocr(thresh)
+            with timed('ocr.tesseract'):
+                text = self.ocr_engine.image_to_string(thresh, self.ocr_config)
+            text = text.strip().lower()
+            self.ocr_cache.put(cache_key, text)
+            return text
             
         except Exception as e:
             self.logger.error(f"Error extracting text: {e}")
@@ -47,35 +104,56 @@ class BaseSectionValidator:
     def detect_checkbox_state(self, image: np.ndarray) -> bool:
         """Detect if a checkbox is checked"""
         try:
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Threshold
-            _, thresh = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-            
-            # Calculate percentage of black pixels
-            total_pixels = thresh.size
-            black_pixels = np.sum(thresh == 255)
-            black_percentage = black_pixels / total_pixels
-            
-            # If more than 10% is black, consider it checked
-            return black_percentage > 0.1
+            # The page is binarized once; each checkbox is a rectangle lookup
+            features, box = page_features(image)
+            return self.is_checked(features, box)
             
         except Exception as e:
             self.logger.error(f"Error detecting checkbox state: {e}")
             return False
 
+    def is_checked(self, features: PageFeatures, box: Box) -> bool:
+        """Checkbox state of a rectangle of a page"""
+        # If more than 10% is black, consider it checked
+        return features.ink_fraction(box) > CHECKBOX_INK_FRACTION
+
+    def any_checkbox_ticked(self, image: np.ndarray, box: Optional[Box] = None) -> bool:
+        """Whether any checkbox in a region of an image (default all of it) is ticked
+
+        Checkboxes are detected once per page and scored together; a region
+        with no detected checkbox falls back to its overall ink share.
+        """
+        try:
+            table, (left, top, right, bottom) = page_checkboxes(image)
+            if box is not None:
+                x1, y1, x2, y2 = box
+                left, top, right, bottom = left + x1, top + y1, left + x2, top + y2
+            box = (left, top, right, bottom)
+            found = table.within(box)
+            count('checkbox_lookups')
+            if len(found):
+                return bool(table.checked()[found].any())
+
+            features, _ = page_features(image)
+            return self.is_checked(features, box)
+
+        except Exception as e:
+            self.logger.error(f"Error detecting checkbox state: {e}")
+            return False
+
     def detect_table_content(self, image: np.ndarray) -> Tuple[bool, Dict]:
         """Detect if a table has content"""
         try:
             # Extract text
             text = self.extract_text(image)
             
+            fields = text_fields(text)
+
             # Count numbers in text
-            numbers = re.findall(r'\d+(?:\.\d+)?', text)
+            numbers = fields.values('number')
             
             # Check for currency amounts
-            amounts = re.findall(r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?', text)
+            amounts = fields.values('amount')
             
             details = {
                 'numbers_found': len(numbers),
@@ -94,13 +172,13 @@ class BaseSectionValidator:
         try:
             text = self.extract_text(image)
             
+            fields = text_fields(text)
+
             # Look for account number (9-18 digits)
-            account_pattern = r'\d{9,18}'
-            account_numbers = re.findall(account_pattern, text)
+            account_numbers = fields.values('account_number')
             
             # Look for IFSC code
-            ifsc_pattern = r'[A-Z]{4}0[A-Z0-9]{6}'
-            ifsc_codes = re.findall(ifsc_pattern, text.upper())
+            ifsc_codes = fields.values('ifsc')
             
             details = {
                 'account_number_found': bool(account_numbers),
@@ -121,19 +199,11 @@ class BaseSectionValidator:
     def detect_signature(self, image: np.ndarray) -> bool:
         """Detect presence of signature"""
         try:
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Edge detection
-            edges = cv2.Canny(image, 50, 150)
-            
-            # Count edge pixels
-            total_pixels = edges.size
-            edge_pixels = np.sum(edges == 255)
-            edge_percentage = edge_pixels / total_pixels
+            # Edges are detected once per page and counted per rectangle
+            features, box = page_features(image)
             
             # If more than 1% is edges, consider it signed
-            return edge_percentage > 0.01
+            return features.edge_fraction(box) > SIGNATURE_EDGE_FRACTION
             
         except Exception as e:
             self.logger.error(f"Error detecting signature: {e}")
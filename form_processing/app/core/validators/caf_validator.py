@@ -1,4 +1,5 @@
 from .base_validator import BaseSectionValidator
+from ..fields import text_fields
 import cv2
 import numpy as np
 from typing import Dict, Tuple
@@ -20,17 +21,17 @@ class CAFValidator(BaseSectionValidator):
             
             # Check SIP checkbox
             # Assuming checkbox is in top portion
-            height = image.shape[0]
-            checkbox_region = image[0:int(height*0.2), :]
-            results['sip_checkbox_checked'] = self.detect_checkbox_state(checkbox_region)
+            height, width = image.shape[:2]
+            results['sip_checkbox_checked'] = self.any_checkbox_ticked(
+                image, (0, 0, width, int(height*0.2))
+            )
             
             # Check for frequency
             frequency_terms = ['monthly', 'quarterly', 'yearly', 'weekly']
             results['frequency_found'] = any(term in text for term in frequency_terms)
             
             # Check for amount
-            amount_pattern = r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?'
-            results['amount_found'] = bool(re.search(amount_pattern, text))
+            results['amount_found'] = text_fields(text).found('amount')
             
             # Check scheme details
             scheme_keywords = ['scheme', 'folio', 'plan']
@@ -103,7 +104,7 @@ class CAFValidator(BaseSectionValidator):
             results['nominee_found'] = any(keyword in text for keyword in nominee_keywords)
             
             # Check if details are filled
-            has_numbers = bool(re.findall(r'\d+', text))
+            has_numbers = text_fields(text).found('digits')
             has_text = len(text.split()) > 5  # More than 5 words
             results['details_filled'] = has_numbers or has_text
             
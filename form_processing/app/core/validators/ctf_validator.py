@@ -1,14 +1,15 @@
 from .base_validator import BaseSectionValidator
 from .sip_validator import SIPValidator
+from ..fields import text_fields
+from ..ocr_engine import OCREngine
 import cv2
 import numpy as np
-from typing import Dict, Tuple, List
-import re
+from typing import Dict, Tuple, List, Optional, Sequence
 
 class CTFValidator(BaseSectionValidator):
-    def __init__(self):
-        super().__init__()
-        self.sip_validator = SIPValidator()  # For checking attached SIP forms
+    def __init__(self, ocr_engine: Optional[OCREngine] = None):
+        super().__init__(ocr_engine)
+        self.sip_validator = SIPValidator(self.ocr_engine)  # For checking attached SIP forms
         
         # Define transaction sections and their coordinates
         self.transaction_sections = {
@@ -38,7 +39,7 @@ class CTFValidator(BaseSectionValidator):
                 section_img = image[y1:y2, :]
                 
                 # Check if section is ticked/filled
-                is_checked = self.detect_checkbox_state(section_img)
+                is_checked = self.any_checkbox_ticked(section_img)
                 text = self.extract_text(section_img)
                 
                 # Look for transaction-specific keywords
@@ -56,8 +57,7 @@ class CTFValidator(BaseSectionValidator):
                     results['transactions_found'].append(trx_type)
                     
                     # Check for additional details
-                    amount_pattern = r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?'
-                    amounts = re.findall(amount_pattern, text)
+                    amounts = text_fields(text).values('amount')
                     
                     results['details'][trx_type] = {
                         'is_checked': True,
@@ -71,7 +71,7 @@ class CTFValidator(BaseSectionValidator):
             self.logger.error(f"Error validating transaction sections: {e}")
             return False, {}
 
-    def check_sip_form_attached(self, images: List[np.ndarray]) -> Tuple[bool, Dict]:
+    def check_sip_form_attached(self, images: Sequence[np.ndarray]) -> Tuple[bool, Dict]:
         """Check for attached SIP/SIP TOP UP form"""
         try:
             results = {
@@ -80,9 +80,14 @@ class CTFValidator(BaseSectionValidator):
                 'sip_details': None
             }
             
-            # Skip first page (CTF)
-            for page_num, image in enumerate(images[1:], 1):
+            # Pages holding a valid SIP form; pages after one of them are not OCRed
+            matched = []
+
+            def scan_page(page_num: int) -> Tuple[bool, Dict]:
+                if any(found < page_num for found in matched):
+                    return False, None
                 # Check for SIP form indicators
+                image = images[page_num]
                 text = self.extract_text(image)
                 sip_indicators = ['sip registration', 'sip with top-up', 'systematic investment plan']
                 
@@ -90,10 +95,18 @@ class CTFValidator(BaseSectionValidator):
                     # Found potential SIP form, validate it
                     is_valid, sip_details = self.sip_validator.validate_sip_details(image)
                     if is_valid:
-                        results['sip_form_found'] = True
-                        results['sip_form_page'] = page_num
-                        results['sip_details'] = sip_details
-                        break
+                        matched.append(page_num)
+                    return is_valid, sip_details
+                return False, None
+            
+            # Skip first page (CTF); pages are scanned concurrently, first match in page order wins
+            page_nums = range(1, len(images))
+            for page_num, (is_valid, sip_details) in zip(page_nums, self.page_executor.map(scan_page, page_nums)):
+                if is_valid:
+                    results['sip_form_found'] = True
+                    results['sip_form_page'] = page_num
+                    results['sip_details'] = sip_details
+                    break
             
             return results['sip_form_found'], results
             
@@ -101,7 +114,7 @@ class CTFValidator(BaseSectionValidator):
             self.logger.error(f"Error checking SIP form: {e}")
             return False, {}
 
-    def validate_form(self, images: List[np.ndarray]) -> Dict:
+    def validate_form(self, images: Sequence[np.ndarray]) -> Dict:
         """Complete validation of CTF form"""
         try:
             results = {
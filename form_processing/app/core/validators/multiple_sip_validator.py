@@ -1,14 +1,16 @@
 from .base_validator import BaseSectionValidator
 from .sip_validator import SIPValidator
+from ..ocr_engine import OCREngine
+from ..fields import text_fields
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import re
 
 class MultipleSIPValidator(BaseSectionValidator):
-    def __init__(self):
-        super().__init__()
-        self.sip_validator = SIPValidator()
+    def __init__(self, ocr_engine: Optional[OCREngine] = None):
+        super().__init__(ocr_engine)
+        self.sip_validator = SIPValidator(self.ocr_engine)
 
     def validate_scheme(self, image: np.ndarray, scheme_number: int) -> Tuple[bool, Dict]:
         """Validate individual scheme section"""
@@ -32,8 +34,7 @@ class MultipleSIPValidator(BaseSectionValidator):
             results.update(details)
             
             # Check for scheme-specific details
-            folio_pattern = r'folio.*\d+'
-            results['has_folio'] = bool(re.search(folio_pattern, text, re.IGNORECASE))
+            results['has_folio'] = text_fields(text).found('folio')
             
             return is_valid, results
             
@@ -41,7 +42,7 @@ class MultipleSIPValidator(BaseSectionValidator):
             self.logger.error(f"Error validating scheme {scheme_number}: {e}")
             return False, {}
 
-    def validate_all_schemes(self, images: List[np.ndarray]) -> Tuple[bool, Dict]:
+    def validate_all_schemes(self, images: Sequence[np.ndarray]) -> Tuple[bool, Dict]:
         """Validate all scheme sections"""
         try:
             results = {
@@ -50,8 +51,12 @@ class MultipleSIPValidator(BaseSectionValidator):
                 'schemes': {}
             }
             
-            for i, image in enumerate(images, 1):
-                is_valid, scheme_results = self.validate_scheme(image, i)
+            # Schemes are validated page-parallel and collected in page order
+            scheme_numbers = range(1, len(images) + 1)
+            validated = self.page_executor.map(
+                lambda i: self.validate_scheme(images[i - 1], i), scheme_numbers
+            )
+            for i, (is_valid, scheme_results) in zip(scheme_numbers, validated):
                 results['schemes'][f'scheme_{i}'] = scheme_results
                 
                 if is_valid:
@@ -80,19 +85,18 @@ class MultipleSIPValidator(BaseSectionValidator):
             text = self.extract_text(image)
             
             # Check PAN
-            pan_pattern = r'[A-Z]{5}[0-9]{4}[A-Z]{1}'
-            results['pan_found'] = bool(re.search(pan_pattern, text.upper()))
+            fields = text_fields(text)
+            results['pan_found'] = fields.found('pan')
             
             # Check contact details
-            contact_pattern = r'\d{10}|\d{3}[-\s]\d{8}'
-            results['contact_found'] = bool(re.search(contact_pattern, text))
+            results['contact_found'] = fields.found('contact')
             
             # Check investor details
             investor_keywords = ['name', 'address', 'email']
             results['investor_details_found'] = any(keyword in text for keyword in investor_keywords)
             
             # Check if details are filled
-            has_numbers = bool(re.findall(r'\d+', text))
+            has_numbers = fields.found('digits')
             has_text = len(text.split()) > 10  # More than 10 words
             results['details_filled'] = has_numbers and has_text
             
@@ -114,9 +118,7 @@ class MultipleSIPValidator(BaseSectionValidator):
             text = self.extract_text(image)
             
             # Check for multiple bank accounts
-            account_pattern = r'\d{9,18}'
-            accounts = re.findall(account_pattern, text)
-            results['total_accounts'] = len(accounts)
+            results['total_accounts'] = len(text_fields(text).all('account_number'))
             
             # Check for bank names
             bank_keywords = ['bank', 'branch', 'banker']
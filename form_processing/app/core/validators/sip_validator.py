@@ -1,8 +1,8 @@
 from .base_validator import BaseSectionValidator
+from ..fields import text_fields
 import cv2
 import numpy as np
 from typing import Dict, Tuple
-import re
 
 class SIPValidator(BaseSectionValidator):
     def validate_transaction_type(self, image: np.ndarray) -> Tuple[bool, Dict]:
@@ -31,11 +31,10 @@ class SIPValidator(BaseSectionValidator):
                     break
             
             # Check for checked checkbox
-            results['checkbox_checked'] = self.detect_checkbox_state(image)
+            results['checkbox_checked'] = self.any_checkbox_ticked(image)
             
             # Check if additional details are filled
-            details_pattern = r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?'
-            results['details_filled'] = bool(re.search(details_pattern, text))
+            results['details_filled'] = text_fields(text).found('amount')
             
             is_valid = bool(results['type_detected'] and results['checkbox_checked'])
             
@@ -62,13 +61,11 @@ class SIPValidator(BaseSectionValidator):
             results['frequency_found'] = any(term in text for term in frequency_terms)
             
             # Check amount
-            amount_pattern = r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?'
-            amounts = re.findall(amount_pattern, text)
-            results['amount_found'] = bool(amounts)
+            fields = text_fields(text)
+            results['amount_found'] = fields.found('amount')
             
             # Check period
-            period_pattern = r'\d+\s*(?:month|year|yr)'
-            results['period_found'] = bool(re.search(period_pattern, text, re.IGNORECASE))
+            results['period_found'] = fields.found('period')
             
             # Check if table/details are filled
             table_filled, table_details = self.detect_table_content(image)
@@ -105,9 +102,7 @@ class SIPValidator(BaseSectionValidator):
                 results[f'has_{check}'] = any(keyword in text for keyword in keywords)
                 
             # Check for dates
-            date_pattern = r'\d{2}[-/]\d{2}[-/]\d{2,4}'
-            dates = re.findall(date_pattern, text)
-            results['has_dates'] = bool(dates)
+            results['has_dates'] = text_fields(text).found('date')
             
             # Check for signature
             results['has_signature'] = self.detect_signature(image)
@@ -140,8 +135,7 @@ class SIPValidator(BaseSectionValidator):
             results['declaration_found'] = any(keyword in text for keyword in declaration_keywords)
             
             # Check for date
-            date_pattern = r'\d{2}[-/]\d{2}[-/]\d{2,4}'
-            results['has_date'] = bool(re.search(date_pattern, text))
+            results['has_date'] = text_fields(text).found('date')
             
             # Check for signature
             results['has_signature'] = self.detect_signature(image)
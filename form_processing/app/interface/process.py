@@ -1,19 +1,39 @@
 import streamlit as st
+import hashlib
+import json
 import numpy as np
 from PIL import Image
 import logging
 from datetime import datetime
-from pathlib import Path
-import json
-import io
-import fitz  # PyMuPDF
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from ..core.preprocessing import DEFAULT_PROFILE, PROFILES
+from ..core.processor import PROCESSOR_VERSION, FormProcessor
+from ..utils.cache import LRUCache
+from ..utils.pdf import PDFPageSource, pdf_to_images
+from ..utils.results import flatten_result, jsonl_line, to_jsonable
+
+# Forms processed concurrently when several files are uploaded
+FORM_WORKERS = 2
+# Processed forms whose results are kept across reruns
+RESULT_CACHE_ENTRIES = 256
 
-from ..core.processor import FormProcessor
+@st.cache_resource
+def get_processor(preprocessing: str = DEFAULT_PROFILE) -> FormProcessor:
+    """FormProcessor shared across sessions and reruns (templates, validators, OCR engine)"""
+    return FormProcessor(preprocessing=preprocessing)
+
+@st.cache_resource
+def get_result_cache() -> LRUCache:
+    """Results of processed uploads, shared across sessions and reruns"""
+    # Budget counts forms, not bytes
+    return LRUCache(RESULT_CACHE_ENTRIES, sizeof=lambda results: 1)
 
 class ProcessingInterface:
     def __init__(self):
-        self.processor = FormProcessor()
+        self.processor = get_processor()
+        # Picks up templates saved since the last rerun; a stat per file otherwise
+        self.processor.detector.refresh_templates()
         self.setup_logging()
 
     def setup_logging(self):
@@ -22,48 +42,36 @@ class ProcessingInterface:
     def process_pdf(self, pdf_bytes: bytes) -> List[np.ndarray]:
         """Process PDF using PyMuPDF"""
         try:
-            # Open PDF
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            images = []
-            
-            for page_num in range(len(doc)):
-                # Get page
-                page = doc[page_num]
-                
-                # Convert page to image
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
-                img_data = pix.tobytes("png")
-                
-                # Convert to numpy array
-                img = Image.open(io.BytesIO(img_data))
-                images.append(np.array(img))
-            
-            doc.close()
-            return images
+            # Pixmaps are wrapped as arrays directly, without a PNG round trip
+            return pdf_to_images(pdf_bytes)
             
         except Exception as e:
             self.logger.error(f"Error processing PDF: {e}")
             raise
 
+    def open_upload(self, uploaded_file):
+        """Open an uploaded file as grayscale pages"""
+        if uploaded_file.type == "application/pdf":
+            # Pages are rendered on demand: coarse for detection, OCR
+            # resolution only where validators look
+            return PDFPageSource(uploaded_file.getvalue(), gray=True)
+
+        image = Image.open(uploaded_file)
+        return [np.array(image.convert("L"))]
+
+    def result_key(self, uploaded_file) -> Tuple[str, str, int, str]:
+        """Cache key of an upload: its content plus everything results depend on"""
+        return (
+            hashlib.sha256(uploaded_file.getvalue()).hexdigest(),
+            self.processor.detector.template_version,
+            PROCESSOR_VERSION,
+            self.processor.preprocessing
+        )
+
     def process_file(self, uploaded_file) -> Dict:
         """Process uploaded file"""
         try:
-            # Convert to images
-            if uploaded_file.type == "application/pdf":
-                pdf_bytes = uploaded_file.read()
-                images = self.process_pdf(pdf_bytes)
-            else:
-                image = Image.open(uploaded_file)
-                images = [np.array(image)]
-
-            if not images:
-                return {
-                    'status': 'error',
-                    'message': 'Failed to extract images from file'
-                }
-
-            # Process form
-            results = self.processor.process_form(images)
+            _, results = next(self.processor.process_many([lambda: self.open_upload(uploaded_file)]))
             return results
 
         except Exception as e:
@@ -117,14 +125,14 @@ class ProcessingInterface:
 
     def check_templates(self):
             """Check available templates"""
-            template_dir = Path("templates")
-            if not template_dir.exists():
+            detector = self.processor.detector
+            if not detector.template_dir.exists():
                 st.warning("No templates directory found. Please create templates first.")
                 st.info("Go to the Template Teaching Interface to create templates.")
                 return False
 
-            templates = list(template_dir.glob("*.json"))
-            if not templates:
+            templates = detector.templates
+            if not templates and not detector.template_errors:
                 st.warning("No templates found. Please create templates first.")
                 st.info("Steps to create templates:")
                 st.markdown("""
@@ -141,15 +149,12 @@ class ProcessingInterface:
                 """)
                 return False
 
-            # Show available templates
+            # Show available templates (as loaded by the detector, no re-reading)
             st.success(f"Found {len(templates)} templates:")
-            for template_path in templates:
-                try:
-                    with open(template_path, "r") as f:
-                        template = json.load(f)
-                    st.write(f"- {template['name']} ({template['form_type']})")
-                except Exception as e:
-                    st.error(f"Error reading template {template_path.name}: {e}")
+            for template in templates.values():
+                st.write(f"- {template.get('name', '')} ({template['form_type']})")
+            for filename, error in detector.template_errors.items():
+                st.error(f"Error reading template {filename}: {error}")
 
             return True
 
@@ -162,6 +167,18 @@ class ProcessingInterface:
         if not self.check_templates():
             return
 
+        # Clean digital scans do not need denoising built for faxed pages
+        profile = st.selectbox(
+            "Scan preprocessing",
+            list(PROFILES),
+            index=list(PROFILES).index(DEFAULT_PROFILE),
+            help="fast: threshold only (clean scans); balanced: median blur; "
+                 "accurate: denoising for noisy or faxed scans"
+        )
+        if profile != self.processor.preprocessing:
+            self.processor = get_processor(profile)
+            self.processor.detector.refresh_templates()
+
         # File upload section
         st.markdown("### Upload Forms")
         uploaded_files = st.file_uploader(
@@ -172,46 +189,73 @@ class ProcessingInterface:
         )
 
         if uploaded_files:
+            # One compact JSON line per form, appended as results arrive,
+            # and the full results for the JSON export
+            result_lines = []
             results_list = []
 
-            # Process each file with progress
+            # Results are shown as each form completes, not after the whole upload
             progress_text = "Processing forms..."
             my_bar = st.progress(0, text=progress_text)
-            
-            for i, uploaded_file in enumerate(uploaded_files):
-                progress = (i + 1) / len(uploaded_files)
-                my_bar.progress(progress, text=f"Processing {uploaded_file.name}...")
-                
-                with st.spinner(f"Processing {uploaded_file.name}..."):
-                    results = self.process_file(uploaded_file)
-                    results_list.append({
-                        'filename': uploaded_file.name,
-                        'results': results
-                    })
-            
-            my_bar.empty()
 
-            # Display results for each file
-            for file_results in results_list:
-                self.display_results(
-                    file_results['results'],
-                    file_results['filename']
+            def show(index: int, results: Dict):
+                filename = uploaded_files[index].name
+                my_bar.progress(
+                    (len(result_lines) + 1) / len(uploaded_files),
+                    text=f"Processed {filename} ({len(result_lines) + 1}/{len(uploaded_files)})"
                 )
+                self.display_results(results, filename)
+                result_lines.append(jsonl_line(flatten_result(results, filename)))
+                results_list.append({
+                    'filename': filename,
+                    'results': results
+                })
+
+            # Reruns and re-uploads of already processed files are served
+            # from the result cache; only new content is processed
+            cache = get_result_cache()
+            keys = [self.result_key(uploaded_file) for uploaded_file in uploaded_files]
+            pending = []
+            for index, key in enumerate(keys):
+                results = cache.get(key)
+                if results is None:
+                    pending.append(index)
+                else:
+                    show(index, results)
+
+            sources = [
+                lambda uploaded_file=uploaded_files[index]: self.open_upload(uploaded_file)
+                for index in pending
+            ]
+            forms = self.processor.process_many(
+                sources, ordered=False, max_workers=max(1, min(FORM_WORKERS, len(pending)))
+            )
+            for position, results in forms:
+                index = pending[position]
+                # Errors may be transient (e.g. a truncated upload); retry those next time
+                if results.get('status') == 'success':
+                    cache.put(keys[index], results)
+                show(index, results)
+
+            my_bar.empty()
 
             # Export results
-            if results_list:
+            if result_lines:
+                st.download_button(
+                    label="Download Results",
+                    data=''.join(result_lines),
+                    file_name=f"form_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                    mime="application/x-ndjson",
+                    help="Download the processing results as JSON Lines (one form per line)"
+                )
                 export_data = {
                     'timestamp': datetime.now().isoformat(),
                     'results': results_list
                 }
-                
-                # Convert to JSON
-                json_str = json.dumps(export_data, indent=2)
-                
                 st.download_button(
-                    label="Download Results",
-                    data=json_str,
+                    label="Download Full Results",
+                    data=json.dumps(export_data, indent=2, default=to_jsonable),
                     file_name=f"form_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                     mime="application/json",
-                    help="Download the processing results as JSON file"
+                    help="Download the complete processing results as a JSON file"
                 )
\ No newline at end of file
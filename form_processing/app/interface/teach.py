@@ -312,6 +312,7 @@ from pathlib import Path
 from datetime import datetime
 import json
 import io
+from ..core.fingerprint import template_fingerprint
 from ..utils.pdf import pdf_to_images, is_valid_pdf
 
 class TemplateTeachingInterface:
@@ -698,6 +699,9 @@ class TemplateTeachingInterface:
                                 "sections": st.session_state.current_sections,
                                 "created_at": datetime.now().isoformat()
                             }
+                            # Reference fingerprint for fast form-type classification
+                            if st.session_state.get('pages'):
+                                template_data["fingerprint"] = template_fingerprint(st.session_state.pages)
                             
                             template_path = template_dir / f"{template_name.lower().replace(' ', '_')}.json"
                             with open(template_path, "w") as f:
@@ -750,6 +754,18 @@ class TemplateTeachingInterface:
                                 - height: {section['coordinates']['height']:.2%}
                             """)
                     
+                    # Templates saved before fingerprints existed make detection
+                    # score every template; fingerprint them from a loaded sample form
+                    if 'fingerprint' not in template_data:
+                        st.warning("No fingerprint: forms are matched against every template")
+                        if st.session_state.get('pages') and st.button(
+                                "Add fingerprint from loaded form", key=f"fingerprint_{template_file.stem}"):
+                            template_data["fingerprint"] = template_fingerprint(st.session_state.pages)
+                            with open(template_file, "w") as f:
+                                json.dump(template_data, f, indent=4)
+                            st.success("Fingerprint added!")
+                            st.rerun()
+
                     if st.button("Delete Template", key=f"delete_{template_file.stem}"):
                         template_file.unlink()
                         st.success("Template deleted!")
@@ -0,0 +1,211 @@
+"""Performance benchmarks over synthetic forms
+
+Run from the form_processing directory:
+
+    python -m app.tests.benchmark --output benchmark.json
+    python -m app.tests.benchmark --baseline benchmark.json
+
+With --baseline the run exits non-zero when a benchmark's median is slower
+than the baseline median by more than --tolerance.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from ..core.checkboxes import page_checkboxes
+from ..core.detector import FormDetector
+from ..core.ocr_cache import get_ocr_cache
+from ..core.ocr_engine import OCREngine, get_ocr_engine
+from ..core.preprocessing import PROFILES, preprocess
+from ..core.processor import FormProcessor
+from ..core.validators.base_validator import BaseSectionValidator
+from ..utils.image import to_gray
+from .synthetic import FORM_TYPES, generate_form, write_templates
+
+logger = logging.getLogger(__name__)
+
+# Regions of the synthetic SIP form used for the component benchmarks (x1, y1, x2, y2)
+CHECKBOX_REGION = (40, 194, 100, 254)
+TABLE_REGION = (40, 370, 1150, 540)
+SIGNATURE_REGION = (780, 440, 1120, 560)
+
+
+def time_call(func: Callable[[], object], repeat: int,
+              setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """Wall time of repeat calls of func, running setup untimed before each"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict:
+    return {
+        'repeat': len(samples),
+        'min': round(min(samples), 6),
+        'median': round(statistics.median(samples), 6),
+        'mean': round(statistics.fmean(samples), 6),
+        'max': round(max(samples), 6)
+    }
+
+
+def ocr_available(engine: OCREngine) -> bool:
+    """Check that the OCR backend can actually run (Tesseract installed)"""
+    try:
+        engine.image_to_string(np.full((32, 32), 255, dtype=np.uint8))
+        return True
+    except Exception as e:
+        logger.warning(f"OCR engine {engine.name} unavailable: {str(e)}")
+        return False
+
+
+def _crop(image: np.ndarray, region) -> np.ndarray:
+    x1, y1, x2, y2 = region
+    return image[y1:y2, x1:x2]
+
+
+def run_benchmarks(repeat: int = 5, form_types: Optional[List[str]] = None,
+                   ocr_engine: str = 'auto') -> Dict:
+    """Run all benchmarks and return a JSON-serializable report"""
+    form_types = form_types or FORM_TYPES
+    engine = get_ocr_engine(ocr_engine)
+    has_ocr = ocr_available(engine)
+    clear_cache = get_ocr_cache().clear
+
+    results = []
+
+    def record(name: str, samples: Optional[List[float]], form_type: str = '', **extra):
+        entry = {'name': name, 'form_type': form_type}
+        if samples is None:
+            entry['skipped'] = 'OCR engine unavailable'
+        else:
+            entry.update(summarize(samples))
+        entry.update(extra)
+        results.append(entry)
+
+    # Component benchmarks on the synthetic SIP form
+    sip_pages = generate_form("SIP Form", filled=True)
+    validator = BaseSectionValidator(engine)
+    detector = FormDetector(Path(tempfile.gettempdir()) / "no_templates")
+
+    checkbox = _crop(sip_pages[0], CHECKBOX_REGION)
+    table = _crop(sip_pages[0], TABLE_REGION)
+    signature = _crop(sip_pages[1], SIGNATURE_REGION)
+    # _match_features scores grayscale section crops, as _match_page_sections passes them
+    section = to_gray(table)
+
+    record('detect_checkbox_state', time_call(lambda: validator.detect_checkbox_state(checkbox), repeat))
+    # Whole-page checkbox search on a 2x A4 page, ink maps included
+    page = to_gray(sip_pages[0])
+    record('page_checkboxes', time_call(lambda: page_checkboxes(page), repeat))
+    record('detect_signature', time_call(lambda: validator.detect_signature(signature), repeat))
+    record('match_features', time_call(lambda: detector._match_features(section), repeat))
+    for profile in PROFILES:
+        record(f'preprocess.{profile}', time_call(lambda: preprocess(table, profile), repeat))
+    if has_ocr:
+        record('extract_text', time_call(lambda: validator.extract_text(table), repeat, setup=clear_cache))
+        record('extract_text.cached', time_call(lambda: validator.extract_text(table), repeat))
+    else:
+        record('extract_text', None)
+        record('extract_text.cached', None)
+
+    # End-to-end processing per form type against synthetic templates
+    with tempfile.TemporaryDirectory() as template_dir:
+        write_templates(Path(template_dir))
+        processor = FormProcessor(template_dir=Path(template_dir), ocr_engine=ocr_engine)
+        for form_type in form_types:
+            pages = generate_form(form_type, filled=True)
+            if not has_ocr:
+                record('process_form', None, form_type)
+                continue
+            samples = time_call(lambda: processor.process_form(pages), repeat, setup=clear_cache)
+            detected = processor.process_form(pages).get('form_type')
+            record('process_form', samples, form_type, pages=len(pages), detected_form_type=detected)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'ocr_engine': engine.name if has_ocr else None
+        },
+        'results': results
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Describe benchmarks whose median regressed beyond tolerance"""
+    previous = {
+        (entry['name'], entry['form_type']): entry['median']
+        for entry in baseline.get('results', []) if 'median' in entry
+    }
+    regressions = []
+    for entry in report['results']:
+        before = previous.get((entry['name'], entry['form_type']))
+        if before is None or 'median' not in entry:
+            continue
+        if entry['median'] > before * (1 + tolerance):
+            regressions.append(
+                f"{entry['name']} {entry['form_type']}".strip()
+                + f": {before:.4f}s -> {entry['median']:.4f}s"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark form processing on synthetic forms")
+    parser.add_argument("-o", "--output", type=Path, help="Write JSON report to this file")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--form-type", action="append", choices=FORM_TYPES, dest="form_types",
+                        help="Limit process_form benchmarks to these form types")
+    parser.add_argument("--ocr-engine", default="auto", choices=["auto", "pytesseract", "tesserocr"])
+    parser.add_argument("--baseline", type=Path, help="Compare against a previous JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown of medians against the baseline")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show processing logs")
+    args = parser.parse_args(argv)
+
+    # Per-form processing logs would swamp the benchmark output
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    report = run_benchmarks(args.repeat, args.form_types, args.ocr_engine)
+    for entry in report['results']:
+        label = f"{entry['name']} {entry['form_type']}".strip()
+        if 'median' in entry:
+            print(f"{label:<40} median {entry['median'] * 1000:10.2f} ms", file=sys.stderr)
+        else:
+            print(f"{label:<40} skipped ({entry['skipped']})", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import json
+import cv2
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from ..core.fingerprint import template_fingerprint
+
+# Page size of an A4 form rendered at 2x zoom (what process_pdf produces)
+PAGE_HEIGHT = 1684
+PAGE_WIDTH = 1190
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+FORM_TYPES = ["CA Form", "SIP Form", "Multiple SIP Form", "CTF Form"]
+
+
+class PageCanvas:
+    """Deterministic drawing helpers for a synthetic RGB form page"""
+
+    def __init__(self, rng: np.random.Generator):
+        self.image = np.full((PAGE_HEIGHT, PAGE_WIDTH, 3), 255, dtype=np.uint8)
+        self.rng = rng
+
+    def y(self, fraction: float) -> int:
+        return int(fraction * PAGE_HEIGHT)
+
+    def text(self, value: str, x: int, y: int, scale: float = 0.8, thickness: int = 2):
+        cv2.putText(self.image, value, (x, y), FONT, scale, (0, 0, 0), thickness, cv2.LINE_AA)
+
+    def heading(self, value: str, y: int):
+        cv2.rectangle(self.image, (40, y - 34), (PAGE_WIDTH - 40, y + 10), (0, 0, 0), 2)
+        self.text(value, 55, y, scale=0.9)
+
+    def checkbox(self, x: int, y: int, label: str, ticked: bool, size: int = 28):
+        cv2.rectangle(self.image, (x, y), (x + size, y + size), (0, 0, 0), 2)
+        if ticked:
+            cv2.line(self.image, (x + 5, y + 5), (x + size - 5, y + size - 5), (0, 0, 0), 4)
+            cv2.line(self.image, (x + size - 5, y + 5), (x + 5, y + size - 5), (0, 0, 0), 4)
+        self.text(label, x + size + 12, y + size - 5, scale=0.75)
+
+    def field(self, label: str, value: str, x: int, y: int, width: int, filled: bool):
+        """Labelled box, optionally filled with a value"""
+        self.text(label, x, y + 30, scale=0.7)
+        box_x = x + 230
+        cv2.rectangle(self.image, (box_x, y), (x + width, y + 42), (0, 0, 0), 2)
+        if filled:
+            self.text(value, box_x + 10, y + 31, scale=0.8)
+
+    def table(self, x: int, y: int, columns: List[str], rows: List[List[str]],
+              widths: List[int], filled: bool, row_height: int = 48):
+        """Ruled table with a header row and optional cell values"""
+        total_width = sum(widths)
+        for r in range(len(rows) + 2):
+            cv2.line(self.image, (x, y + r * row_height), (x + total_width, y + r * row_height), (0, 0, 0), 2)
+        cx = x
+        for width in widths + [0]:
+            cv2.line(self.image, (cx, y), (cx, y + (len(rows) + 1) * row_height), (0, 0, 0), 2)
+            cx += width
+
+        cx = x
+        for column, width in zip(columns, widths):
+            self.text(column, cx + 8, y + 32, scale=0.65)
+            cx += width
+
+        if not filled:
+            return
+        for r, row in enumerate(rows, 1):
+            cx = x
+            for value, width in zip(row, widths):
+                self.text(value, cx + 8, y + r * row_height + 32, scale=0.7)
+                cx += width
+
+    def signature(self, x: int, y: int, signed: bool, width: int = 300, height: int = 70):
+        cv2.rectangle(self.image, (x, y), (x + width, y + height), (0, 0, 0), 1)
+        self.text("Signature", x, y + height + 28, scale=0.6, thickness=1)
+        if not signed:
+            return
+        xs = np.linspace(x + 15, x + width - 15, 24)
+        ys = y + height / 2 + self.rng.normal(0, height / 5, size=xs.size).cumsum() / 3
+        points = np.stack([xs, np.clip(ys, y + 5, y + height - 5)], axis=1).astype(np.int32)
+        cv2.polylines(self.image, [points], False, (20, 20, 120), 3, cv2.LINE_AA)
+
+    def paragraph(self, lines: List[str], x: int, y: int, line_height: int = 34):
+        for i, line in enumerate(lines):
+            self.text(line, x, y + i * line_height, scale=0.65, thickness=1)
+
+
+def _bank_mandate(page: PageCanvas, top: int, filled: bool):
+    page.heading("ONE TIME MANDATE - BANK DETAILS", top)
+    page.field("Bank Name", "HDFC Bank Andheri Branch", 60, top + 40, 1100, filled)
+    page.field("Account No", "123456789012", 60, top + 100, 1100, filled)
+    page.field("IFSC Code", "HDFC0001234", 60, top + 160, 800, filled)
+    page.checkbox(60, top + 230, "Savings", filled)
+    page.checkbox(300, top + 230, "Current", False)
+    page.checkbox(540, top + 230, "NRE", False)
+    page.paragraph([
+        "I/We hereby authorise the AMC to debit my account as per this mandate.",
+        "Date: 05/01/2025" if filled else "Date:",
+    ], 60, top + 310)
+    page.signature(800, top + 360, filled)
+
+
+def _sip_details(page: PageCanvas, top: int, filled: bool):
+    page.heading("SIP DETAILS", top)
+    page.table(
+        60, top + 30,
+        ["Scheme", "Frequency", "Amount", "Period"],
+        [["Flexi Cap Fund Growth", "Monthly", "Rs 10,000", "24 months"],
+         ["Start date", "05/01/2025", "End date", "05/12/2026"]],
+        [430, 220, 220, 200], filled
+    )
+
+
+def _caf_pages(rng: np.random.Generator, filled: bool) -> List[np.ndarray]:
+    first = PageCanvas(rng)
+    first.text("COMMON APPLICATION FORM", 330, 90, scale=1.2, thickness=3)
+    first.heading("1. APPLICANT DETAILS", 180)
+    first.field("Name", "RAVI KUMAR", 60, 220, 1100, filled)
+    first.field("PAN", "ABCDE1234F", 60, 280, 700, filled)
+    first.field("Mobile", "9876543210", 60, 340, 700, filled)
+    first.field("Email", "ravi@example.com", 60, 400, 1100, filled)
+
+    second = PageCanvas(rng)
+    second.heading("8. SIP DETAILS", 60)
+    second.checkbox(60, 90, "SIP", filled)
+    second.checkbox(240, 90, "SIP Top-up", False)
+    second.table(
+        60, 180,
+        ["Scheme / Plan", "Frequency", "Amount", "Period"],
+        [["Flexi Cap Fund Growth", "Monthly", "Rs 5,000", "36 months"],
+         ["Folio 12345678", "Quarterly", "Rs 1,000", "12 months"]],
+        [430, 220, 220, 200], filled
+    )
+    second.heading("9. NOMINATION", second.y(0.6))
+    second.field("Nominee", "SITA KUMAR", 60, second.y(0.62), 1100, filled)
+    second.field("Relation", "Spouse", 60, second.y(0.66), 700, filled)
+
+    third = PageCanvas(rng)
+    third.heading("DECLARATION", 60)
+    third.paragraph([
+        "I/We confirm and declare that the details furnished above are true.",
+        "I/We agree to abide by the terms of the scheme information document.",
+    ], 60, 120)
+    third.signature(800, 220, filled)
+    _bank_mandate(third, third.y(0.55), filled)
+
+    return [first.image, second.image, third.image]
+
+
+def _sip_pages(rng: np.random.Generator, filled: bool) -> List[np.ndarray]:
+    first = PageCanvas(rng)
+    first.text("SIP REGISTRATION FORM", 340, 90, scale=1.2, thickness=3)
+    first.heading("TRANSACTION TYPE", 180)
+    first.checkbox(60, 210, "SIP Registration", filled)
+    first.checkbox(420, 210, "Renewal", False)
+    first.checkbox(700, 210, "Top-up", False)
+    _sip_details(first, 360, filled)
+    first.field("Folio No", "12345678", 60, 620, 700, filled)
+
+    second = PageCanvas(rng)
+    _bank_mandate(second, 100, filled)
+    return [first.image, second.image]
+
+
+def _multiple_sip_pages(rng: np.random.Generator, filled: bool) -> List[np.ndarray]:
+    first = PageCanvas(rng)
+    first.text("MULTIPLE SIP REGISTRATION FORM", 240, 90, scale=1.2, thickness=3)
+    for i in range(3):
+        top = 200 + i * 420
+        first.heading(f"SCHEME {i + 1}", top)
+        first.field("Scheme Name", f"Scheme {i + 1} Equity Fund", 60, top + 40, 1100, filled)
+        first.field("Folio No", f"1234567{i}", 60, top + 100, 700, filled)
+        first.table(
+            60, top + 170,
+            ["Frequency", "Amount", "Period"],
+            [["Monthly", f"Rs {2 + i},000", "12 months"]],
+            [300, 300, 300], filled
+        )
+
+    second = PageCanvas(rng)
+    _bank_mandate(second, 100, filled)
+    return [first.image, second.image]
+
+
+def _ctf_pages(rng: np.random.Generator, filled: bool) -> List[np.ndarray]:
+    first = PageCanvas(rng)
+    first.text("COMMON TRANSACTION FORM", 320, 90, scale=1.2, thickness=3)
+    first.field("Folio No", "12345678", 60, 200, 700, True)
+
+    top = first.y(0.25)
+    first.checkbox(60, top + 10, "Additional Purchase", filled)
+    first.field("Amount", "Rs 25,000", 60, top + 55, 800, filled)
+
+    top = first.y(0.58)
+    first.checkbox(60, top + 10, "Switch", filled)
+    first.field("From Scheme", "Liquid Fund", 60, top + 55, 1100, filled)
+    first.field("Amount", "Rs 50,000", 60, top + 115, 800, filled)
+
+    top = first.y(0.75)
+    first.checkbox(60, top + 10, "Redemption", False)
+    first.field("Units", "", 60, top + 55, 800, False)
+    first.signature(800, first.y(0.93), filled)
+
+    # Attached SIP registration page
+    attached = _sip_pages(rng, filled)[0]
+    return [first.image, attached]
+
+
+_GENERATORS = {
+    "CA Form": _caf_pages,
+    "SIP Form": _sip_pages,
+    "Multiple SIP Form": _multiple_sip_pages,
+    "CTF Form": _ctf_pages,
+}
+
+# Template sections marking the structural regions of each synthetic form
+TEMPLATE_SECTIONS = {
+    "CA Form": [
+        ("Applicant Details", "Other", 0, {'x': 0.03, 'y': 0.08, 'width': 0.94, 'height': 0.2}),
+        ("Section 8", "Section 8", 1, {'x': 0.03, 'y': 0.0, 'width': 0.94, 'height': 0.25}),
+        ("OTM Section", "OTM Section", 2, {'x': 0.03, 'y': 0.52, 'width': 0.94, 'height': 0.3}),
+    ],
+    "SIP Form": [
+        ("Transaction Type", "Transaction Type", 0, {'x': 0.03, 'y': 0.08, 'width': 0.94, 'height': 0.08}),
+        ("SIP Details", "SIP Details", 0, {'x': 0.03, 'y': 0.19, 'width': 0.94, 'height': 0.15}),
+        ("OTM Section", "OTM Section", 1, {'x': 0.03, 'y': 0.03, 'width': 0.94, 'height': 0.3}),
+    ],
+    "Multiple SIP Form": [
+        ("Scheme 1", "Scheme Details", 0, {'x': 0.03, 'y': 0.1, 'width': 0.94, 'height': 0.22}),
+        ("Scheme 2", "Scheme Details", 0, {'x': 0.03, 'y': 0.35, 'width': 0.94, 'height': 0.22}),
+        ("OTM Section", "OTM Section", 1, {'x': 0.03, 'y': 0.03, 'width': 0.94, 'height': 0.3}),
+    ],
+    "CTF Form": [
+        ("Additional Purchase", "Transaction Type", 0, {'x': 0.03, 'y': 0.25, 'width': 0.94, 'height': 0.07}),
+        ("Switch", "Transaction Type", 0, {'x': 0.03, 'y': 0.58, 'width': 0.94, 'height': 0.17}),
+        ("Redemption", "Transaction Type", 0, {'x': 0.03, 'y': 0.75, 'width': 0.94, 'height': 0.17}),
+    ],
+}
+
+
+def generate_form(form_type: str, filled: bool = True, seed: int = 0) -> List[np.ndarray]:
+    """Render a deterministic synthetic form as RGB page images"""
+    rng = np.random.default_rng(seed)
+    return _GENERATORS[form_type](rng, filled)
+
+
+def form_pdf(form_type: str, filled: bool = True, seed: int = 0) -> bytes:
+    """Synthetic form as an A4 PDF of page images"""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for image in generate_form(form_type, filled, seed):
+        ok, png = cv2.imencode(".png", image[:, :, ::-1])
+        page = doc.new_page(width=PAGE_WIDTH / 2, height=PAGE_HEIGHT / 2)
+        page.insert_image(page.rect, stream=png.tobytes())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def template_for(form_type: str) -> Dict:
+    """Template definition (as saved by the teaching interface) for a synthetic form
+
+    Like a taught template, its reference fingerprint comes from a blank form.
+    """
+    return {
+        "name": f"Synthetic {form_type}",
+        "form_type": form_type,
+        "sections": [
+            {"name": name, "type": section_type, "coordinates": coords, "page": page}
+            for name, section_type, page, coords in TEMPLATE_SECTIONS[form_type]
+        ],
+        "fingerprint": template_fingerprint(generate_form(form_type, filled=False)),
+        "created_at": datetime(2024, 1, 1).isoformat()
+    }
+
+
+def write_templates(template_dir: Path) -> List[Path]:
+    """Write templates for all synthetic form types"""
+    template_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for form_type in FORM_TYPES:
+        template = template_for(form_type)
+        path = template_dir / f"{template['name'].lower().replace(' ', '_')}.json"
+        with open(path, "w") as f:
+            json.dump(template, f, indent=4)
+        paths.append(path)
+    return paths
@@ -0,0 +1,115 @@
+import json
+import tempfile
+import unittest
+from collections import Counter
+from concurrent.futures import Executor, Future
+from pathlib import Path
+from unittest import mock
+from ... import batch
+from ...batch import collect_inputs, result_path, run_batch
+from ..utils.jobstore import JobStore
+from . import synthetic
+
+class InlineExecutor(Executor):
+    """Stand-in for the process pool running each form as it is submitted"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.inputs = self.root / 'in'
+        (self.inputs / 'sub').mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, relative: str, data: bytes = b'') -> Path:
+        path = self.inputs / relative
+        path.write_bytes(data)
+        return path.resolve()
+
+    def test_collect_file_directory_and_glob(self):
+        """Test files, directories and globs expand to supported form files"""
+        a = self.touch('a.pdf')
+        b = self.touch('sub/b.PNG')
+        c = self.touch('sub/c.jpg')
+        self.touch('sub/notes.txt')
+
+        self.assertEqual(collect_inputs([str(a)]), [a])
+        self.assertEqual(collect_inputs([str(self.inputs)]), [a, b, c])
+        self.assertEqual(collect_inputs([str(self.inputs / '**' / '*.jpg')]), [c])
+        # Overlapping patterns list each file once
+        self.assertEqual(collect_inputs([str(a), str(self.inputs / '*.pdf')]), [a])
+        self.assertEqual(collect_inputs([str(self.inputs / 'missing.pdf')]), [])
+
+    def test_result_path_mirrors_inputs(self):
+        """Test results mirror the input layout, and outside files fall back to their name"""
+        output = Path('out')
+        self.assertEqual(result_path(self.inputs / 'sub' / 'b.pdf', self.inputs, output),
+                         output / 'sub' / 'b.pdf.json')
+        self.assertEqual(result_path(self.root / 'elsewhere' / 'c.png', self.inputs, output),
+                         output / 'c.png.json')
+
+    def test_synthetic_forms_end_to_end(self):
+        """Test a batch run writes one detected result per synthetic PDF"""
+        templates = self.root / 'templates'
+        synthetic.write_templates(templates)
+        self.touch('ca.pdf', synthetic.form_pdf('CA Form'))
+        self.touch('sub/ctf.pdf', synthetic.form_pdf('CTF Form'))
+        output = self.root / 'out'
+
+        summary = run_batch(collect_inputs([str(self.inputs)]), output, templates, workers=1)
+
+        self.assertEqual((summary['forms'], summary['errors']), (2, 0))
+        self.assertEqual(summary['pages'], len(synthetic.generate_form('CA Form'))
+                         + len(synthetic.generate_form('CTF Form')))
+        for relative, form_type in (('ca.pdf.json', 'CA Form'), ('sub/ctf.pdf.json', 'CTF Form')):
+            with open(output / relative) as f:
+                record = json.load(f)
+            self.assertEqual(record['results']['status'], 'success')
+            self.assertEqual(record['results']['form_type'], form_type)
+            self.assertTrue(record['source'].endswith(relative[:-len('.json')]))
+
+    def test_interrupted_run_resumes(self):
+        """Test a rerun after an interruption processes every input exactly once"""
+        inputs = [self.touch(f'form{i}.pdf', b'%PDF-') for i in range(10)]
+        processed = Counter()
+        interrupt_at = {'form6.pdf'}
+
+        def fake_process_path(path):
+            name = Path(path).name
+            if name in interrupt_at:
+                interrupt_at.clear()
+                raise KeyboardInterrupt
+            processed[name] += 1
+            results = {'status': 'success', 'total_pages': 1}
+            return {'source': path, 'sha256': None, 'results': results, 'pages': 1, 'seconds': 0.0}
+
+        job_db = self.root / 'jobs.db'
+        output = self.root / 'out'
+        with mock.patch.object(batch, 'ProcessPoolExecutor', InlineExecutor), \
+                mock.patch.object(batch, 'process_path', fake_process_path):
+            with self.assertRaises(KeyboardInterrupt):
+                run_batch(inputs, output, workers=1, job_db=job_db, claim_size=3)
+            self.assertEqual(len(processed), 7)
+            summary = run_batch(inputs, output, workers=1, job_db=job_db, claim_size=3)
+
+        self.assertEqual(processed, Counter({path.name: 1 for path in inputs}))
+        self.assertEqual((summary['forms'], summary['skipped']), (3, 7))
+        self.assertEqual(len(list(output.glob('*.json'))), 10)
+        with JobStore(job_db) as store:
+            self.assertEqual(store.counts(), {'done': 10})
+
+if __name__ == '__main__':
+    unittest.main()
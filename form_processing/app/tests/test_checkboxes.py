@@ -0,0 +1,120 @@
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from ..core.checkboxes import detect_checkboxes
+from ..core.page_features import PageFeatures
+from ..core.pages import PageRegistry, use_registry
+from ..core.validators.base_validator import BaseSectionValidator
+from .test_data import FakeOCREngine
+from .test_page_features import checkbox_page
+
+def a4_page(ticked, solid=(), scribbled=()):
+    """2x A4 page of text lines with a grid of 4 x 6 checkboxes
+
+    The given boxes are ticked, blacked out or scribbled over.
+    """
+    page = np.full((1684, 1190), 255, dtype=np.uint8)
+    cv2.putText(page, "APPLICATION FORM", (300, 90), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    for row in range(30):
+        cv2.putText(page, "Name of the applicant, folio no. 12345 / scheme Growth option",
+                    (60, 700 + row * 30), cv2.FONT_HERSHEY_SIMPLEX, 0.65, 0, 1)
+    # A ruled table, whose cells must not count as checkboxes
+    for i in range(6):
+        cv2.line(page, (60, 1600 + i * 12), (1130, 1600 + i * 12), 0, 1)
+    boxes = []
+    for row in range(4):
+        for col in range(6):
+            x, y = 60 + col * 180, 200 + row * 110
+            cv2.rectangle(page, (x, y), (x + 28, y + 28), 0, 2)
+            if (row, col) in ticked:
+                cv2.line(page, (x + 6, y + 14), (x + 12, y + 22), 0, 3)
+                cv2.line(page, (x + 12, y + 22), (x + 24, y + 5), 0, 3)
+            if (row, col) in solid:
+                cv2.rectangle(page, (x, y), (x + 28, y + 28), 0, -1)
+            if (row, col) in scribbled:
+                for i in range(4, 26, 4):
+                    cv2.line(page, (x + 1, y + i), (x + 27, y + i + 2), 0, 2)
+                    cv2.line(page, (x + 27, y + i + 2), (x + 1, y + i + 4), 0, 2)
+            boxes.append((x, y))
+    return page, boxes
+
+class TestCheckboxes(unittest.TestCase):
+    def test_grid_detected_with_fill(self):
+        """Test every checkbox outline is found once, in reading order, and ticks score as filled"""
+        ticked = {(0, 0), (1, 4), (3, 5)}
+        page, boxes = a4_page(ticked)
+        table = detect_checkboxes(PageFeatures(page))
+
+        self.assertEqual(len(table), 24)
+        np.testing.assert_allclose(table.boxes[:, :2], boxes, atol=2)
+        checked = [divmod(int(i), 6) for i in np.flatnonzero(table.checked())]
+        self.assertEqual(set(checked), ticked)
+
+    def test_solid_and_scribbled_boxes_filled(self):
+        """Test blacked-out and scribbled-over checkboxes are found and score as filled"""
+        page, boxes = a4_page({(0, 0)}, solid={(1, 2), (3, 3)}, scribbled={(2, 5)})
+        table = detect_checkboxes(PageFeatures(page))
+
+        self.assertEqual(len(table), 24)
+        np.testing.assert_allclose(table.boxes[:, :2], boxes, atol=2)
+        checked = [divmod(int(i), 6) for i in np.flatnonzero(table.checked())]
+        self.assertEqual(set(checked), {(0, 0), (1, 2), (3, 3), (2, 5)})
+        self.assertGreater(table.fill[1 * 6 + 2], 0.95)
+
+        validator = BaseSectionValidator(FakeOCREngine())
+        self.assertTrue(validator.any_checkbox_ticked(page, (0, 300, 1190, 420)))
+        self.assertTrue(validator.any_checkbox_ticked(page, (900, 400, 1190, 530)))
+        self.assertFalse(validator.any_checkbox_ticked(page, (0, 400, 800, 530)))
+
+    def test_solid_bullets_rejected(self):
+        """Test solid square bullets are not mistaken for blacked-out checkboxes"""
+        bullets = np.full((1684, 1190), 255, dtype=np.uint8)
+        for row in range(10):
+            y = 200 + row * 60
+            cv2.rectangle(bullets, (60, y), (80, y + 20), 0, -1)
+            cv2.putText(bullets, "Investor declaration and terms of the scheme", (100, y + 18),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.65, 0, 1)
+        self.assertEqual(len(detect_checkboxes(PageFeatures(bullets))), 0)
+
+        # Next to checkboxes of another size, bullets are still not boxes
+        page, boxes = a4_page({(0, 0)}, solid={(1, 2)})
+        page[700:1300, :] = bullets[200:800]
+        table = detect_checkboxes(PageFeatures(page))
+        self.assertEqual(len(table), 24)
+        np.testing.assert_allclose(table.boxes[:, :2], boxes, atol=2)
+        self.assertEqual(int(table.checked().sum()), 2)
+
+    def test_within(self):
+        """Test selecting checkboxes by region"""
+        table = detect_checkboxes(PageFeatures(checkbox_page({1})))
+        self.assertEqual(list(table.within((0, 0, 120, 400))), [0, 1])
+        self.assertEqual(len(table.within((0, 200, 2000, 400))), 0)
+
+    def test_page_detected_once(self):
+        """Test crops of a tracked page share one detection pass"""
+        page = checkbox_page({3, 17})
+        validator = BaseSectionValidator(FakeOCREngine())
+        registry = PageRegistry()
+        registry.add_page(page)
+
+        with use_registry(registry), \
+                mock.patch('cv2.connectedComponentsWithStatsWithAlgorithm',
+                           wraps=cv2.connectedComponentsWithStatsWithAlgorithm) as components:
+            states = [validator.any_checkbox_ticked(page[:, i * 480:(i + 1) * 480]) for i in range(4)]
+            region = validator.any_checkbox_ticked(page[:, 960:1440], (0, 0, 100, 400))
+
+        self.assertEqual(states, [True, True, False, False])
+        self.assertFalse(region)
+        self.assertEqual(components.call_count, 1)
+
+    def test_falls_back_to_ink_without_checkboxes(self):
+        """Test regions without a checkbox outline use their ink share"""
+        validator = BaseSectionValidator(FakeOCREngine())
+        page = np.full((100, 100), 255, dtype=np.uint8)
+        self.assertFalse(validator.any_checkbox_ticked(page))
+        page[20:80, 20:80] = 0
+        self.assertTrue(validator.any_checkbox_ticked(page))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 from typing import Dict, List
+from ..core.fields import FIELD_PATTERNS
+from ..core.ocr_engine import OCREngine
 
 @dataclass
 class TestCase:
@@ -69,11 +71,11 @@ TEST_CASES = [
 
 # Validation test patterns
 VALIDATION_PATTERNS = {
-    'bank_account': r'\d{9,18}',
-    'ifsc': r'[A-Z]{4}0[A-Z0-9]{6}',
-    'pan': r'[A-Z]{5}[0-9]{4}[A-Z]{1}',
-    'amount': r'(?:rs|inr|₹)?\s*\d+(?:,\d+)*(?:\.\d{2})?',
-    'date': r'\d{2}[-/]\d{2}[-/]\d{2,4}'
+    'bank_account': FIELD_PATTERNS['account_number'],
+    'ifsc': FIELD_PATTERNS['ifsc'],
+    'pan': FIELD_PATTERNS['pan'],
+    'amount': FIELD_PATTERNS['amount'],
+    'date': FIELD_PATTERNS['date']
 }
 
 # Test section coordinates
@@ -87,4 +89,21 @@ TEST_SECTIONS = {
         'sip_details': {'x': 0.1, 'y': 0.3, 'width': 0.8, 'height': 0.3},
         'otm': {'x': 0.1, 'y': 0.6, 'width': 0.8, 'height': 0.3}
     }
-}
\ No newline at end of file
+}
+
+class FakeOCREngine(OCREngine):
+    """OCR engine returning canned output and counting calls"""
+    name = 'fake'
+
+    def __init__(self, text: str = '', data: Dict = None):
+        self.text = text
+        self.data = data or {}
+        self.calls = 0
+
+    def image_to_string(self, image, config=''):
+        self.calls += 1
+        return self.text
+
+    def image_to_data(self, image, config=''):
+        self.calls += 1
+        return self.data
@@ -0,0 +1,48 @@
+import re
+import unittest
+from ..core.fields import FIELD_PATTERNS, FieldMatches, text_fields
+from ..core.timing import StageTimer, use_timer
+
+TEXT = ("sip registration folio no 12345 scheme growth rs 25,000 monthly for 12 months "
+        "from 05/01/2024 account 123456789012 ifsc hdfc0123456 pan abcde1234f "
+        "contact 9876543210 rs 1,500.50")
+
+class TestFields(unittest.TestCase):
+    def test_matches_agree_with_findall(self):
+        """Test field values and offsets agree with scanning each pattern on its own"""
+        fields = FieldMatches(TEXT)
+        for field, pattern in FIELD_PATTERNS.items():
+            with self.subTest(field=field):
+                expected = pattern.findall(TEXT)
+                if field in ('ifsc', 'pan'):
+                    expected = re.findall(pattern.pattern, TEXT.upper())
+                self.assertEqual(fields.values(field), expected)
+                for match in fields.all(field):
+                    self.assertEqual(TEXT[match.start:match.end].upper(), match.value.upper())
+
+        self.assertEqual(fields.values('ifsc'), ['HDFC0123456'])
+        self.assertEqual(fields.values('date'), ['05/01/2024'])
+        self.assertTrue(fields.found('pan'))
+        self.assertFalse(FieldMatches('no digits here').found('digits'))
+
+    def test_extract_orders_by_offset(self):
+        """Test all fields come back in one list ordered by position"""
+        matches = FieldMatches(TEXT).extract(['ifsc', 'date', 'account_number'])
+        self.assertEqual([match.field for match in matches], ['date', 'account_number', 'ifsc', 'account_number'])
+        self.assertEqual([match.start for match in matches], sorted(match.start for match in matches))
+
+    def test_each_field_scanned_once_per_text(self):
+        """Test validators reading the same text share one scan per field"""
+        timer = StageTimer()
+        text = TEXT + " shared"
+        with use_timer(timer):
+            self.assertIs(text_fields(text), text_fields(text))
+            for _ in range(3):
+                text_fields(text).values('amount')
+                text_fields(text).found('amount')
+                text_fields(text).found('date')
+                text_fields(text).found('date')
+        self.assertEqual(timer.counters['field_scans'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import copy
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+from ..core.detector import FormDetector
+from ..core.fingerprint import FingerprintIndex, form_fingerprint
+from .synthetic import FORM_TYPES, generate_form, template_for, write_templates
+
+class TestFingerprint(unittest.TestCase):
+    def test_fingerprint_normalized(self):
+        """Test fingerprints are unit length and padded for missing pages"""
+        pages = generate_form("SIP Form")
+        vector = form_fingerprint(pages[:1])
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+        self.assertEqual(vector.shape, form_fingerprint(pages).shape)
+
+    def test_nearest_template_per_form_type(self):
+        """Test filled forms classify as the form type of their blank reference"""
+        index = FingerprintIndex({form_type: template_for(form_type) for form_type in FORM_TYPES})
+        self.assertEqual(len(index), len(FORM_TYPES))
+        for form_type in FORM_TYPES:
+            match = index.classify(generate_form(form_type, filled=True, seed=3))
+            self.assertEqual(match.form_type, form_type)
+            self.assertGreater(match.margin, 0.1)
+
+    def test_incompatible_fingerprints_ignored(self):
+        """Test templates without a usable fingerprint stay out of the index"""
+        stale = template_for("SIP Form")
+        stale['fingerprint']['grid'] = [8, 8]
+        missing = copy.deepcopy(template_for("CTF Form"))
+        del missing['fingerprint']
+        self.assertEqual(len(FingerprintIndex({'stale': stale, 'missing': missing})), 0)
+
+    def test_single_form_type_has_no_margin(self):
+        """Test an index of one form type reports no margin rather than a lead over nothing"""
+        index = FingerprintIndex({'sip': template_for("SIP Form")})
+        self.assertIsNone(index.classify(generate_form("SIP Form")).margin)
+
+    def test_detector_skips_scoring_on_confident_match(self):
+        """Test a confident fingerprint decides the form type without scoring templates"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            detector = FormDetector(Path(template_dir))
+        images = generate_form("CTF Form")
+
+        with mock.patch.object(detector, '_match_compiled', wraps=detector._match_compiled) as scored:
+            form_type, confidence = detector.detect_form_type(images)
+        self.assertEqual(form_type, "CTF Form")
+        self.assertEqual(scored.call_count, 0)
+        # Confidence is the fingerprint similarity
+        self.assertEqual(confidence, detector.fingerprint_index.classify(images).similarity)
+
+        # An ambiguous margin falls back to scoring every template
+        detector.fingerprint_min_margin = 2.0
+        with mock.patch.object(detector, '_match_compiled', wraps=detector._match_compiled) as scored:
+            detector.detect_form_type(images)
+        self.assertEqual(scored.call_count, len(detector.templates))
+
+    def test_fast_path_applies_threshold(self):
+        """Test a fingerprint match below the confidence threshold is reported as Unknown"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            detector = FormDetector(Path(template_dir))
+        detector.confidence_threshold = 1.0
+        form_type, confidence = detector.detect_form_type(generate_form("SIP Form"))
+        self.assertEqual(form_type, "Unknown")
+        self.assertGreater(confidence, detector.fingerprint_min_similarity)
+
+    def test_templates_without_fingerprint_are_scored(self):
+        """Test a template missing its fingerprint still wins when it matches the form"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            detector = FormDetector(Path(template_dir))
+        detector.template_set = detector.template_set._replace(fingerprints=FingerprintIndex(
+            {key: data for key, data in detector.templates.items() if key != 'synthetic_ca_form'}))
+        self.assertEqual(detector.template_set.unfingerprinted(), ['synthetic_ca_form'])
+
+        with mock.patch.object(detector, '_match_compiled', wraps=detector._match_compiled) as scored:
+            form_type, confidence = detector.detect_form_type(generate_form("CA Form"))
+        self.assertEqual(scored.call_count, len(detector.templates))
+        self.assertEqual(form_type, "CA Form")
+        self.assertGreater(confidence, detector.confidence_threshold)
+
+if __name__ == '__main__':
+    unittest.main()
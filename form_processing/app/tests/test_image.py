@@ -0,0 +1,42 @@
+import unittest
+import cv2
+import numpy as np
+from ..utils.image import BilevelPage, binarize, to_gray
+
+class TestPageRepresentation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.rgb = rng.integers(0, 256, (60, 45, 3), dtype=np.uint8)
+
+    def test_to_gray(self):
+        """Test RGB, RGBA and gray pages convert to one channel"""
+        gray = to_gray(self.rgb)
+        self.assertEqual(gray.shape, (60, 45))
+        self.assertTrue(np.array_equal(gray, cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)))
+        rgba = np.dstack([self.rgb, np.full((60, 45), 255, dtype=np.uint8)])
+        self.assertTrue(np.array_equal(to_gray(rgba), gray))
+        self.assertIs(to_gray(gray), gray)
+
+    def test_bilevel_round_trip(self):
+        """Test packed bilevel pages unpack to the Otsu ink mask at 1/8 the size"""
+        gray = to_gray(self.rgb)
+        page = binarize(gray)
+        _, expected = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        self.assertEqual(page.shape, gray.shape)
+        self.assertEqual(page.nbytes, 60 * 6)
+        self.assertTrue(np.array_equal(page.unpack(), expected))
+        self.assertTrue(np.array_equal(page.unpack(10, 20), expected[10:20]))
+        self.assertTrue(np.array_equal(page.unpack(10, 20, 3, 44), expected[10:20, 3:44]))
+        self.assertTrue(np.array_equal(page.unpack(0, 5, 16, 16), expected[0:5, 16:16]))
+
+    def test_bilevel_rows_filled_in_place(self):
+        """Test rows written into a blank page unpack to the image they came from"""
+        _, image = cv2.threshold(to_gray(self.rgb), 127, 255, cv2.THRESH_BINARY)
+        page = BilevelPage.blank(60, 45)
+        page.set_rows(20, image[20:40])
+        self.assertTrue(np.array_equal(page.unpack(20, 40), image[20:40]))
+        self.assertFalse(page.unpack(0, 20).any())
+        self.assertTrue(np.array_equal(BilevelPage.pack(image).unpack(), image))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import socket
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from ..utils.jobstore import Completion, JobStore
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "jobs.db"
+        self.store = JobStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def add(self, count, stamp='1'):
+        return self.store.add((f"form{i}.pdf", f"form{i}.pdf", stamp) for i in range(count))
+
+    def test_wal_mode(self):
+        """Test the database runs in write-ahead logging mode"""
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+    def test_claims_are_batched_and_exclusive(self):
+        """Test claims hand out each pending job once, in insertion order"""
+        self.assertEqual(self.add(5), 5)
+
+        first = self.store.claim(3)
+        second = self.store.claim(3)
+        self.assertEqual([j.key for j in first], ['form0.pdf', 'form1.pdf', 'form2.pdf'])
+        self.assertEqual([j.key for j in second], ['form3.pdf', 'form4.pdf'])
+        self.assertTrue(all(j.state == 'running' and j.attempts == 0 for j in first + second))
+        self.assertEqual(self.store.claim(3), [])
+
+        # Only jobs handed to a worker count an attempt
+        self.store.start(['form0.pdf'])
+        self.assertEqual([self.store.get(j.key).attempts for j in first], [1, 0, 0])
+
+    def test_completion_records_result(self):
+        """Test completed jobs keep their result, hash and timings"""
+        self.add(2)
+        self.store.claim(2)
+        self.store.complete([
+            Completion('form0.pdf', {'status': 'success', 'form_type': 'SIP Form'}, 'abc', 1.5, 2, 'v1'),
+            Completion('form1.pdf', {'status': 'error', 'message': 'bad scan'}, 'def', 0.1, 0, 'v1')
+        ])
+
+        done = self.store.get('form0.pdf')
+        self.assertEqual((done.state, done.hash, done.seconds, done.pages), ('done', 'abc', 1.5, 2))
+        self.assertEqual(self.store.result('form0.pdf')['form_type'], 'SIP Form')
+        self.assertEqual(self.store.get('form1.pdf').error, 'bad scan')
+        self.assertEqual(self.store.counts(), {'done': 1, 'failed': 1})
+        self.assertEqual(self.store.result_for_hash('abc', 'v1')['form_type'], 'SIP Form')
+        self.assertIsNone(self.store.result_for_hash('def', 'v1'))
+        # Results of other templates, code or preprocessing are not reused
+        self.assertIsNone(self.store.result_for_hash('abc', 'v2'))
+
+    def test_resume_skips_completed_work(self):
+        """Test a rerun only processes unfinished or changed inputs"""
+        self.add(3)
+        self.store.claim(3)
+        self.store.complete([Completion('form0.pdf', {'status': 'success'})])
+        self.store.close()
+
+        # The run died with form1 and form2 in flight
+        self.store = JobStore(self.path)
+        self.assertEqual(self.store.requeue_running(), 2)
+        self.assertEqual(self.store.get('form1.pdf').attempts, 0)
+        self.assertEqual(self.add(3), 2)
+        # Pending jobs that are not among the inputs are not counted
+        self.assertEqual(self.store.add([('other.pdf', 'other.pdf', '1')]), 1)
+        self.assertEqual(self.add(1), 0)
+        self.assertEqual([j.key for j in self.store.claim(10)], ['form1.pdf', 'form2.pdf', 'other.pdf'])
+
+        # A modified input is processed again
+        self.store.add([('form0.pdf', 'form0.pdf', '2')])
+        self.assertEqual([j.key for j in self.store.claim(10)], ['form0.pdf'])
+
+    def test_queues_are_separate(self):
+        """Test batch runs and the service sharing a database only touch their own jobs"""
+        self.store.add([('upload', 'upload.pdf', '')], 'service')
+        self.store.add([('old.pdf', 'old.pdf', '1')], 'batch')
+        self.assertEqual(self.store.add([(f"form{i}.pdf", f"form{i}.pdf", '1') for i in range(3)],
+                                        'batch'), 3)
+        self.store.claim(1, ['form0.pdf'])
+        self.store.close()
+
+        # A service restart fails its own interrupted uploads only
+        self.store = JobStore(self.path)
+        self.assertEqual(self.store.fail_unfinished('stopped', 'service'), 1)
+        self.assertEqual(self.store.get('upload').state, 'failed')
+        self.assertEqual(self.store.get('form1.pdf').state, 'pending')
+
+        # A rerun claims only its own inputs, not leftovers of other runs
+        self.assertEqual(self.store.requeue_running('batch'), 1)
+        self.assertEqual(self.store.add([(f"form{i}.pdf", f"form{i}.pdf", '1') for i in range(3)],
+                                        'batch'), 3)
+        keys = [f"form{i}.pdf" for i in range(3)]
+        self.assertEqual([j.key for j in self.store.claim(2, keys)], ['form0.pdf', 'form1.pdf'])
+        self.assertEqual([j.key for j in self.store.claim(2, keys)], ['form2.pdf'])
+        self.assertEqual(self.store.claim(2, keys), [])
+        self.assertEqual(self.store.get('old.pdf').state, 'pending')
+
+    def test_repeatedly_crashing_job_fails(self):
+        """Test jobs in flight at max_attempts crashes are not retried"""
+        self.store.max_attempts = 2
+        self.add(1)
+        for _ in range(2):
+            self.store.claim(1)
+            self.store.start(['form0.pdf'])
+            self.store.close()
+            self.store = JobStore(self.path, max_attempts=2)
+            self.store.requeue_running()
+
+        self.assertEqual(self.store.get('form0.pdf').state, 'failed')
+        self.assertEqual(self.store.claim(1), [])
+
+    def test_live_runner_keeps_its_jobs(self):
+        """Test jobs claimed by a runner that is still alive are not requeued"""
+        self.add(2)
+        self.store.claim(1)
+        with JobStore(self.path) as other:
+            self.assertEqual(other.requeue_running(), 0)
+            self.assertEqual([j.key for j in other.claim(10)], ['form1.pdf'])
+        self.assertEqual(self.store.get('form0.pdf').state, 'running')
+
+        # A runner of another process on this host that has exited
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("UPDATE jobs SET owner = ? WHERE key = 'form1.pdf'",
+                         (f"{socket.gethostname()}:{2 ** 22 + 1}:dead",))
+        self.assertEqual(self.store.requeue_running(), 1)
+        self.assertEqual(self.store.get('form1.pdf').state, 'pending')
+
+    def test_legacy_database_migrated(self):
+        """Test databases without the owner, queue and version columns gain them on open"""
+        self.store.close()
+        self.path.unlink()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE jobs (key TEXT PRIMARY KEY, source TEXT NOT NULL, "
+                         "stamp TEXT NOT NULL DEFAULT '', hash TEXT, state TEXT NOT NULL DEFAULT 'pending', "
+                         "attempts INTEGER NOT NULL DEFAULT 0, submitted_at REAL, started_at REAL, "
+                         "finished_at REAL, seconds REAL, pages INTEGER, result TEXT, error TEXT)")
+            conn.execute("INSERT INTO jobs (key, source, stamp, state) "
+                         "VALUES ('old.pdf', 'old.pdf', '1', 'running'), ('upload', 'upload.pdf', '', 'done')")
+        self.store = JobStore(self.path)
+        self.assertEqual(self.store.requeue_running('batch'), 1)
+        self.assertEqual([j.key for j in self.store.claim(1)], ['old.pdf'])
+        # Earlier service jobs were the ones added without a stamp
+        self.assertEqual(self.store.get('old.pdf').queue, 'batch')
+        self.assertEqual(self.store.get('upload').queue, 'service')
+        self.assertIsNone(self.store.result_for_hash('abc', 'v1'))
+
+if __name__ == '__main__':
+    unittest.main()
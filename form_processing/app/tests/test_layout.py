@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from ..core.layout import PageLayout
+from ..core.pages import PageRegistry, use_registry
+from ..core.validators.base_validator import BaseSectionValidator
+from .test_data import FakeOCREngine
+
+# Two lines of words on a 400x200 page, image_to_data style
+OCR_DATA = {
+    'text': ['', 'Bank', 'Mandate', 'HDFC0123456', '123456789012'],
+    'conf': ['-1', '91', '88', '75', '80'],
+    'left': [0, 10, 80, 10, 210],
+    'top': [0, 10, 10, 120, 120],
+    'width': [400, 60, 90, 150, 150],
+    'height': [200, 20, 20, 20, 20],
+    'block_num': [0, 1, 1, 2, 2],
+    'par_num': [0, 1, 1, 1, 1],
+    'line_num': [0, 1, 1, 1, 1],
+}
+
+class TestPageLayout(unittest.TestCase):
+    def setUp(self):
+        self.layout = PageLayout.from_ocr_data(OCR_DATA, 400, 200)
+
+    def test_words_in_normalized_rect(self):
+        """Test spatial lookup by normalized rectangle"""
+        top_half = {'x': 0, 'y': 0, 'width': 1.0, 'height': 0.5}
+        words = self.layout.words_in(top_half)
+        self.assertEqual([w.text for w in words], ['Bank', 'Mandate'])
+
+        bottom_right = {'x': 0.5, 'y': 0.5, 'width': 0.5, 'height': 0.5}
+        self.assertEqual(self.layout.text_in(bottom_right), '123456789012')
+
+    def test_text_keeps_line_structure(self):
+        """Test text reconstruction joins lines in reading order"""
+        text = self.layout.text_in({'x': 0, 'y': 0, 'width': 1.0, 'height': 1.0})
+        self.assertEqual(text, 'bank mandate\nhdfc0123456 123456789012')
+
+    def test_from_tsv(self):
+        """Test parsing of Tesseract TSV output"""
+        header = 'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext'
+        row = '5\t1\t1\t1\t1\t1\t10\t10\t60\t20\t91\tBank'
+        layout = PageLayout.from_tsv(f"{header}\n{row}\n", 400, 200)
+        self.assertEqual([w.text for w in layout.words], ['Bank'])
+
+class TestPageRegistry(unittest.TestCase):
+    def test_locate_views(self):
+        """Test mapping crops back to their page rectangle"""
+        registry = PageRegistry()
+        page = np.zeros((200, 400, 3), dtype=np.uint8)
+        pages = registry.track([page])
+        tracked = pages[0]
+
+        self.assertEqual(registry.locate(tracked[50:100, 20:300]), (0, (20, 50, 300, 100)))
+        self.assertEqual(registry.locate(tracked), (0, (0, 0, 400, 200)))
+        self.assertIsNone(registry.locate(tracked[50:100, 20:300].copy()))
+        self.assertIsNone(registry.locate(tracked[:, :, 0]))
+
+    def test_layout_mode_ocrs_page_once(self):
+        """Test crops are answered from a single page-level OCR pass"""
+        registry = PageRegistry(use_layout=True)
+        page = np.full((200, 400), 255, dtype=np.uint8)
+        engine = FakeOCREngine(data=OCR_DATA)
+        validator = BaseSectionValidator(engine)
+
+        with use_registry(registry):
+            tracked = registry.track([page])[0]
+            top = validator.extract_text(tracked[0:100, :])
+            bottom = validator.extract_text(tracked[100:200, :])
+
+        self.assertEqual(top, 'bank mandate')
+        self.assertEqual(bottom, 'hdfc0123456 123456789012')
+        self.assertEqual(engine.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
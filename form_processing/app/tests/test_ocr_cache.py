@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from ..utils.cache import LRUCache
+from ..core.ocr_cache import get_ocr_cache, ocr_cache_key
+from ..core.validators.base_validator import BaseSectionValidator
+from .test_data import FakeOCREngine
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used_by_size(self):
+        """Test eviction order and byte accounting"""
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        cache.put('a', 'xxxx')
+        cache.put('b', 'xxxx')
+        cache.get('a')
+        cache.put('c', 'xxxx')
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.current_bytes, 8)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_counts_hits_and_misses(self):
+        """Test hit/miss counters"""
+        cache = LRUCache(max_bytes=100, sizeof=len)
+        cache.put('a', 'text')
+        cache.get('a')
+        cache.get('missing')
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+class TestOCRCache(unittest.TestCase):
+    def setUp(self):
+        get_ocr_cache().clear()
+        self.engine = FakeOCREngine('Account 123456789\n')
+        self.validator = BaseSectionValidator(self.engine)
+
+    def test_key_depends_on_pixels_and_config(self):
+        """Test cache key sensitivity"""
+        image = np.zeros((20, 20), dtype=np.uint8)
+        other = image.copy()
+        other[5, 5] = 255
+
+        key = ocr_cache_key(image, '--psm 6', 'otsu')
+        self.assertEqual(key, ocr_cache_key(image.copy(), '--psm 6', 'otsu'))
+        self.assertNotEqual(key, ocr_cache_key(other, '--psm 6', 'otsu'))
+        self.assertNotEqual(key, ocr_cache_key(image, '--psm 4', 'otsu'))
+        self.assertNotEqual(key, ocr_cache_key(image, '--psm 6', 'adaptive'))
+
+    def test_same_crop_is_ocred_once(self):
+        """Test repeated extraction of identical regions hits the cache"""
+        page = np.full((200, 200, 3), 255, dtype=np.uint8)
+        page[50:60, 20:180] = 0
+
+        first = self.validator.extract_text(page[0:100, :])
+        second = self.validator.extract_text(page[0:100, :].copy())
+
+        self.assertEqual(first, 'account 123456789')
+        self.assertEqual(second, first)
+        self.assertEqual(self.engine.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from ..core import ocr_engine
+from ..core.ocr_engine import parse_ocr_config
+
+def text_image(text: str) -> np.ndarray:
+    image = np.full((80, 400), 255, dtype=np.uint8)
+    cv2.putText(image, text, (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    return image
+
+class TestOCREngine(unittest.TestCase):
+    def test_parse_config(self):
+        """Test Tesseract CLI configs split into oem, psm and variables"""
+        self.assertEqual(parse_ocr_config('--oem 3 --psm 6 -c tessedit_char_whitelist=0123'),
+                         (3, 6, {'tessedit_char_whitelist': '0123'}))
+        self.assertEqual(parse_ocr_config(''), (None, None, {}))
+
+    def test_tesserocr_failure_falls_back(self):
+        """Test a tesserocr that cannot list languages is reported unusable"""
+        fake = mock.Mock(get_languages=mock.Mock(side_effect=RuntimeError("no tessdata")))
+        with mock.patch.dict('sys.modules', {'tesserocr': fake}):
+            self.assertFalse(ocr_engine._tesserocr_usable('eng'))
+
+    def test_incomplete_backend_rejected(self):
+        """Test a backend missing image_to_data cannot be constructed"""
+        class TextOnly(ocr_engine.OCREngine):
+            def image_to_string(self, image, config=''):
+                return ''
+
+        with self.assertRaises(TypeError):
+            TextOnly()
+
+    @unittest.skipUnless(ocr_engine._tesserocr_usable('eng'), "tesserocr not usable")
+    def test_variables_do_not_leak_between_configs(self):
+        """Test a whitelist used by one call does not apply to later calls"""
+        engine = ocr_engine.TesserocrEngine()
+        image = text_image("AB 1234")
+        digits = engine.image_to_string(image, '--psm 7 -c tessedit_char_whitelist=0123456789')
+        plain = engine.image_to_string(image, '--psm 7')
+        self.assertNotIn('A', digits)
+        self.assertIn('AB', plain)
+        self.assertIsNot(engine._api('--psm 7'), engine._api('--psm 7 -c tessedit_char_whitelist=0123456789'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from ..core.page_features import PageFeatures, page_features
+from ..core.pages import PageRegistry, use_registry
+from ..core.timing import StageTimer, use_timer
+from ..core.validators.base_validator import BaseSectionValidator
+from .test_data import FakeOCREngine
+
+def checkbox_page(checked):
+    """White page with a row of 40 checkbox outlines, the given ones filled"""
+    page = np.full((400, 2000), 255, dtype=np.uint8)
+    for i in range(40):
+        x = 20 + i * 48
+        cv2.rectangle(page, (x, 100), (x + 30, 130), 0, 1)
+        if i in checked:
+            cv2.line(page, (x + 4, 104), (x + 26, 126), 0, 4)
+            cv2.line(page, (x + 26, 104), (x + 4, 126), 0, 4)
+    return page
+
+class TestPageFeatures(unittest.TestCase):
+    def test_fractions_match_direct_counts(self):
+        """Test rectangle queries equal pixel counts of the thresholded maps"""
+        rng = np.random.default_rng(0)
+        page = rng.integers(0, 256, (120, 90), dtype=np.uint8)
+        features = PageFeatures(page)
+
+        _, ink = cv2.threshold(page, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        edges = cv2.Canny(page, 50, 150)
+        for x1, y1, x2, y2 in [(0, 0, 90, 120), (10, 20, 30, 50), (89, 119, 90, 120)]:
+            self.assertAlmostEqual(features.ink_fraction((x1, y1, x2, y2)),
+                                   np.mean(ink[y1:y2, x1:x2] == 255))
+            self.assertAlmostEqual(features.edge_fraction((x1, y1, x2, y2)),
+                                   np.mean(edges[y1:y2, x1:x2] == 255))
+        self.assertEqual(features.ink_fraction((5, 5, 5, 9)), 0.0)
+
+    def test_untracked_image_gets_own_features(self):
+        """Test images outside a registry are measured on their own"""
+        image = np.zeros((10, 20), dtype=np.uint8)
+        features, box = page_features(image)
+        self.assertEqual(box, (0, 0, 20, 10))
+        self.assertEqual(features.shape, (10, 20))
+
+    def test_checkboxes_share_one_threshold(self):
+        """Test checking 40 checkboxes of a page thresholds the page once"""
+        page = checkbox_page({3, 17, 39})
+        validator = BaseSectionValidator(FakeOCREngine())
+        registry = PageRegistry()
+        timer = StageTimer()
+        registry.add_page(page)
+
+        with use_registry(registry), use_timer(timer), \
+                mock.patch('cv2.threshold', wraps=cv2.threshold) as threshold:
+            states = [
+                validator.detect_checkbox_state(page[94:136, 14 + i * 48:56 + i * 48])
+                for i in range(40)
+            ]
+
+        self.assertEqual([i for i, checked in enumerate(states) if checked], [3, 17, 39])
+        self.assertEqual(threshold.call_count, 1)
+        self.assertEqual(timer.counters['feature_queries'], 40)
+
+    def test_signature_uses_page_edges(self):
+        """Test signature checks on crops agree with per-crop edge detection"""
+        page = checkbox_page(set())
+        cv2.putText(page, "Signed", (100, 300), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, 2, 0, 3)
+        validator = BaseSectionValidator(FakeOCREngine())
+        registry = PageRegistry()
+        registry.add_page(page)
+
+        with use_registry(registry):
+            signed = validator.detect_signature(page[220:340, 80:500])
+            blank = validator.detect_signature(page[220:340, 1000:1400])
+        self.assertTrue(signed)
+        self.assertFalse(blank)
+        self.assertEqual((signed, blank), (validator.detect_signature(page[220:340, 80:500].copy()),
+                                           validator.detect_signature(page[220:340, 1000:1400].copy())))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+from unittest import mock
+import numpy as np
+from ..core.parallel import PageExecutor
+from ..core.validators.ctf_validator import CTFValidator
+from ..core.validators.multiple_sip_validator import MultipleSIPValidator
+from .test_data import FakeOCREngine
+
+class TestPageExecutor(unittest.TestCase):
+    def test_results_in_page_order(self):
+        """Test results are reassembled in input order"""
+        executor = PageExecutor(4)
+        threads = set()
+
+        def work(i):
+            threads.add(threading.current_thread().name)
+            return i * i
+
+        self.assertEqual(list(executor.map(work, range(20))), [i * i for i in range(20)])
+        self.assertTrue(all(name.startswith('page') for name in threads))
+        executor.close()
+
+    def test_serial_executor_runs_inline(self):
+        """Test single-worker executor does not spawn threads"""
+        executor = PageExecutor(1)
+        names = list(executor.map(lambda _: threading.current_thread().name, range(3)))
+        self.assertEqual(set(names), {threading.current_thread().name})
+
+    def test_parallel_schemes_match_serial(self):
+        """Test page-parallel scheme validation matches serial results"""
+        pages = [np.full((100, 100), 255, dtype=np.uint8) for _ in range(6)]
+        validator = MultipleSIPValidator(FakeOCREngine('scheme name monthly rs 5000 12 months'))
+
+        serial = validator.validate_all_schemes(pages)
+        validator.page_executor = PageExecutor(3)
+        parallel = validator.validate_all_schemes(pages)
+        validator.page_executor.close()
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(list(parallel[1]['schemes']), [f'scheme_{i}' for i in range(1, 7)])
+
+    def test_ctf_scan_stops_at_first_sip_page(self):
+        """Test pages after an attached SIP form are not OCRed"""
+        pages = [np.full((100, 100), i, dtype=np.uint8) for i in range(8)]
+        validator = CTFValidator(FakeOCREngine())
+        validator.page_executor = PageExecutor(2)
+        scanned = []
+
+        def extract_text(image, *args, **kwargs):
+            scanned.append(int(image[0, 0]))
+            if image[0, 0] != 1:
+                time.sleep(0.05)
+            return 'sip registration'
+
+        with mock.patch.object(validator, 'extract_text', side_effect=extract_text), \
+                mock.patch.object(validator.sip_validator, 'validate_sip_details', return_value=(True, {})):
+            found, results = validator.check_sip_form_attached(pages)
+        validator.page_executor.close()
+
+        self.assertTrue(found)
+        self.assertEqual(results['sip_form_page'], 1)
+        self.assertLessEqual(len(scanned), 2)
+
+if __name__ == '__main__':
+    unittest.main()
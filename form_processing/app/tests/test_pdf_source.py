@@ -0,0 +1,145 @@
+import gc
+import tempfile
+import unittest
+import weakref
+from pathlib import Path
+import fitz
+import numpy as np
+from ..core.detector import FormDetector
+from ..core.fingerprint import PAGES
+from ..core.pages import PageRegistry
+from ..core.parallel import PageExecutor
+from ..utils.pdf import PDFPageSource, PixmapArray, pdf_to_images
+from .synthetic import PAGE_HEIGHT, PAGE_WIDTH, form_pdf, write_templates
+
+class TestPixmapArrays(unittest.TestCase):
+    def test_pages_wrap_pixmap_samples(self):
+        """Test rendered pages share the pixmap buffer instead of copying it"""
+        page = pdf_to_images(form_pdf("SIP Form"))[0]
+        self.assertIsInstance(page, PixmapArray)
+        self.assertFalse(page.flags.owndata)
+        self.assertEqual(bytes(page.pixmap.samples_mv[:30]), page.tobytes()[:30])
+
+    def test_views_keep_pixmap_alive(self):
+        """Test crops stay valid after the page array itself is released"""
+        page = pdf_to_images(form_pdf("SIP Form"))[0]
+        expected = np.array(page[100:300, 50:500])
+        crop = np.asarray(page[100:300])[:, 50:500]
+        del page
+        gc.collect()
+        filler = [np.full((PAGE_HEIGHT, PAGE_WIDTH, 3), 7, dtype=np.uint8) for _ in range(4)]
+        self.assertTrue(np.array_equal(crop, expected))
+        del filler
+
+    def test_grayscale_rendering(self):
+        """Test pages can be rendered straight to one channel"""
+        gray = pdf_to_images(form_pdf("SIP Form"), gray=True)[0]
+        self.assertEqual(gray.shape, (PAGE_HEIGHT, PAGE_WIDTH))
+
+class TestPDFPageSource(unittest.TestCase):
+    def setUp(self):
+        self.data = form_pdf("CA Form")
+        self.source = PDFPageSource(self.data)
+
+    def tearDown(self):
+        self.source.close()
+
+    def test_pages_rendered_on_access(self):
+        """Test pages render at OCR scale only when indexed"""
+        self.assertEqual(len(self.source), 3)
+        self.assertEqual(self.source.cached_pages(), [])
+        page = self.source[-1]
+        self.assertEqual(page.shape, (PAGE_HEIGHT, PAGE_WIDTH, 3))
+        self.assertIs(self.source[2], page)
+        self.assertEqual(self.source.cached_pages(), [2])
+        with self.assertRaises(IndexError):
+            self.source[3]
+
+    def test_detection_images_low_resolution(self):
+        """Test detection pass renders pages at detection scale as they are read"""
+        previews = self.source.detection_images()
+        self.assertEqual(len(previews), 3)
+        self.assertEqual(self.source.detection_pages(), [])
+        self.assertEqual(previews[0].shape, (round(PAGE_HEIGHT / 4), round(PAGE_WIDTH / 4), 3))
+        self.assertIs(previews[-3], previews[0])
+        self.assertEqual(self.source.detection_pages(), [0])
+        self.assertEqual(self.source.cached_pages(), [])
+
+    def test_region_matches_page_crop(self):
+        """Test clip-rendered sections match crops of the full page"""
+        coords = {'x': 0, 'y': 0.5, 'width': 1.0, 'height': 0.5}
+        region = self.source.render_region(2, coords)
+        page = pdf_to_images(self.data)[2]
+        crop = page[PAGE_HEIGHT // 2:, :]
+        self.assertEqual(region.shape, crop.shape)
+        self.assertLess(np.abs(region.astype(int) - crop).mean(), 2.0)
+        self.assertEqual(self.source.cached_pages(), [])
+
+        # Once the page is rendered, sections are views into it
+        full = self.source[2]
+        self.assertTrue(np.shares_memory(self.source.render_region(2, coords), full))
+
+    def test_decoded_pages_bounded(self):
+        """Test least recently used pages are evicted beyond the cache size"""
+        with PDFPageSource(form_pdf("CA Form"), max_cached_pages=2) as source:
+            first = source[0]
+            source[1]
+            source[2]
+            self.assertEqual(source.cached_pages(), [1, 2])
+            again = source[0]
+            self.assertIsNot(again, first)
+            self.assertTrue(np.array_equal(again, first))
+
+    def test_registry_follows_evicted_pages(self):
+        """Test pages rendered again after eviction keep their id and are not held by the registry"""
+        document = fitz.open()
+        for _ in range(12):
+            document.new_page(width=200, height=300)
+        registry = PageRegistry()
+        read = []
+
+        with PDFPageSource(document.tobytes(), max_cached_pages=2, gray=True) as source:
+            pages = registry.track(source)
+            for _ in range(2):
+                for index in range(len(pages)):
+                    page = pages[index]
+                    self.assertEqual(registry.locate(page[10:20, 10:20])[0], index)
+                    read.append(weakref.ref(page))
+                del page
+            gc.collect()
+            self.assertLessEqual(sum(ref() is not None for ref in read), 2)
+            self.assertEqual(registry.locate(pages[1:][4])[0], 5)
+            self.assertEqual(registry.page_bytes(), 12 * source[0].nbytes)
+
+    def test_slices_are_lazy(self):
+        """Test slicing and iteration render pages only when reached"""
+        tail = self.source[1:]
+        self.assertEqual(len(tail), 2)
+        self.assertEqual(self.source.cached_pages(), [])
+        self.assertEqual(tail[::-1][0].shape, (PAGE_HEIGHT, PAGE_WIDTH, 3))
+        self.assertEqual(self.source.cached_pages(), [2])
+        self.assertEqual(len(list(self.source)), 3)
+
+    def test_shared_between_page_workers(self):
+        """Test concurrent page access renders each page correctly"""
+        executor = PageExecutor(4)
+        expected = pdf_to_images(self.data)
+        pages = list(executor.map(lambda i: self.source[i % 3].copy(), range(12)))
+        executor.close()
+        for i, page in enumerate(pages):
+            self.assertTrue(np.array_equal(page, expected[i % 3]))
+
+    def test_detection_from_preview(self):
+        """Test form type is classified from the low-resolution pass"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            detector = FormDetector(Path(template_dir))
+        form_type, _ = detector.detect_form_type(self.source, self.source.detection_images())
+        self.assertEqual(form_type, "CA Form")
+        # The fingerprint reads only the leading pages at detection scale
+        self.assertEqual(self.source.detection_pages(), list(range(PAGES)))
+        # A confident fingerprint scores no template, so no page is rendered at full size
+        self.assertEqual(self.source.cached_pages(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import cv2
+import numpy as np
+from ..core import preprocessing
+from ..core.preprocessing import (DEFAULT_PROFILE, PROFILES, configure_denoise_workers,
+                                  current_profile, denoise, preprocess, use_profile)
+from ..core.pages import PageRegistry, use_registry
+from ..core.processor import FormProcessor
+from ..core.timing import StageTimer, use_timer
+from ..core.validators.base_validator import BaseSectionValidator
+from .synthetic import generate_form, write_templates
+from .test_data import FakeOCREngine
+
+def noisy_page(height=900, width=300):
+    rng = np.random.default_rng(0)
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for row in range(20, height, 40):
+        cv2.putText(page, "Folio 1234", (10, row), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    return np.clip(page + rng.normal(0, 20, page.shape), 0, 255).astype(np.uint8)
+
+class TestPreprocessing(unittest.TestCase):
+    def setUp(self):
+        self.denoise_workers = preprocessing._denoise_workers
+
+    def tearDown(self):
+        configure_denoise_workers(self.denoise_workers)
+
+    def test_profiles_binarize(self):
+        """Test every profile returns a binary image of the input size"""
+        page = cv2.cvtColor(noisy_page(), cv2.COLOR_GRAY2BGR)
+        for profile in PROFILES:
+            thresh = preprocess(page, profile)
+            self.assertEqual(thresh.shape, page.shape[:2])
+            self.assertTrue(set(np.unique(thresh)) <= {0, 255})
+
+    def test_strips_match_whole_image(self):
+        """Test denoising in overlapping strips equals denoising the whole image"""
+        page = noisy_page()
+        configure_denoise_workers(3)
+        with mock.patch('cv2.fastNlMeansDenoising', wraps=cv2.fastNlMeansDenoising) as nlmeans:
+            tiled = denoise(page)
+        self.assertEqual(nlmeans.call_count, 3)
+        self.assertTrue(np.array_equal(tiled, cv2.fastNlMeansDenoising(page)))
+
+    def test_profile_context(self):
+        """Test the current profile follows use_profile and rejects unknown names"""
+        self.assertEqual(current_profile(), DEFAULT_PROFILE)
+        with use_profile('fast'):
+            self.assertEqual(current_profile(), 'fast')
+            with use_profile(None):
+                self.assertEqual(current_profile(), 'fast')
+        self.assertEqual(current_profile(), DEFAULT_PROFILE)
+        with self.assertRaises(ValueError):
+            with use_profile('sharpest'):
+                pass
+
+    def test_profile_in_ocr_cache_key(self):
+        """Test the same crop is OCRed again under another profile"""
+        engine = FakeOCREngine('folio 1234')
+        validator = BaseSectionValidator(engine)
+        validator.ocr_cache.clear()
+        crop = noisy_page(100, 100)
+        with use_profile('fast'):
+            validator.extract_text(crop)
+            validator.extract_text(crop)
+        with use_profile('balanced'):
+            validator.extract_text(crop)
+        self.assertEqual(engine.calls, 2)
+
+    def test_crops_share_preprocessed_page(self):
+        """Test overlapping crops of a tracked page are cut from one preprocessed page
+
+        Each row is preprocessed once per profile; the global Otsu step of
+        the fast profile covers the whole page.
+        """
+        page = noisy_page()
+        engine = FakeOCREngine('folio 1234')
+        validator = BaseSectionValidator(engine)
+        validator.ocr_cache.clear()
+        seen = []
+        engine.image_to_string = lambda image, config='': seen.append(image) or 'folio 1234'
+        registry = PageRegistry()
+        timer = StageTimer()
+        registry.add_page(page)
+
+        with use_registry(registry), use_timer(timer), use_profile('balanced'):
+            validator.extract_text(page[0:400, :])
+            self.assertEqual(timer.counters['preprocessed_rows'], 512)
+            validator.extract_text(page[300:700, :])
+            validator.extract_text(page[600:900, :])
+            self.assertEqual(timer.counters['preprocessed_rows'], 900)
+            with use_profile('fast'):
+                validator.extract_text(page[0:400, :])
+
+        self.assertEqual(timer.counters['preprocessed_rows'], 1800)
+        whole = preprocess(page, 'balanced')
+        for image, (y1, y2) in zip(seen, [(0, 400), (300, 700), (600, 900)]):
+            self.assertTrue(np.array_equal(image, whole[y1:y2]))
+        self.assertTrue(np.array_equal(seen[3], preprocess(page, 'fast')[0:400]))
+        # The preprocessed page is held packed, a bit per pixel
+        held = registry.product(0, 'preprocessed:balanced', None)
+        self.assertEqual(held.image.nbytes, page.shape[0] * -(-page.shape[1] // 8))
+
+        # Images outside the registry are preprocessed on their own
+        self.assertTrue(np.array_equal(preprocessing.preprocessed(page[0:400], 'balanced'),
+                                       preprocess(page[0:400], 'balanced')))
+
+    def test_page_crops_keyed_on_binarized_pixels(self):
+        """Test equal crops of pages that differ around them are not served from one cache entry"""
+        engine = FakeOCREngine('folio 1234')
+        validator = BaseSectionValidator(engine)
+        validator.ocr_cache.clear()
+        page = noisy_page()
+        # Same rows 100:200, but ink just above them shifts their adaptive threshold
+        other = page.copy()
+        other[95:100] = 0
+        self.assertTrue(np.array_equal(page[100:200], other[100:200]))
+
+        with use_profile('balanced'):
+            for image in (page, other, page.copy()):
+                registry = PageRegistry()
+                with use_registry(registry):
+                    validator.extract_text(registry.track([image])[0][100:200])
+
+        self.assertEqual(engine.calls, 2)
+
+    def test_processor_overrides(self):
+        """Test per form type and per section profiles are applied and recorded"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            processor = FormProcessor(Path(template_dir), ocr_engine='pytesseract',
+                                      preprocessing='balanced',
+                                      preprocessing_overrides={'SIP Form': 'fast',
+                                                               'SIP Form/bank_mandate': 'accurate'})
+        processor.sip_validator.ocr_engine = FakeOCREngine()
+        used = []
+        profiles = {name: mock.Mock(side_effect=lambda gray, name=name: used.append(name) or gray)
+                    for name in PROFILES}
+
+        with mock.patch.dict(preprocessing.PROFILES, profiles):
+            results = processor.process_form(generate_form("SIP Form", filled=True))
+
+        self.assertEqual(results['form_type'], "SIP Form")
+        self.assertEqual(results['preprocessing'], 'fast')
+        self.assertEqual(results['preprocessing_overrides'], {'bank_mandate': 'accurate'})
+        self.assertEqual(set(used), {'fast', 'accurate'})
+        self.assertEqual(processor.preprocessing_profile("CTF Form"), 'balanced')
+
+        with self.assertRaises(ValueError):
+            FormProcessor(preprocessing='sharpest')
+
+if __name__ == '__main__':
+    unittest.main()
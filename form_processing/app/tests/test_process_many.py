@@ -0,0 +1,87 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+from ..core.processor import FormProcessor
+
+class ClosablePages(list):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+class TestProcessMany(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as template_dir:
+            self.processor = FormProcessor(Path(template_dir))
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def fake_process_form(self, images):
+        """Stand-in for process_form; later forms finish first"""
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02 * (5 - len(images) % 5))
+        with self.lock:
+            self.active -= 1
+        return {'status': 'success', 'total_pages': len(images)}
+
+    def sources(self, count):
+        return [[np.zeros((4, 4), dtype=np.uint8)] * (i + 1) for i in range(count)]
+
+    def test_serial_results_in_order(self):
+        """Test single-worker processing yields every form in order"""
+        with mock.patch.object(self.processor, 'process_form', self.fake_process_form):
+            results = list(self.processor.process_many(self.sources(4)))
+        self.assertEqual([index for index, _ in results], [0, 1, 2, 3])
+        self.assertEqual([r['total_pages'] for _, r in results], [1, 2, 3, 4])
+
+    def test_parallel_ordered_and_unordered(self):
+        """Test pooled processing keeps input order unless asked not to"""
+        with mock.patch.object(self.processor, 'process_form', self.fake_process_form):
+            ordered = list(self.processor.process_many(self.sources(4), max_workers=4))
+            unordered = list(self.processor.process_many(self.sources(4), ordered=False, max_workers=4))
+        self.assertEqual([index for index, _ in ordered], [0, 1, 2, 3])
+        self.assertEqual(sorted(index for index, _ in unordered), [0, 1, 2, 3])
+        self.assertNotEqual([index for index, _ in unordered], [0, 1, 2, 3])
+        for index, results in ordered + unordered:
+            self.assertEqual(results['total_pages'], index + 1)
+
+    def test_bounded_pending_forms(self):
+        """Test no more than max_pending forms are opened ahead of the consumer"""
+        opened = []
+
+        def source(i):
+            def open_pages():
+                opened.append(i)
+                return [np.zeros((4, 4), dtype=np.uint8)]
+            return open_pages
+
+        with mock.patch.object(self.processor, 'process_form', self.fake_process_form):
+            forms = self.processor.process_many((source(i) for i in range(20)), max_workers=2)
+            next(forms)
+            self.assertLessEqual(len(opened), 4)
+            forms.close()
+        self.assertLessEqual(self.peak, 2)
+
+    def test_sources_opened_lazily_and_closed(self):
+        """Test callable sources are opened in turn and closed after processing"""
+        pages = ClosablePages([np.zeros((4, 4), dtype=np.uint8)])
+
+        def broken():
+            raise ValueError("not a PDF")
+
+        with mock.patch.object(self.processor, 'process_form', self.fake_process_form):
+            results = list(self.processor.process_many([lambda: pages, broken, []]))
+        self.assertTrue(pages.closed)
+        self.assertEqual(results[0][1]['status'], 'success')
+        self.assertEqual(results[1][1], {'status': 'error', 'message': 'not a PDF', 'total_pages': 0})
+        self.assertEqual(results[2][1]['status'], 'error')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from ..utils.results import ResultsWriter, flatten_result
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+RESULTS = {
+    'status': 'success',
+    'form_type': 'SIP Form',
+    'confidence': np.float32(0.93),
+    'total_pages': 2,
+    'sip_details_filled': True,
+    'otm_details_filled': False,
+    'sections': {
+        'sip_details': {'filled': True, 'details': {'amounts_found': np.int64(1)}},
+        'otm': {'filled': False, 'details': {}}
+    },
+    'timings': {'stages': {'detect': 0.25}, 'counters': {'ocr_calls': 3}, 'memory': {}}
+}
+
+CTF_RESULTS = {
+    'status': 'success',
+    'form_type': 'CTF Form',
+    'total_pages': 2,
+    'sections': {},
+    'transactions': ['Switch'],
+    'transactions_found': ['Switch'],
+    'has_switch': True,
+    'has_redemption': False,
+    'has_sip_form': True,
+    'details': {'Switch': {'is_checked': True, 'has_amount': True, 'amounts_found': ['rs 500']}},
+    'sip_form_details': {'sip_form_found': True, 'sip_form_page': 1}
+}
+
+MULTIPLE_SIP_RESULTS = {
+    'status': 'success',
+    'form_type': 'Multiple SIP Form',
+    'total_pages': 2,
+    'sip_details_filled': False,
+    'otm_details_filled': True,
+    'sections': {
+        'schemes': {'filled_schemes': 0, 'total_schemes': 2},
+        'bank_details': {'ifsc_found': True, 'account_numbers': ['123456789012']}
+    }
+}
+
+class TestResults(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_flatten_result(self):
+        """Test results flatten to plain, JSON-serializable columns"""
+        row = flatten_result(RESULTS, 'a.pdf', 'abc', 1.5)
+        self.assertEqual(row['form_type'], 'SIP Form')
+        self.assertIsInstance(row['confidence'], float)
+        self.assertEqual(row['sections'], {'sip_details': True, 'otm': False})
+        self.assertEqual(row['stages'], {'detect': 0.25})
+        self.assertEqual(row['counters'], {'ocr_calls': 3})
+        self.assertEqual(json.loads(row['section_details'])['sip_details'], {'amounts_found': 1})
+        # The full result is kept, without timings
+        details = json.loads(row['details'])
+        self.assertEqual(details['sections']['otm'], {'filled': False, 'details': {}})
+        self.assertNotIn('timings', details)
+        json.dumps(row)
+
+        error = flatten_result({'status': 'error', 'message': 'bad scan'}, 'b.pdf')
+        self.assertEqual((error['status'], error['message'], error['total_pages']), ('error', 'bad scan', 0))
+        self.assertIsNone(error['confidence'])
+
+    def test_flatten_ctf_and_multiple_sip(self):
+        """Test CTF transactions and Multiple SIP sections flatten like other sections"""
+        row = flatten_result(CTF_RESULTS, 'ctf.pdf')
+        self.assertEqual(row['sections'], {'Switch': True, 'sip_form': True})
+        self.assertEqual(json.loads(row['section_details'])['Switch']['amounts_found'], ['rs 500'])
+        details = json.loads(row['details'])
+        self.assertEqual(details['transactions_found'], ['Switch'])
+        self.assertEqual((details['has_switch'], details['has_redemption']), (True, False))
+        self.assertEqual(details['sip_form_details']['sip_form_page'], 1)
+
+        row = flatten_result(MULTIPLE_SIP_RESULTS, 'msip.pdf')
+        self.assertEqual(row['sections'], {'schemes': False, 'bank_details': True})
+        self.assertEqual(json.loads(row['section_details'])['bank_details']['account_numbers'],
+                         ['123456789012'])
+
+    def test_jsonl_rotation(self):
+        """Test parts hold at most rows_per_file rows and only complete parts are visible"""
+        writer = ResultsWriter(self.directory, rows_per_file=3, buffer_rows=2)
+        for i in range(8):
+            writer.write(flatten_result(RESULTS, f"form{i}.pdf"))
+
+        self.assertEqual(len(writer.files), 2)
+        self.assertEqual(sorted(self.directory.glob('*.jsonl')), writer.files)
+        # The third part is still being written
+        self.assertEqual(len(list(self.directory.glob('*.tmp'))), 1)
+
+        writer.close()
+        self.assertEqual(list(self.directory.glob('*.tmp')), [])
+        rows = [json.loads(line) for path in writer.files for line in path.read_text().splitlines()]
+        self.assertEqual([row['source'] for row in rows], [f"form{i}.pdf" for i in range(8)])
+        self.assertEqual([len(path.read_text().splitlines()) for path in writer.files], [3, 3, 2])
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected"""
+        with self.assertRaises(ValueError):
+            ResultsWriter(self.directory, formats=['csv'])
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_parquet_row_groups(self):
+        """Test Parquet parts get one row group per flush"""
+        import pyarrow.parquet as pq
+
+        with ResultsWriter(self.directory, formats=['jsonl', 'parquet'], buffer_rows=2) as writer:
+            for i in range(5):
+                writer.write(flatten_result(RESULTS, f"form{i}.pdf"))
+
+        parquet = [path for path in writer.files if path.suffix == '.parquet']
+        self.assertEqual(len(parquet), 1)
+        metadata = pq.ParquetFile(parquet[0]).metadata
+        self.assertEqual((metadata.num_rows, metadata.num_row_groups), (5, 3))
+        table = pq.read_table(parquet[0])
+        self.assertEqual(table.column('sections')[0].as_py(), [('sip_details', True), ('otm', False)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ...service import JobService
+from ..utils.jobstore import JobStore
+
+async def request(port, method, path, body=b'', headers=None):
+    """Minimal HTTP client returning (status, headers, json body)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = [f'{method} {path} HTTP/1.1', 'Host: localhost', f'Content-Length: {len(body)}']
+    head += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, payload = response.partition(b'\r\n\r\n')
+    lines = head.decode().split('\r\n')
+    response_headers = dict(line.split(': ', 1) for line in lines[1:])
+    return int(lines[0].split()[1]), response_headers, json.loads(payload)
+
+class TestJobService(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown(wait=True)
+
+    def fake_process(self, data, filename):
+        """Stand-in for batch.process_bytes; blocks until released"""
+        self.release.wait(5)
+        if data == b'bad':
+            raise ValueError('unreadable')
+        return {'status': 'success', 'filename': filename, 'size': len(data)}
+
+    def run_service(self, scenario, workers=1, queue_size=2, store=None, result_version='v1'):
+        async def main():
+            service = JobService(self.executor, workers, queue_size,
+                                 process=self.fake_process, max_body_bytes=1024, store=store,
+                                 result_version=result_version)
+            server = await service.start('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await scenario(service, port)
+            finally:
+                await service.close()
+        return asyncio.run(main())
+
+    async def wait_done(self, port, job_id):
+        for _ in range(200):
+            status, _, body = await request(port, 'GET', f'/jobs/{job_id}/result')
+            if status != 202:
+                return status, body
+            await asyncio.sleep(0.01)
+        self.fail('job did not finish')
+
+    def test_submit_and_fetch_result(self):
+        """Test a submitted form is processed and its result retrievable"""
+        async def scenario(service, port):
+            status, headers, body = await request(
+                port, 'POST', '/jobs?filename=form.pdf', b'%PDF-data'
+            )
+            self.assertEqual(status, 202)
+            self.assertEqual(headers['Location'], f"/jobs/{body['job_id']}")
+
+            status, result = await self.wait_done(port, body['job_id'])
+            self.assertEqual(status, 200)
+            self.assertEqual(result['status'], 'done')
+            self.assertEqual(result['results'], {'status': 'success', 'filename': 'form.pdf', 'size': 9})
+
+            status, _, job = await request(port, 'GET', f"/jobs/{body['job_id']}")
+            self.assertEqual(job['status'], 'done')
+            self.assertIn('seconds', job)
+
+        self.run_service(scenario)
+
+    def test_failed_job(self):
+        """Test processing errors mark the job failed instead of killing the worker"""
+        async def scenario(service, port):
+            _, _, body = await request(port, 'POST', '/jobs', b'bad', {'X-Filename': 'x.png'})
+            status, result = await self.wait_done(port, body['job_id'])
+            self.assertEqual(status, 200)
+            self.assertEqual(result['status'], 'failed')
+            self.assertEqual(result['results']['message'], 'unreadable')
+
+            # The worker keeps serving later jobs
+            _, _, body = await request(port, 'POST', '/jobs', b'good')
+            _, result = await self.wait_done(port, body['job_id'])
+            self.assertEqual(result['status'], 'done')
+
+        self.run_service(scenario)
+
+    def test_queue_full_returns_429(self):
+        """Test backpressure once the bounded queue is full"""
+        self.release.clear()
+
+        async def scenario(service, port):
+            accepted = []
+            for _ in range(3):
+                status, _, body = await request(port, 'POST', '/jobs', b'data')
+                self.assertEqual(status, 202)
+                accepted.append(body['job_id'])
+                # Let the worker pick up the first job before queueing more
+                await asyncio.sleep(0.05)
+
+            status, headers, _ = await request(port, 'POST', '/jobs', b'data')
+            self.assertEqual(status, 429)
+            self.assertEqual(headers['Retry-After'], '1')
+
+            status, _, health = await request(port, 'GET', '/health')
+            self.assertEqual(health['queue_size'], 2)
+            self.assertEqual(health['jobs'], {'running': 1, 'queued': 2})
+
+            self.release.set()
+            for job_id in accepted:
+                _, result = await self.wait_done(port, job_id)
+                self.assertEqual(result['status'], 'done')
+
+        self.run_service(scenario)
+
+    def test_queue_full_large_upload_returns_429(self):
+        """Test a multi-MB upload to a full queue gets the 429, not a connection reset"""
+        self.release.clear()
+
+        async def scenario(service, port):
+            for _ in range(3):
+                status, _, _ = await request(port, 'POST', '/jobs', b'data')
+                self.assertEqual(status, 202)
+                await asyncio.sleep(0.05)
+
+            status, headers, body = await request(port, 'POST', '/jobs', b'x' * (8 * 1024 * 1024))
+            self.assertEqual((status, body), (429, {'error': 'Queue full'}))
+            status, _, _ = await request(port, 'POST', '/jobs', b'x' * (4 * 1024 * 1024))
+            self.assertEqual(status, 429)
+            self.release.set()
+
+        self.run_service(scenario)
+
+    def test_request_errors(self):
+        """Test unknown jobs, oversized and empty uploads and bad methods"""
+        async def scenario(service, port):
+            status, _, _ = await request(port, 'GET', '/jobs/missing')
+            self.assertEqual(status, 404)
+            status, _, _ = await request(port, 'GET', '/jobs/missing/result')
+            self.assertEqual(status, 404)
+            status, _, _ = await request(port, 'POST', '/jobs', b'x' * 2048)
+            self.assertEqual(status, 413)
+            status, _, _ = await request(port, 'POST', '/jobs', b'x' * (4 * 1024 * 1024))
+            self.assertEqual(status, 413)
+            status, _, _ = await request(port, 'POST', '/jobs')
+            self.assertEqual(status, 400)
+            status, _, _ = await request(port, 'GET', '/jobs')
+            self.assertEqual(status, 405)
+
+        self.run_service(scenario)
+
+    def test_finished_jobs_evicted(self):
+        """Test only the newest finished jobs are retained"""
+        async def scenario(service, port):
+            service.keep_finished = 2
+            job_ids = []
+            for _ in range(4):
+                _, _, body = await request(port, 'POST', '/jobs', b'data')
+                job_ids.append(body['job_id'])
+                await self.wait_done(port, body['job_id'])
+
+            self.assertEqual(list(service.jobs), job_ids[2:])
+            status, _, _ = await request(port, 'GET', f'/jobs/{job_ids[0]}')
+            self.assertEqual(status, 404)
+
+        self.run_service(scenario)
+
+    def test_job_store(self):
+        """Test results outlive the service and identical uploads are not reprocessed
+
+        Only results of the same version (templates, processor, preprocessing)
+        are reused, and a restart leaves batch jobs in a shared store alone.
+        """
+        calls = []
+        process = self.fake_process
+
+        def counting_process(data, filename):
+            calls.append(filename)
+            return process(data, filename)
+        self.fake_process = counting_process
+
+        async def first_run(service, port):
+            _, _, body = await request(port, 'POST', '/jobs?filename=a.pdf', b'same')
+            await self.wait_done(port, body['job_id'])
+            return body['job_id']
+
+        async def second_run(service, port):
+            status, _, body = await request(port, 'GET', f'/jobs/{job_id}/result')
+            self.assertEqual(status, 200)
+            self.assertEqual(body['results']['filename'], 'a.pdf')
+
+            status, _, body = await request(port, 'POST', '/jobs?filename=b.pdf', b'same')
+            self.assertEqual(status, 202)
+            self.assertEqual(body['status'], 'done')
+
+        async def upgraded_run(service, port):
+            _, _, body = await request(port, 'POST', '/jobs?filename=c.pdf', b'same')
+            self.assertEqual(body['status'], 'queued')
+            await self.wait_done(port, body['job_id'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with JobStore(Path(tmp) / "jobs.db") as store:
+                store.add([('form.pdf', 'form.pdf', '1')], 'batch')
+                job_id = self.run_service(first_run, store=store)
+            with JobStore(Path(tmp) / "jobs.db") as store:
+                self.run_service(second_run, store=store)
+                self.run_service(upgraded_run, store=store, result_version='v2')
+                self.assertEqual(store.get('form.pdf').state, 'pending')
+
+        self.assertEqual(calls, ['a.pdf', 'c.pdf'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from ..core.detector import FormDetector
+from ..core.validators.base_validator import BaseSectionValidator
+from .benchmark import CHECKBOX_REGION, compare
+from .synthetic import FORM_TYPES, PAGE_HEIGHT, PAGE_WIDTH, generate_form, write_templates
+
+class TestSyntheticForms(unittest.TestCase):
+    def test_generation_is_deterministic(self):
+        """Test same form type and seed render identical pages"""
+        for form_type in FORM_TYPES:
+            first = generate_form(form_type, seed=7)
+            second = generate_form(form_type, seed=7)
+            self.assertEqual(len(first), len(second))
+            for a, b in zip(first, second):
+                self.assertEqual(a.shape, (PAGE_HEIGHT, PAGE_WIDTH, 3))
+                self.assertTrue(np.array_equal(a, b))
+
+    def test_filled_and_blank_checkbox(self):
+        """Test ticked and empty checkboxes are told apart"""
+        validator = BaseSectionValidator()
+        x1, y1, x2, y2 = CHECKBOX_REGION
+        filled = generate_form("SIP Form", filled=True)[0][y1:y2, x1:x2]
+        blank = generate_form("SIP Form", filled=False)[0][y1:y2, x1:x2]
+        self.assertTrue(validator.detect_checkbox_state(filled))
+        self.assertFalse(validator.detect_checkbox_state(blank))
+
+    def test_templates_load(self):
+        """Test synthetic templates load into the detector"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            detector = FormDetector(Path(template_dir))
+        form_types = {template['form_type'] for template in detector.templates.values()}
+        self.assertEqual(form_types, set(FORM_TYPES))
+
+    def test_compare_flags_regressions(self):
+        """Test benchmark comparison reports slowed-down medians only"""
+        baseline = {'results': [
+            {'name': 'extract_text', 'form_type': '', 'median': 0.1},
+            {'name': 'process_form', 'form_type': 'SIP Form', 'median': 1.0},
+        ]}
+        report = {'results': [
+            {'name': 'extract_text', 'form_type': '', 'median': 0.2},
+            {'name': 'process_form', 'form_type': 'SIP Form', 'median': 1.1},
+            {'name': 'process_form', 'form_type': 'CTF Form', 'median': 5.0},
+        ]}
+        regressions = compare(report, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('extract_text'))
+
+if __name__ == '__main__':
+    unittest.main()
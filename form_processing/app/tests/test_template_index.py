@@ -0,0 +1,128 @@
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+from ..core.detector import FormDetector, TemplateSet
+from ..core.template_index import TemplateIndex, section_rect
+
+TEMPLATES = {
+    'first': {
+        'name': 'First', 'form_type': 'SIP Form',
+        'sections': [
+            {'name': 'a', 'type': 'Other', 'page': 1, 'coordinates': {'x': 0.1, 'y': 0.2, 'width': 0.5, 'height': 0.3}},
+            {'name': 'b', 'type': 'Other', 'page': 0, 'coordinates': {'x': -0.1, 'y': 0.9, 'width': 0.4, 'height': 0.4}},
+            {'name': 'c', 'type': 'Other', 'page': 1, 'coordinates': {'x': 0.33, 'y': 0.07, 'width': 0.29, 'height': 0.11}},
+        ]
+    },
+    'broken': {'name': 'Broken', 'sections': []},
+}
+
+def dict_rect(coords, height, width):
+    x1 = int(coords['x'] * width)
+    y1 = int(coords['y'] * height)
+    x2 = int((coords['x'] + coords['width']) * width)
+    y2 = int((coords['y'] + coords['height']) * height)
+    return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+class TestTemplateIndex(unittest.TestCase):
+    def test_rects_match_coordinate_math(self):
+        """Test compiled rects equal the per-section coordinate arithmetic"""
+        index = TemplateIndex(TEMPLATES)
+        self.assertEqual(len(index), 1)
+        template = index.templates[0]
+        self.assertEqual([table.page for table in template.pages], [1, 0])
+        self.assertEqual(template.section_count, 3)
+
+        sections = TEMPLATES['first']['sections']
+        for height, width in [(1684, 1190), (3508, 2480), (97, 61)]:
+            for table in template.pages:
+                expected = [dict_rect(s['coordinates'], height, width)
+                            for s in sections if s['page'] == table.page]
+                rects = index.rects(table, height, width)
+                self.assertEqual([tuple(r) for r in rects.tolist()], expected)
+                self.assertFalse(rects.flags.writeable)
+
+    def test_resolved_sizes_are_cached(self):
+        """Test rects for a page size are resolved once and evicted beyond the cap"""
+        index = TemplateIndex(TEMPLATES, cache_size=2)
+        table = index.templates[0].pages[0]
+        first = index.rects(table, 100, 100)
+        self.assertTrue(np.shares_memory(first, index.rects(table, 100, 100)))
+        index.rects(table, 200, 200)
+        index.rects(table, 300, 300)
+        self.assertFalse(np.shares_memory(first, index.rects(table, 100, 100)))
+
+    def test_section_rect(self):
+        """Test single-section rects and empty sections"""
+        coords = {'x': 0, 'y': 0.5, 'width': 1.0, 'height': 0.5}
+        self.assertEqual(section_rect(coords, 1684, 1190), (0, 842, 1190, 1684))
+        self.assertIsNone(section_rect({'x': 1.0, 'y': 0, 'width': 0.2, 'height': 1}, 100, 100))
+
+class TestSectionScores(unittest.TestCase):
+    def test_shared_sections_scored_once(self):
+        """Test templates sharing section rects reuse feature scores"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            detector = FormDetector(Path(template_dir))
+        templates = {f'variant{i}': copy.deepcopy(TEMPLATES['first']) for i in range(5)}
+        detector.template_set = TemplateSet.build(templates)
+
+        rng = np.random.default_rng(0)
+        pages = [rng.integers(0, 255, (400, 300, 3), dtype=np.uint8) for _ in range(2)]
+        expected = detector.match_template(pages, TEMPLATES['first'])
+
+        with mock.patch.object(detector, '_match_features', wraps=detector._match_features) as features:
+            form_type, confidence = detector.detect_form_type(pages)
+        self.assertEqual(features.call_count, 3)
+        self.assertEqual(confidence, expected)
+
+class TestTemplateReload(unittest.TestCase):
+    def test_detection_uses_one_snapshot(self):
+        """Test templates reloaded during a detection do not change the set it scores"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            detector = FormDetector(Path(template_dir))
+        detector.template_set = TemplateSet.build(
+            {f'variant{i}': copy.deepcopy(TEMPLATES['first']) for i in range(3)})
+        pages = [np.full((400, 300, 3), 255, dtype=np.uint8) for _ in range(2)]
+        score = detector._score_template
+        indexes = []
+
+        def reloading_score(images, template, index, scores):
+            indexes.append(index)
+            detector.template_set = TemplateSet.build({})
+            return score(images, template, index, scores)
+
+        with mock.patch.object(detector, '_score_template', side_effect=reloading_score):
+            detector.detect_form_type(pages)
+        self.assertEqual(len(indexes), 3)
+        self.assertTrue(all(index is indexes[0] for index in indexes))
+
+
+    def test_reload_only_when_templates_change(self):
+        """Test a long-lived detector reloads templates only after files change"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            template_dir = Path(template_dir)
+            (template_dir / "first.json").write_text(json.dumps(TEMPLATES['first']))
+            detector = FormDetector(template_dir)
+            version = detector.template_version
+
+            with mock.patch.object(detector, '_load_templates', wraps=detector._load_templates) as load:
+                self.assertFalse(detector.refresh_templates())
+                load.assert_not_called()
+
+                second = dict(TEMPLATES['first'], name='Second', form_type='CA Form')
+                (template_dir / "second.json").write_text(json.dumps(second))
+                (template_dir / "broken.json").write_text("{")
+                self.assertTrue(detector.refresh_templates())
+                self.assertFalse(detector.refresh_templates())
+                self.assertEqual(load.call_count, 1)
+
+            self.assertEqual(sorted(detector.templates), ['first', 'second'])
+            self.assertEqual(len(detector.template_index), 2)
+            self.assertEqual(list(detector.template_errors), ['broken.json'])
+            self.assertNotEqual(detector.template_version, version)
+
+if __name__ == '__main__':
+    unittest.main()
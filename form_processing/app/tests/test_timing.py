@@ -0,0 +1,41 @@
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from ..core.processor import FormProcessor
+from ..core.timing import StageTimer, use_timer
+from .synthetic import generate_form, write_templates
+from .test_data import FakeOCREngine
+
+class TestTiming(unittest.TestCase):
+    def test_process_form_timings(self):
+        """Test collect_timings adds stage, counter and memory figures to results"""
+        with tempfile.TemporaryDirectory() as template_dir:
+            write_templates(Path(template_dir))
+            processor = FormProcessor(Path(template_dir), ocr_engine='pytesseract',
+                                      collect_timings=True, trace_memory=True)
+        processor.sip_validator.ocr_engine = FakeOCREngine()
+
+        timings = processor.process_form(generate_form("SIP Form", filled=True))['timings']
+
+        self.assertIn('process_form', timings['stages'])
+        self.assertGreater(timings['memory']['page_array_bytes'], 0)
+        self.assertGreater(timings['memory']['peak_traced_bytes'], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_overlapping_traces_report_no_peak(self):
+        """Test forms traced at the same time leave out the shared process-wide peak"""
+        first, second, alone = (StageTimer(trace_memory=True) for _ in range(3))
+        with use_timer(first):
+            with use_timer(second):
+                pass
+        with use_timer(alone):
+            pass
+
+        self.assertNotIn('peak_traced_bytes', first.as_dict()['memory'])
+        self.assertNotIn('peak_traced_bytes', second.as_dict()['memory'])
+        self.assertIn('peak_traced_bytes', alone.as_dict()['memory'])
+        self.assertFalse(tracemalloc.is_tracing())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -78,7 +78,8 @@ class TestValidators(unittest.TestCase):
             'bank_account': '123456789012',
             'ifsc': 'HDFC0123456',
             'pan': 'ABCDE1234F',
-            'amount': 'Rs. 1,234.56'
+            'amount': 'Rs. 1,234.56',
+            'date': '15/04/2024'
         }
         
         for field, pattern in VALIDATION_PATTERNS.items():
@@ -2,7 +2,7 @@
 import cv2
 import numpy as np
 from PIL import Image
-from typing import List, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 import pdf2image
 from ..models.template import BoundingBox
 
@@ -11,11 +11,64 @@ def convert_pdf_to_images(pdf_bytes: bytes) -> List[np.ndarray]:
     images = pdf2image.convert_from_bytes(pdf_bytes)
     return [np.array(img) for img in images]
 
+def to_gray(image: np.ndarray) -> np.ndarray:
+    """Single-channel uint8 version of an RGB/RGBA page (PyMuPDF and PIL produce RGB)"""
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 1:
+        return image[:, :, 0]
+    code = cv2.COLOR_RGBA2GRAY if image.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+    return cv2.cvtColor(image, code)
+
+class BilevelPage(NamedTuple):
+    """Bilevel page packed 8 pixels per byte; set pixels unpack to 255"""
+    bits: np.ndarray  # (height, ceil(width / 8)) uint8
+    width: int
+
+    @classmethod
+    def blank(cls, height: int, width: int) -> 'BilevelPage':
+        """Page with no pixel set, to be filled with set_rows"""
+        return cls(np.zeros((height, -(-width // 8)), dtype=np.uint8), width)
+
+    @classmethod
+    def pack(cls, image: np.ndarray) -> 'BilevelPage':
+        """Pack a bilevel image, nonzero pixels set"""
+        return cls(np.packbits(image > 0, axis=1), image.shape[1])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.bits.shape[0], self.width
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def set_rows(self, top: int, image: np.ndarray):
+        """Overwrite the rows starting at top with a bilevel image of the page's width"""
+        self.bits[top:top + image.shape[0]] = np.packbits(image > 0, axis=1)
+
+    def unpack(self, y1: int = 0, y2: Optional[int] = None,
+               x1: int = 0, x2: Optional[int] = None) -> np.ndarray:
+        """Pixels (0/255) of rows y1:y2 and columns x1:x2, unpacking only the bytes they cover"""
+        x2 = self.width if x2 is None else min(x2, self.width)
+        first = x1 // 8
+        rows = self.bits[y1:y2, first:-(-x2 // 8)]
+        pixels = np.unpackbits(rows, axis=1, count=x2 - first * 8)
+        return pixels[:, x1 - first * 8:] * np.uint8(255)
+
+def binarize(gray: np.ndarray, threshold: Optional[int] = None) -> BilevelPage:
+    """Pack the ink of a grayscale page, using Otsu's threshold unless one is given"""
+    if threshold is None:
+        _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    else:
+        ink = gray <= threshold
+    return BilevelPage.pack(ink)
+
 def preprocess_image(image: np.ndarray) -> np.ndarray:
     """Preprocess image for better text detection"""
     # Convert to grayscale
     if len(image.shape) == 3:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = to_gray(image)
     else:
         gray = image
 
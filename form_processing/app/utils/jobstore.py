@@ -0,0 +1,347 @@
+# app/utils/jobstore.py
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    stamp TEXT NOT NULL DEFAULT '',
+    hash TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    seconds REAL,
+    pages INTEGER,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    queue TEXT NOT NULL DEFAULT '',
+    version TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+CREATE INDEX IF NOT EXISTS jobs_hash ON jobs (hash) WHERE state = 'done';
+"""
+
+# Columns added after the first release, with their definitions
+MIGRATIONS = {
+    'owner': 'TEXT',
+    'queue': "TEXT NOT NULL DEFAULT ''",
+    'version': 'TEXT',
+}
+
+RECORD_COLUMNS = ('key, source, state, attempts, hash, submitted_at, started_at, finished_at, '
+                  'seconds, pages, error, queue')
+
+
+# Owners of the job stores open in this process
+_open_owners = set()
+
+
+def _owner_alive(owner: str) -> bool:
+    """Whether the job store that claimed a job may still be running it
+
+    Owners are host:pid:token. Stores of this process are alive while
+    open, other processes on this host while their pid exists; owners on
+    other hosts cannot be checked and are assumed alive.
+    """
+    try:
+        host, pid, _ = owner.rsplit(':', 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    if host != socket.gethostname():
+        return True
+    if pid == os.getpid():
+        return owner in _open_owners
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRecord(NamedTuple):
+    key: str
+    source: str
+    state: str
+    attempts: int
+    hash: Optional[str]
+    submitted_at: Optional[float]
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    seconds: Optional[float]
+    pages: Optional[int]
+    error: Optional[str]
+    queue: str
+
+
+class Completion(NamedTuple):
+    """Outcome of one job, written back with JobStore.complete"""
+    key: str
+    result: Dict
+    hash: Optional[str] = None
+    seconds: Optional[float] = None
+    pages: Optional[int] = None
+    # What the result depends on besides the input (templates, code, options)
+    version: Optional[str] = None
+
+
+class JobStore:
+    """Durable SQLite job table for resumable processing
+
+    Each job is keyed by the caller (a file path, a service job id) and
+    records the queue it belongs to (e.g. 'batch', 'service'), the input's
+    stamp (e.g. size and mtime) and content hash, its state (pending ->
+    running -> done | failed), attempts, timings, and the result JSON with
+    the version of everything else it depends on. The database runs in WAL mode so readers never block the
+    writer; claims and completions are batched into single transactions.
+    Claimed jobs record the claiming process, so a runner only takes back
+    jobs whose claimant has died.
+    """
+
+    def __init__(self, path: Union[str, Path], max_attempts: int = 3,
+                 json_default: Optional[Callable[[Any], Any]] = None):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self.json_default = json_default
+        self._lock = threading.Lock()
+        # Transactions are explicit (BEGIN IMMEDIATE) so claims are atomic
+        # across processes sharing the database
+        self._conn = sqlite3.connect(self.path, isolation_level=None,
+                                     check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        for column, definition in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        if 'queue' not in columns:
+            # Earlier service jobs were added without a stamp, batch jobs with one
+            self._conn.execute(
+                "UPDATE jobs SET queue = CASE WHEN stamp = '' THEN 'service' ELSE 'batch' END"
+            )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        _open_owners.add(self.owner)
+
+    def _transaction(self, statements: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = statements(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return value
+
+    def add(self, jobs: Iterable[Tuple[str, str, str]], queue: str = '') -> int:
+        """Register (key, source, stamp) jobs in a queue; returns how many of them now need processing
+
+        Unknown keys are added as pending. A known key whose stamp changed
+        (the input was modified) is reset to pending; otherwise it keeps
+        its state, so completed work is not repeated.
+        """
+        now = time.time()
+        jobs = list(jobs)
+
+        def statements(conn):
+            conn.executemany(
+                """
+                INSERT INTO jobs (key, source, stamp, queue, submitted_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    source = excluded.source, stamp = excluded.stamp, queue = excluded.queue,
+                    hash = NULL, version = NULL,
+                    state = 'pending', attempts = 0, submitted_at = excluded.submitted_at,
+                    started_at = NULL, finished_at = NULL, seconds = NULL, pages = NULL,
+                    result = NULL, error = NULL
+                WHERE jobs.stamp != excluded.stamp
+                """,
+                ((key, source, stamp, queue, now) for key, source, stamp in jobs)
+            )
+            pending = 0
+            keys = [key for key, _, _ in jobs]
+            # Bounded by SQLite's limit on variables per statement
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                pending += conn.execute(
+                    f"SELECT COUNT(*) FROM jobs WHERE state = 'pending' "
+                    f"AND key IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchone()[0]
+            return pending
+
+        return self._transaction(statements)
+
+    def claim(self, limit: int, keys: Optional[Sequence[str]] = None) -> List[JobRecord]:
+        """Atomically move up to `limit` pending jobs to running, owned by this process
+
+        With keys, only pending jobs among them are claimed, so a run never
+        takes jobs it did not add. Claiming does not count an attempt; call
+        start() as jobs are handed to a worker.
+        """
+        def statements(conn):
+            if keys is None:
+                chunks = [None]
+            else:
+                # Bounded by SQLite's limit on variables per statement
+                chunks = [list(keys[i:i + 500]) for i in range(0, len(keys), 500)]
+            jobs = []
+            for chunk in chunks:
+                if len(jobs) >= limit:
+                    break
+                among = '' if chunk is None else f"AND key IN ({', '.join('?' * len(chunk))})"
+                rows = conn.execute(
+                    f"""
+                    UPDATE jobs SET state = 'running', owner = ?
+                    WHERE key IN (
+                        SELECT key FROM jobs WHERE state = 'pending' {among}
+                        ORDER BY rowid LIMIT ?
+                    )
+                    RETURNING {RECORD_COLUMNS}
+                    """,
+                    (self.owner, *(chunk or ()), limit - len(jobs))
+                ).fetchall()
+                jobs.extend(JobRecord(*row) for row in rows)
+            return jobs
+
+        return self._transaction(statements)
+
+    def start(self, keys: Iterable[str]) -> int:
+        """Count an attempt for claimed jobs about to be processed"""
+        now = time.time()
+        rows = [(now, key) for key in keys]
+        if not rows:
+            return 0
+
+        def statements(conn):
+            conn.executemany(
+                "UPDATE jobs SET attempts = attempts + 1, started_at = ? WHERE key = ?", rows
+            )
+            return len(rows)
+
+        return self._transaction(statements)
+
+    def complete(self, completions: Iterable[Completion]) -> int:
+        """Record finished jobs; results with a non-success status are failures"""
+        now = time.time()
+        rows = [
+            (
+                DONE if c.result.get('status') == 'success' else FAILED,
+                c.hash, c.version, now, c.seconds, c.pages,
+                json.dumps(c.result, default=self.json_default),
+                None if c.result.get('status') == 'success' else c.result.get('message'),
+                c.key
+            )
+            for c in completions
+        ]
+        if not rows:
+            return 0
+
+        def statements(conn):
+            conn.executemany(
+                """
+                UPDATE jobs SET state = ?, hash = ?, version = ?, finished_at = ?, seconds = ?,
+                    pages = ?, result = ?, error = ?
+                WHERE key = ?
+                """,
+                rows
+            )
+            return len(rows)
+
+        return self._transaction(statements)
+
+    def requeue_running(self, queue: Optional[str] = None) -> int:
+        """Return jobs left running by a dead run to pending
+
+        Only jobs whose claiming process is gone are taken back; jobs held
+        by a live runner (or one on another host) are left to it. Jobs that
+        already used max_attempts (e.g. forms that crash their worker every
+        time) are marked failed instead of retried forever. With a queue,
+        only that queue's jobs are considered.
+        """
+        def statements(conn):
+            in_queue, queue_args = ("", ()) if queue is None else (" AND queue = ?", (queue,))
+            owners = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT owner FROM jobs WHERE state = 'running'{in_queue}", queue_args
+            )]
+            dead = [owner for owner in owners if owner is not None and not _owner_alive(owner)]
+            stale = (f"state = 'running'{in_queue} "
+                     f"AND (owner IS NULL OR owner IN ({', '.join('?' * len(dead))}))")
+            conn.execute(
+                f"UPDATE jobs SET state = 'failed', error = 'Exceeded maximum attempts' "
+                f"WHERE {stale} AND attempts >= ?",
+                (*queue_args, *dead, self.max_attempts)
+            )
+            return conn.execute(
+                f"UPDATE jobs SET state = 'pending', owner = NULL WHERE {stale}", (*queue_args, *dead)
+            ).rowcount
+
+        return self._transaction(statements)
+
+    def fail_unfinished(self, error: str, queue: str) -> int:
+        """Mark a queue's unfinished jobs failed (for inputs that cannot be re-submitted)"""
+        def statements(conn):
+            return conn.execute(
+                "UPDATE jobs SET state = 'failed', error = ?, finished_at = ? "
+                "WHERE queue = ? AND state IN ('pending', 'running')",
+                (error, time.time(), queue)
+            ).rowcount
+
+        return self._transaction(statements)
+
+    def get(self, key: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {RECORD_COLUMNS} FROM jobs WHERE key = ?", (key,)
+            ).fetchone()
+        return JobRecord(*row) if row else None
+
+    def result(self, key: str) -> Optional[Dict]:
+        """Stored result of a finished job"""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM jobs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def result_for_hash(self, content_hash: str, version: str) -> Optional[Dict]:
+        """Result of any completed job with the same input content and version"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE hash = ? AND version = ? AND state = 'done' LIMIT 1",
+                (content_hash, version)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
+
+    def close(self):
+        _open_owners.discard(self.owner)
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
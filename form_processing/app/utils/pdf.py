@@ -4,43 +4,76 @@ import fitz  # PyMuPDF
 import numpy as np
 from PIL import Image
 import io
-from typing import List, Optional
+import threading
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Union
 import logging
 
+from ..core.template_index import section_rect
+from .cache import LRUCache
+from ..core.timing import timed
+
 logger = logging.getLogger(__name__)
 
-def pdf_to_images(pdf_bytes: bytes, scale: float = 2.0) -> List[np.ndarray]:
+# Resolution of the coarse pass used for form-type detection (0.5 = 36 dpi)
+DETECTION_SCALE = 0.5
+
+class PixmapArray(np.ndarray):
+    """
+    NumPy array viewing a PyMuPDF pixmap's sample buffer without a copy
+    Ownership: the pixmap owns the memory and the root array keeps a
+    reference to it (`pixmap`). Every view derived from the root (page
+    crops, np.asarray, ...) references the root through its base chain,
+    so the samples stay valid as long as any view is alive. Writing to the
+    array writes into the pixmap. Arrays computed from it (cvtColor,
+    arithmetic) are ordinary independent arrays.
+    """
+
+    pixmap = None
+
+def pixmap_to_array(pix) -> np.ndarray:
+    """
+    Wrap a pixmap as a (height, width, n) uint8 array, or (height, width) for
+    grayscale, sharing the pixmap's memory (see PixmapArray)
+    """
+    if pix.n == 1:
+        shape, strides = (pix.height, pix.width), (pix.stride, 1)
+    else:
+        shape, strides = (pix.height, pix.width, pix.n), (pix.stride, pix.n, 1)
+    array = PixmapArray(shape, np.uint8, buffer=pix.samples_mv, strides=strides)
+    array.pixmap = pix
+    return array
+
+def render_page(page, scale: float = 2.0, gray: bool = False,
+                clip: Optional[fitz.Rect] = None) -> np.ndarray:
+    """
+    Render a PDF page (or a clip of it) straight into a numpy array
+    Args:
+        page: PyMuPDF page
+        scale: Scale factor for resolution
+        gray: Render in the grayscale colorspace (one channel, a third of the memory)
+        clip: Page area to render, in page coordinates
+    """
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(scale, scale), clip=clip, alpha=False,
+        colorspace=fitz.csGRAY if gray else fitz.csRGB
+    )
+    return pixmap_to_array(pix)
+
+def pdf_to_images(pdf_bytes: bytes, scale: float = 2.0, gray: bool = False) -> List[np.ndarray]:
     """
     Convert PDF to list of images using PyMuPDF
     Args:
         pdf_bytes: PDF file content in bytes
         scale: Scale factor for resolution (higher = better quality but larger images)
+        gray: Render pages in grayscale
     Returns:
-        List of images as numpy arrays
+        List of images as numpy arrays (zero-copy views of the rendered pixmaps)
     """
     try:
         # Open PDF from bytes
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        images = []
-        
-        # Process each page
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            
-            # Get the matrix for scaling
-            zoom_matrix = fitz.Matrix(scale, scale)
-            
-            # Get page as pixel map
-            pix = page.get_pixmap(matrix=zoom_matrix, alpha=False)
-            
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            
-            # Convert to numpy array
-            img_array = np.array(img)
-            
-            images.append(img_array)
-            
+        images = [render_page(page, scale, gray) for page in doc]
         doc.close()
         return images
 
@@ -48,6 +81,167 @@ def pdf_to_images(pdf_bytes: bytes, scale: float = 2.0) -> List[np.ndarray]:
         logger.error(f"Error in PDF conversion: {str(e)}")
         raise RuntimeError(f"Failed to convert PDF: {str(e)}")
 
+class PDFPageSource(Sequence):
+    """
+    Lazy page sequence over an open PDF, rendered on demand at two resolutions
+    Usable wherever a list of page images is: indexing returns a full page
+    at `scale` (the OCR resolution), rendered on first access and kept in a
+    small LRU of decoded pages; slices are lazy views and iteration renders
+    one page at a time. `detection_images` renders pages at
+    `detection_scale` for form-type detection, each on first access, and `render_region` renders
+    only a section rectangle at OCR resolution (PyMuPDF clip rendering), so
+    pages that are only inspected in parts are never rasterized whole.
+    The source owns the open document; call close() (or use it as a context
+    manager) when done. It is safe to share between page worker threads.
+    """
+
+    def __init__(self, pdf_bytes: bytes, scale: float = 2.0,
+                 detection_scale: float = DETECTION_SCALE, max_cached_pages: int = 4,
+                 gray: bool = False):
+        self.scale = scale
+        self.detection_scale = detection_scale
+        self.gray = gray
+        self._doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        # Budget counts pages, not bytes
+        self._pages = LRUCache(max_cached_pages, sizeof=lambda page: 1)
+        self._detection_images: Dict[int, np.ndarray] = {}
+        # PyMuPDF documents must not be used from several threads at once
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._doc.page_count
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return PageSlice(self, range(len(self))[index])
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"page index {index} out of range")
+
+        with self._lock:
+            page = self._pages.get(index)
+            if page is None:
+                with timed('render.page'):
+                    page = self._render(index, self.scale)
+                self._pages.put(index, page)
+            return page
+
+    def cached_pages(self) -> List[int]:
+        """Indexes of pages currently held decoded, least recently used first"""
+        with self._lock:
+            return self._pages.keys()
+
+    def _render(self, page_num: int, scale: float, clip: Optional[fitz.Rect] = None) -> np.ndarray:
+        return render_page(self._doc[page_num], scale, self.gray, clip)
+
+    def detection_images(self) -> 'DetectionPages':
+        """Pages at detection resolution, rendered as they are accessed
+
+        Detection only reads the leading pages (for the fingerprint), so
+        the rest of a long document is never rendered at this scale.
+        """
+        return DetectionPages(self)
+
+    def detection_page(self, page_num: int) -> np.ndarray:
+        """A page rendered at detection resolution, kept for the source's lifetime"""
+        with self._lock:
+            page = self._detection_images.get(page_num)
+            if page is None:
+                with timed('render.detection'):
+                    page = self._render(page_num, self.detection_scale)
+                self._detection_images[page_num] = page
+            return page
+
+    def detection_pages(self) -> List[int]:
+        """Indexes of pages rendered at detection resolution so far"""
+        with self._lock:
+            return sorted(self._detection_images)
+
+    def render_region(self, page_num: int, coords: Dict) -> np.ndarray:
+        """Render a section given in normalized page coordinates at OCR resolution"""
+        with self._lock:
+            page = self._pages.get(page_num)
+            if page is not None:
+                # Page already rasterized: crop instead of rendering again
+                rect = section_rect(coords, *page.shape[:2])
+                if rect is None:
+                    return np.array([])
+                x1, y1, x2, y2 = rect
+                return page[y1:y2, x1:x2]
+
+            rect = self._doc[page_num].rect
+            clip = fitz.Rect(
+                rect.x0 + coords['x'] * rect.width,
+                rect.y0 + coords['y'] * rect.height,
+                rect.x0 + (coords['x'] + coords['width']) * rect.width,
+                rect.y0 + (coords['y'] + coords['height']) * rect.height
+            ) & rect
+            with timed('render.region'):
+                return self._render(page_num, self.scale, clip)
+
+    def close(self):
+        with self._lock:
+            self._pages.clear()
+            self._detection_images.clear()
+            self._doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class PageSlice(Sequence):
+    """Lazy view of a range of a PDFPageSource's pages"""
+
+    def __init__(self, source: PDFPageSource, indices: range):
+        self._source = source
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return PageSlice(self._source, self._indices[index])
+        return self._source[self._indices[index]]
+
+class DetectionPages(Sequence):
+    """Lazy sequence of a PDFPageSource's pages at detection resolution"""
+
+    def __init__(self, source: PDFPageSource):
+        self._source = source
+
+    def __len__(self) -> int:
+        return len(self._source)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"page index {index} out of range")
+        return self._source.detection_page(index)
+
+def open_document(data: bytes, filename: str = "", scale: float = 2.0,
+                  gray: bool = True) -> Union[PDFPageSource, List[np.ndarray]]:
+    """
+    Open an uploaded/stored form for processing
+    PDFs are returned as a PDFPageSource that renders pages on demand;
+    images are decoded into a single-page list. Pages are grayscale by
+    default, the representation the processing pipeline works on.
+    """
+    if filename.lower().endswith(".pdf") or data[:5] == b"%PDF-":
+        return PDFPageSource(data, scale, gray=gray)
+
+    image = Image.open(io.BytesIO(data))
+    if gray:
+        return [np.array(image.convert("L"))]
+    return [np.array(image)]
+
 def is_valid_pdf(pdf_bytes: bytes) -> bool:
     """
     Check if the PDF is valid and can be processed
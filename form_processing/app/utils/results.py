@@ -0,0 +1,234 @@
+# app/utils/results.py
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FORMATS = ('jsonl', 'parquet')
+
+
+def to_jsonable(value):
+    """json.dumps default for NumPy values found in results"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Sections stored as bare validator results, and the form-level flag
+# that records whether each is filled
+SECTION_FLAGS = {
+    'schemes': 'sip_details_filled',
+    'bank_details': 'otm_details_filled',
+}
+
+
+def result_sections(results: Dict) -> Dict[str, Tuple[bool, Dict]]:
+    """(filled, details) of every section of a result, whatever its form type
+
+    Most forms store sections as {'filled': ..., 'details': ...}. Multiple
+    SIP sections hold the validator result itself, and CTF forms report
+    their transactions and attached SIP form outside 'sections'.
+    """
+    sections = {}
+    for name, section in (results.get('sections') or {}).items():
+        if not isinstance(section, dict):
+            continue
+        if 'filled' in section:
+            sections[name] = (bool(section['filled']), section.get('details') or {})
+        elif name in SECTION_FLAGS:
+            sections[name] = (bool(results.get(SECTION_FLAGS[name], False)), section)
+        else:
+            sections[name] = (bool(section.get('details_filled', False)), section)
+
+    for name, details in (results.get('details') or {}).items():
+        if isinstance(details, dict) and name not in sections:
+            sections[name] = (bool(details.get('is_checked', False)), details)
+    if 'sip_form_details' in results and 'sip_form' not in sections:
+        sections['sip_form'] = (bool(results.get('has_sip_form', False)),
+                                results['sip_form_details'] or {})
+    return sections
+
+
+def flatten_result(results: Dict, source: str = '', sha256: Optional[str] = None,
+                   seconds: Optional[float] = None) -> Dict:
+    """One row per form with a fixed set of columns
+
+    Per-section filled flags, stage timings and counters are maps keyed by
+    name, since they vary between form types; section details and the
+    full result (everything but timings) are kept as JSON strings so the
+    row stays flat enough for columnar storage.
+    """
+    sections = result_sections(results)
+    timings = results.get('timings') or {}
+    confidence = results.get('confidence')
+    return {
+        'source': str(source),
+        'sha256': sha256,
+        'status': results.get('status'),
+        'message': results.get('message'),
+        'form_type': results.get('form_type'),
+        'confidence': None if confidence is None else float(confidence),
+        'total_pages': int(results.get('total_pages', 0)),
+        'preprocessing': results.get('preprocessing'),
+        'sip_details_filled': bool(results.get('sip_details_filled', False)),
+        'otm_details_filled': bool(results.get('otm_details_filled', False)),
+        'seconds': seconds,
+        'sections': {name: filled for name, (filled, _) in sections.items()},
+        'stages': {name: float(value) for name, value in timings.get('stages', {}).items()},
+        'counters': {name: int(value) for name, value in timings.get('counters', {}).items()},
+        'section_details': json.dumps(
+            {name: details for name, (_, details) in sections.items()},
+            default=to_jsonable, separators=(',', ':')
+        ),
+        'details': json.dumps(
+            {key: value for key, value in results.items() if key != 'timings'},
+            default=to_jsonable, separators=(',', ':')
+        ),
+    }
+
+
+def jsonl_line(row: Dict) -> str:
+    """Compact single-line JSON for a row"""
+    return json.dumps(row, default=to_jsonable, separators=(',', ':')) + '\n'
+
+
+def _parquet_schema(pa):
+    return pa.schema([
+        ('source', pa.string()),
+        ('sha256', pa.string()),
+        ('status', pa.string()),
+        ('message', pa.string()),
+        ('form_type', pa.string()),
+        ('confidence', pa.float64()),
+        ('total_pages', pa.int64()),
+        ('preprocessing', pa.string()),
+        ('sip_details_filled', pa.bool_()),
+        ('otm_details_filled', pa.bool_()),
+        ('seconds', pa.float64()),
+        ('sections', pa.map_(pa.string(), pa.bool_())),
+        ('stages', pa.map_(pa.string(), pa.float64())),
+        ('counters', pa.map_(pa.string(), pa.int64())),
+        ('section_details', pa.string()),
+        ('details', pa.string()),
+    ])
+
+
+class ResultsWriter:
+    """Append-only sink writing flattened results as JSONL and/or Parquet
+
+    Rows are buffered and written every `buffer_rows` rows (one Parquet row
+    group per flush). Output is split into numbered part files of at most
+    `rows_per_file` rows; a part is written under a .tmp name and renamed
+    when complete, so readers only ever see whole files. Parquet output
+    needs pyarrow, which is optional.
+    """
+
+    def __init__(self, directory: Path, formats: Sequence[str] = ('jsonl',),
+                 prefix: str = 'results', rows_per_file: int = 100_000,
+                 buffer_rows: int = 1000):
+        unknown = set(formats) - set(FORMATS)
+        if unknown or not formats:
+            raise ValueError(f"Unsupported results formats: {sorted(unknown) or 'none'}")
+
+        self.directory = Path(directory)
+        self.formats = tuple(formats)
+        self.rows_per_file = rows_per_file
+        self.buffer_rows = max(1, min(buffer_rows, rows_per_file))
+        # Parts of different runs never collide
+        self.prefix = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._pa = self._pq = None
+        if 'parquet' in self.formats:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("Parquet results require pyarrow (pip install pyarrow)")
+            self._pa, self._pq = pyarrow, pyarrow.parquet
+            self._schema = _parquet_schema(pyarrow)
+
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._part = 0
+        self._part_rows = 0
+        self._open: Dict[str, object] = {}  # format -> open file or ParquetWriter
+        self.files: List[Path] = []  # completed parts
+
+    def write(self, row: Dict):
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.buffer_rows:
+                self._flush()
+
+    def write_many(self, rows: Iterable[Dict]):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _part_path(self, fmt: str) -> Path:
+        return self.directory / f"{self.prefix}-{self._part:05d}.{fmt}"
+
+    def _flush(self):
+        while self._buffer:
+            take = min(len(self._buffer), self.rows_per_file - self._part_rows)
+            rows, self._buffer = self._buffer[:take], self._buffer[take:]
+
+            if not self._open:
+                self._part += 1
+            for fmt in self.formats:
+                self._write_rows(fmt, rows)
+            self._part_rows += len(rows)
+
+            if self._part_rows >= self.rows_per_file:
+                self._finish_part()
+
+    def _write_rows(self, fmt: str, rows: List[Dict]):
+        tmp_path = self._part_path(fmt).with_suffix(f'.{fmt}.tmp')
+        if fmt == 'jsonl':
+            f = self._open.get(fmt)
+            if f is None:
+                f = self._open[fmt] = open(tmp_path, 'w')
+            f.write(''.join(jsonl_line(row) for row in rows))
+            f.flush()
+        else:
+            writer = self._open.get(fmt)
+            if writer is None:
+                writer = self._open[fmt] = self._pq.ParquetWriter(tmp_path, self._schema)
+            columns = {name: [row.get(name) for row in rows] for name in self._schema.names}
+            for name in ('sections', 'stages', 'counters'):
+                columns[name] = [list((row.get(name) or {}).items()) for row in rows]
+            writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def _finish_part(self):
+        """Close the current part files and move them into place"""
+        for fmt, handle in self._open.items():
+            handle.close()
+            path = self._part_path(fmt)
+            os.replace(path.with_suffix(f'.{fmt}.tmp'), path)
+            self.files.append(path)
+        self._open = {}
+        self._part_rows = 0
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._open:
+                self._finish_part()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
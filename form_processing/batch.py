@@ -0,0 +1,370 @@
+"""Headless batch processing of scanned AMC forms
+
+Usage:
+    python -m form_processing.batch INPUT [INPUT ...] --output results/
+
+INPUT may be a file, a directory (searched recursively) or a glob pattern.
+One JSON result is written per form, mirroring the input directory layout.
+With --results, flattened rows are also appended to JSONL/Parquet part
+files for bulk queries. With --job-db, progress is recorded in a SQLite job store and an
+interrupted run resumes where it stopped instead of starting over.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .app.core.detector import template_signature, template_version
+from .app.core.preprocessing import DEFAULT_PROFILE, PROFILES, check_profile, configure_denoise_workers
+from .app.core.processor import PROCESSOR_VERSION, FormProcessor
+from .app.core.timing import StageTimer
+from .app.utils.jobstore import Completion, JobStore
+from .app.utils.pdf import PDFPageSource, open_document
+from .app.utils.results import FORMATS, ResultsWriter, flatten_result, to_jsonable
+
+SUPPORTED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg'}
+
+# Job store queue of batch runs
+QUEUE = 'batch'
+
+logger = logging.getLogger(__name__)
+
+# One processor per worker process, created by init_worker
+_processor: Optional[FormProcessor] = None
+
+
+def init_worker(template_dir: str, ocr_engine: str = 'auto', use_page_layout: bool = False,
+                log_level: str = 'WARNING', page_workers: int = 1, collect_timings: bool = False,
+                preprocessing: str = DEFAULT_PROFILE,
+                preprocessing_overrides: Optional[Dict[str, str]] = None):
+    """Create the worker's FormProcessor (runs once per worker process)"""
+    global _processor
+
+    # Workers already run in parallel; keep Tesseract/OpenCV single-threaded
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    import cv2
+    cv2.setNumThreads(1)
+    configure_denoise_workers(1)
+
+    _processor = FormProcessor(
+        Path(template_dir), use_page_layout=use_page_layout, ocr_engine=ocr_engine,
+        page_workers=page_workers, collect_timings=collect_timings,
+        preprocessing=preprocessing, preprocessing_overrides=preprocessing_overrides
+    )
+    _processor.logger.setLevel(log_level)
+    _processor.detector.logger.setLevel(log_level)
+
+
+def result_version(template_dir: Path, preprocessing: str = DEFAULT_PROFILE,
+                   preprocessing_overrides: Optional[Dict[str, str]] = None) -> str:
+    """Version of everything besides the input that results depend on"""
+    overrides = ','.join(f'{key}={profile}'
+                         for key, profile in sorted((preprocessing_overrides or {}).items()))
+    return (f"{template_version(template_signature(Path(template_dir)))}:"
+            f"{PROCESSOR_VERSION}:{preprocessing}:{overrides}")
+
+
+def process_bytes(data: bytes, filename: str) -> Dict:
+    """Process one form's file content with the worker's processor"""
+    timer = StageTimer() if _processor.collect_timings else None
+    with timer.stage('open') if timer else nullcontext():
+        images = open_document(data, filename)
+    try:
+        if not len(images):
+            return {
+                'status': 'error',
+                'message': 'Failed to extract images from file',
+                'total_pages': 0
+            }
+        # PDF pages are rendered inside process_form (timed as render.*)
+        return _processor.process_form(images, timer)
+    finally:
+        if isinstance(images, PDFPageSource):
+            images.close()
+
+
+def process_path(path: str) -> Dict:
+    """Process one form file and return its results with timing"""
+    start = time.perf_counter()
+    content_hash = None
+    try:
+        data = Path(path).read_bytes()
+        content_hash = hashlib.sha256(data).hexdigest()
+        results = process_bytes(data, path)
+    except Exception as e:
+        results = {'status': 'error', 'message': str(e), 'total_pages': 0}
+
+    return {
+        'source': path,
+        'sha256': content_hash,
+        'results': results,
+        'pages': results.get('total_pages', 0),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def collect_inputs(patterns: Iterable[str]) -> List[Path]:
+    """Expand files, directories and glob patterns into form files"""
+    found = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = path.rglob('*')
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = (Path(p) for p in glob.glob(pattern, recursive=True))
+
+        for candidate in candidates:
+            if candidate.is_file() and candidate.suffix.lower() in SUPPORTED_EXTENSIONS:
+                found.add(candidate.resolve())
+    return sorted(found)
+
+
+def result_path(source: Path, input_root: Path, output_dir: Path) -> Path:
+    """Output location for a source file, mirroring the input layout"""
+    try:
+        relative = source.relative_to(input_root)
+    except ValueError:
+        relative = Path(source.name)
+    return output_dir / relative.with_suffix(relative.suffix + '.json')
+
+
+def write_result(path: Path, record: Dict):
+    """Write one form's result atomically"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f, indent=2, default=to_jsonable)
+    os.replace(tmp_path, path)
+
+
+def input_stamp(path: Path) -> str:
+    """Size and modification time, used to notice inputs changed since the last run"""
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def claimed_inputs(store: JobStore, keys: List[str], claim_size: int) -> Iterator[Path]:
+    """Pending jobs among a run's keys, claimed a batch at a time"""
+    for i in range(0, len(keys), claim_size):
+        for job in store.claim(claim_size, keys[i:i + claim_size]):
+            yield Path(job.source)
+
+
+def run_batch(inputs: List[Path], output_dir: Path, template_dir: Path = Path("templates"),
+              workers: Optional[int] = None, ocr_engine: str = 'auto',
+              use_page_layout: bool = False, log_level: str = 'WARNING',
+              page_workers: int = 1, collect_timings: bool = False,
+              job_db: Optional[Path] = None, claim_size: int = 64,
+              results_writer: Optional[ResultsWriter] = None,
+              preprocessing: str = DEFAULT_PROFILE,
+              preprocessing_overrides: Optional[Dict[str, str]] = None) -> Dict:
+    """Process inputs across a process pool and write one JSON per form
+
+    With a job database, inputs already completed by an earlier run are
+    skipped and jobs a dead run left in flight are retried. A run only
+    claims jobs of its own inputs, and an interrupted run still records
+    the forms that had finished.
+    """
+    workers = workers or os.cpu_count() or 1
+    input_root = Path(os.path.commonpath([p.parent for p in inputs])) if inputs else Path('.')
+    summary = {'forms': 0, 'pages': 0, 'errors': 0, 'skipped': 0, 'seconds': 0.0}
+
+    store = None
+    version = None
+    if job_db is not None:
+        store = JobStore(job_db, json_default=to_jsonable)
+        version = result_version(template_dir, preprocessing, preprocessing_overrides)
+        store.requeue_running(QUEUE)
+        keys = [str(path) for path in inputs]
+        pending = store.add(((key, key, input_stamp(path)) for key, path in zip(keys, inputs)), QUEUE)
+        summary['skipped'] = max(0, len(inputs) - pending)
+        sources = claimed_inputs(store, keys, claim_size)
+    else:
+        sources = iter(inputs)
+
+    completions: List[Completion] = []
+
+    def finish(source: Path, record: Dict):
+        """Write one form's result and count it"""
+        write_result(result_path(source, input_root, output_dir), record)
+        if results_writer is not None:
+            results_writer.write(flatten_result(
+                record['results'], record['source'], record['sha256'], record['seconds']
+            ))
+        if store is not None:
+            completions.append(Completion(
+                str(source), record['results'], record['sha256'],
+                record['seconds'], record['pages'], version
+            ))
+
+        summary['forms'] += 1
+        summary['pages'] += record['pages']
+        if record['results'].get('status') != 'success':
+            summary['errors'] += 1
+
+    last_flush = start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(str(template_dir), ocr_engine, use_page_layout, log_level,
+                      page_workers, collect_timings, preprocessing, preprocessing_overrides)
+        ) as executor:
+            # A few forms queued per worker keeps the pool busy without
+            # claiming (or holding futures for) the whole input list
+            futures = {}
+            exhausted = False
+            try:
+                while True:
+                    submitted = []
+                    while not exhausted and len(futures) + len(submitted) < workers * 4:
+                        source = next(sources, None)
+                        if source is None:
+                            exhausted = True
+                        else:
+                            submitted.append(source)
+                    if store is not None:
+                        # Attempts count forms handed to a worker, not every claimed one
+                        store.start(str(source) for source in submitted)
+                    for source in submitted:
+                        futures[executor.submit(process_path, str(source))] = source
+                    if not futures:
+                        break
+
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(futures.pop(future), future.result())
+                        if summary['forms'] % 100 == 0:
+                            elapsed = time.perf_counter() - start
+                            logger.info(f"{summary['forms']}/{len(inputs)} forms "
+                                        f"({summary['forms'] / elapsed:.2f} forms/sec)")
+
+                    # Completions are written in batches, one transaction each
+                    if completions and (len(completions) >= claim_size
+                                        or time.perf_counter() - last_flush > 5):
+                        store.complete(completions)
+                        completions.clear()
+                        last_flush = time.perf_counter()
+            except BaseException:
+                # Interrupted: keep forms that already finished, so a resumed
+                # run does not process them again, and drop the queued ones
+                for future, source in futures.items():
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        finish(source, future.result())
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        if store is not None:
+            store.complete(completions)
+            store.close()
+
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def preprocessing_override(value: str) -> Tuple[str, str]:
+    """Parse a KEY=PROFILE command line override"""
+    key, sep, profile = value.rpartition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected FORM TYPE[/SECTION]=PROFILE, got {value!r}")
+    try:
+        return key, check_profile(profile)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_preprocessing_arguments(parser: argparse.ArgumentParser):
+    """Preprocessing profile options shared by the batch CLI and the service"""
+    parser.add_argument('--preprocessing', default=DEFAULT_PROFILE, choices=list(PROFILES),
+                        help=f'OCR preprocessing profile (default: {DEFAULT_PROFILE})')
+    parser.add_argument('--preprocessing-override', type=preprocessing_override, action='append',
+                        metavar='FORM[/SECTION]=PROFILE',
+                        help='Profile for one form type or section, repeatable '
+                             '(e.g. "CTF Form=fast", "SIP Form/bank_mandate=accurate")')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m form_processing.batch',
+        description='Process a directory of scanned forms without the Streamlit UI'
+    )
+    parser.add_argument('inputs', nargs='+', help='Files, directories or glob patterns')
+    parser.add_argument('-o', '--output', type=Path, required=True,
+                        help='Directory for per-form JSON results')
+    parser.add_argument('-t', '--templates', type=Path, default=Path("templates"),
+                        help='Template directory (default: templates)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--ocr-engine', default='auto',
+                        choices=['auto', 'tesserocr', 'pytesseract'])
+    parser.add_argument('--page-layout', action='store_true',
+                        help='OCR each page once and answer section queries from the layout')
+    parser.add_argument('--page-workers', type=int, default=1,
+                        help='Threads per worker for page-parallel validation of large forms')
+    parser.add_argument('--timings', action='store_true',
+                        help='Include per-stage timings and OCR counters in each result')
+    add_preprocessing_arguments(parser)
+    parser.add_argument('--job-db', type=Path, default=None,
+                        help='SQLite job store; rerunning with the same file resumes the batch')
+    parser.add_argument('--claim-size', type=int, default=64,
+                        help='Jobs claimed from (and completed to) the job store per transaction')
+    parser.add_argument('--results', type=Path, default=None,
+                        help='Directory for flattened results (one row per form)')
+    parser.add_argument('--results-format', action='append', choices=FORMATS,
+                        help='Results file format, repeatable (default: jsonl; parquet needs pyarrow)')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        logger.addHandler(handler)
+    logger.setLevel(args.log_level)
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No PDF or image files found", file=sys.stderr)
+        return 1
+
+    results_writer = None
+    if args.results is not None:
+        try:
+            results_writer = ResultsWriter(args.results, args.results_format or ['jsonl'])
+        except ImportError as e:
+            print(e, file=sys.stderr)
+            return 1
+    try:
+        summary = run_batch(
+            inputs, args.output, args.templates, args.workers,
+            args.ocr_engine, args.page_layout, args.log_level, args.page_workers, args.timings,
+            args.job_db, args.claim_size, results_writer,
+            args.preprocessing, dict(args.preprocessing_override or [])
+        )
+    finally:
+        if results_writer is not None:
+            results_writer.close()
+
+    seconds = summary['seconds'] or 1e-9
+    print(f"Processed {summary['forms']} forms ({summary['pages']} pages) "
+          f"in {summary['seconds']:.1f}s: "
+          f"{summary['forms'] / seconds:.2f} forms/sec, "
+          f"{summary['pages'] / seconds:.2f} pages/sec, "
+          f"{summary['errors']} errors"
+          + (f", {summary['skipped']} already done" if summary['skipped'] else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,464 @@
+"""Local HTTP service for processing scanned AMC forms
+
+Usage:
+    python -m form_processing.service --port 8080 --templates form_processing/templates
+
+Endpoints (JSON responses):
+    POST /jobs?filename=form.pdf   body: raw PDF or image bytes
+        202 {"job_id": ..., "status": "queued"}; 429 when the queue is full
+    GET  /jobs/<id>                job status and timestamps
+    GET  /jobs/<id>/result         200 with results when done, 202 while pending
+    GET  /health                   queue depth and job counts
+
+Uses only the standard library: asyncio for HTTP, a bounded asyncio.Queue
+for backpressure and a process pool (the batch CLI's worker setup) for
+processing. With --job-db, results are also kept in a SQLite job store:
+they survive restarts and an upload identical to one completed with the
+same templates, processor version and preprocessing is answered from the
+store without reprocessing.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import signal
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .app.utils.jobstore import Completion, JobStore
+from .batch import add_preprocessing_arguments, init_worker, process_bytes, result_version, to_jsonable
+
+logger = logging.getLogger(__name__)
+
+# Job store queue of service uploads
+QUEUE = 'service'
+
+MAX_HEADER_BYTES = 64 * 1024
+# Unread request bodies up to this size are drained before a refusal is
+# sent; closing a socket with unread data resets the connection, and the
+# client sees the reset instead of the 429 or 413
+MAX_DISCARD_BYTES = 64 * 1024 * 1024
+DISCARD_CHUNK_BYTES = 64 * 1024
+
+REASONS = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 411: 'Length Required', 413: 'Payload Too Large',
+    429: 'Too Many Requests', 500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class Job:
+    job_id: str
+    filename: str
+    status: str = 'queued'  # queued -> running -> done | failed
+    content_hash: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+    def status_dict(self) -> Dict:
+        status = {
+            'job_id': self.job_id,
+            'filename': self.filename,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.finished_at is not None and self.started_at is not None:
+            status['seconds'] = round(self.finished_at - self.started_at, 3)
+        if self.error:
+            status['error'] = self.error
+        return status
+
+
+def _process_job(process: Callable[[bytes, str], Dict], data: bytes, filename: str) -> Dict:
+    """Run one job in a worker; errors become error results"""
+    try:
+        return process(data, filename)
+    except Exception as e:
+        return {'status': 'error', 'message': str(e), 'total_pages': 0}
+
+
+class JobService:
+    """Bounded job queue drained by async workers that hand forms to an executor
+
+    Submissions beyond queue_size are refused (HTTP 429) rather than
+    buffered, so memory is bounded by queue_size uploads. Finished jobs are
+    kept for result retrieval up to keep_finished, oldest evicted first.
+    Job store reads and writes run in threads, off the event loop. Stored
+    results are tagged with result_version, and only results of the same
+    version answer repeated uploads.
+    """
+
+    def __init__(self, executor: Executor, workers: int, queue_size: int = 64,
+                 process: Callable[[bytes, str], Dict] = process_bytes,
+                 max_body_bytes: int = 50 * 1024 * 1024, keep_finished: int = 10000,
+                 store: Optional[JobStore] = None, max_discard_bytes: int = MAX_DISCARD_BYTES,
+                 result_version: str = ''):
+        self.executor = executor
+        self.store = store
+        self.result_version = result_version
+        self.workers = workers
+        self.process = process
+        self.max_body_bytes = max_body_bytes
+        self.max_discard_bytes = max_discard_bytes
+        self.keep_finished = keep_finished
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._finished = 0
+        # Queue slots held by submissions waiting for their job store row
+        self._reserved = 0
+        self._recording: Set[asyncio.Future] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+        if self.store is not None:
+            # Uploads are not persisted, so jobs cut short by a restart cannot be retried
+            interrupted = self.store.fail_unfinished('Service stopped before the job finished', QUEUE)
+            if interrupted:
+                logger.warning(f"{interrupted} jobs were interrupted by the last shutdown")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*self._recording, return_exceptions=True)
+
+    def full(self) -> bool:
+        return self.queue.maxsize > 0 and self.queue.qsize() + self._reserved >= self.queue.maxsize
+
+    async def submit(self, data: bytes, filename: str, content_hash: Optional[str] = None) -> Job:
+        """Queue a form; raises asyncio.QueueFull when the queue is at capacity"""
+        job = Job(job_id=uuid.uuid4().hex, filename=filename, content_hash=content_hash)
+
+        if self.store is not None and content_hash is not None:
+            result = await asyncio.to_thread(self.store.result_for_hash, content_hash,
+                                             self.result_version)
+            if result is not None:
+                # Same content already processed: answer without queueing
+                job.status, job.result = 'done', result
+                job.started_at = job.finished_at = job.submitted_at
+                self.jobs[job.job_id] = job
+                self._finished += 1
+                self._evict_finished()
+                return job
+
+        if self.full():
+            raise asyncio.QueueFull
+        if self.store is not None:
+            # The row exists before a worker can complete the job; the
+            # queue slot is held meanwhile so the put below cannot fail
+            self._reserved += 1
+            try:
+                await asyncio.to_thread(self.store.add, [(job.job_id, filename, '')], QUEUE)
+            finally:
+                self._reserved -= 1
+        self.queue.put_nowait((job, data))
+        self.jobs[job.job_id] = job
+        return job
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, data = await self.queue.get()
+            job.status = 'running'
+            job.started_at = time.time()
+            try:
+                job.result = await loop.run_in_executor(
+                    self.executor, _process_job, self.process, data, job.filename
+                )
+                job.status = 'done' if job.result.get('status') == 'success' else 'failed'
+                job.error = None if job.status == 'done' else job.result.get('message')
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed: {e}")
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                finished_at = time.time()
+                del data
+                if self.store is not None:
+                    # Stored before the job shows as finished, and stored even
+                    # if the service is closed meanwhile
+                    record = asyncio.ensure_future(asyncio.to_thread(self._record, job, finished_at))
+                    self._recording.add(record)
+                    record.add_done_callback(self._recording.discard)
+                    await asyncio.shield(record)
+                job.finished_at = finished_at
+                self.queue.task_done()
+                self._finished += 1
+                self._evict_finished()
+
+    def _record(self, job: Job, finished_at: float):
+        """Persist a finished job's outcome"""
+        result = job.result or {'status': 'error', 'message': job.error}
+        try:
+            self.store.complete([Completion(
+                job.job_id, result, job.content_hash,
+                finished_at - job.started_at, result.get('total_pages'), self.result_version
+            )])
+        except Exception as e:
+            logger.error(f"Error recording job {job.job_id}: {e}")
+
+    def _stored_job(self, job_id: str) -> Optional[Job]:
+        """Finished job no longer held in memory, from the job store"""
+        if self.store is None:
+            return None
+        record = self.store.get(job_id)
+        if record is None:
+            return None
+        job = Job(job_id=record.key, filename=record.source, content_hash=record.hash,
+                  status=record.state, submitted_at=record.submitted_at,
+                  started_at=record.started_at, finished_at=record.finished_at,
+                  error=record.error)
+        if record.finished_at is not None:
+            job.result = self.store.result(job_id)
+        return job
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs beyond keep_finished"""
+        while self._finished > self.keep_finished:
+            for job_id, job in self.jobs.items():
+                if job.finished_at is not None:
+                    del self.jobs[job_id]
+                    self._finished -= 1
+                    break
+            else:
+                return
+
+    def health(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'queue_size': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'workers': self.workers,
+            'jobs': counts
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP request per connection"""
+        headers: Dict[str, str] = {}
+        try:
+            try:
+                method, target, headers = await self._read_head(reader)
+                status, payload, extra = await self._route(method, target, headers, reader)
+            except HTTPError as e:
+                # Requests are refused before their body is read
+                await self._discard_body(reader, headers)
+                status, payload, extra = e.status, {'error': e.message}, {}
+            except Exception as e:
+                logger.error(f"Error handling request: {e}")
+                status, payload, extra = 500, {'error': str(e)}, {}
+            await self._respond(writer, status, payload, extra)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, 'Request header too large')
+        if len(head) > MAX_HEADER_BYTES:
+            raise HTTPError(400, 'Request header too large')
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if 'content-length' not in headers:
+            raise HTTPError(411, 'Content-Length required')
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise HTTPError(400, 'Invalid Content-Length')
+        if length > self.max_body_bytes:
+            raise HTTPError(413, f'Upload exceeds {self.max_body_bytes} bytes')
+        if length <= 0:
+            raise HTTPError(400, 'Empty upload')
+        return await reader.readexactly(length)
+
+    async def _discard_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]):
+        """Read and drop an unread request body, up to max_discard_bytes"""
+        try:
+            remaining = min(int(headers.get('content-length', 0)), self.max_discard_bytes)
+        except ValueError:
+            return
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, DISCARD_CHUNK_BYTES))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str],
+                     reader: asyncio.StreamReader) -> Tuple[int, Dict, Dict[str, str]]:
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+
+        if parts == ['health']:
+            return 200, self.health(), {}
+
+        if parts == ['jobs']:
+            if method != 'POST':
+                raise HTTPError(405, 'Use POST to submit a form')
+            # Refuse without buffering the upload when there is no room for it
+            if self.full():
+                await self._discard_body(reader, headers)
+                return 429, {'error': 'Queue full'}, {'Retry-After': '1'}
+            data = await self._read_body(reader, headers)
+            query = parse_qs(url.query)
+            filename = query.get('filename', [headers.get('x-filename', '')])[0]
+            if not filename and headers.get('content-type') == 'application/pdf':
+                filename = 'upload.pdf'
+            content_hash = None
+            if self.store is not None:
+                content_hash = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+            try:
+                job = await self.submit(data, filename, content_hash)
+            except asyncio.QueueFull:
+                return 429, {'error': 'Queue full'}, {'Retry-After': '1'}
+            return 202, {'job_id': job.job_id, 'status': job.status}, {
+                'Location': f'/jobs/{job.job_id}'
+            }
+
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            if method != 'GET':
+                raise HTTPError(405, 'Use GET to query jobs')
+            job = self.jobs.get(parts[1]) or await asyncio.to_thread(self._stored_job, parts[1])
+            if job is None:
+                raise HTTPError(404, 'Unknown job')
+            if len(parts) == 2:
+                return 200, job.status_dict(), {}
+            if parts[2] == 'result':
+                if job.finished_at is None:
+                    return 202, job.status_dict(), {'Retry-After': '1'}
+                return 200, {'job_id': job.job_id, 'status': job.status, 'results': job.result}, {}
+
+        raise HTTPError(404, 'Not found')
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict,
+                       extra_headers: Dict[str, str]):
+        body = json.dumps(payload, default=to_jsonable).encode()
+        head = [f'HTTP/1.1 {status} {REASONS.get(status, "")}',
+                'Content-Type: application/json',
+                f'Content-Length: {len(body)}',
+                'Connection: close']
+        head += [f'{name}: {value}' for name, value in extra_headers.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(args: argparse.Namespace):
+    workers = args.workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(str(args.templates), args.ocr_engine, args.page_layout, args.log_level,
+                  args.page_workers, args.timings, args.preprocessing,
+                  dict(args.preprocessing_override or []))
+    )
+    store = JobStore(args.job_db, json_default=to_jsonable) if args.job_db else None
+    # Workers load templates once, so the version holds for the service's lifetime
+    version = result_version(args.templates, args.preprocessing,
+                             dict(args.preprocessing_override or []))
+    service = JobService(executor, workers, args.queue_size,
+                         max_body_bytes=args.max_upload_mb * 1024 * 1024, store=store,
+                         result_version=version)
+    server = await service.start(args.host, args.port)
+    logger.info(f"Listening on {', '.join(str(s.getsockname()) for s in server.sockets)} "
+                f"with {workers} workers")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logger.info("Shutting down")
+    await service.close()
+    executor.shutdown(wait=False, cancel_futures=True)
+    if store is not None:
+        store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m form_processing.service',
+        description='HTTP service processing scanned forms through a bounded job queue'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('-t', '--templates', type=Path, default=Path("templates"),
+                        help='Template directory (default: templates)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help='Queued forms accepted before answering 429')
+    parser.add_argument('--max-upload-mb', type=int, default=50)
+    parser.add_argument('--ocr-engine', default='auto',
+                        choices=['auto', 'tesserocr', 'pytesseract'])
+    parser.add_argument('--page-layout', action='store_true',
+                        help='OCR each page once and answer section queries from the layout')
+    parser.add_argument('--page-workers', type=int, default=1,
+                        help='Threads per worker for page-parallel validation of large forms')
+    parser.add_argument('--timings', action='store_true',
+                        help='Include per-stage timings and OCR counters in each result')
+    add_preprocessing_arguments(parser)
+    parser.add_argument('--job-db', type=Path, default=None,
+                        help='SQLite job store keeping results across restarts')
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        logger.addHandler(handler)
+    logger.setLevel(args.log_level)
+
+    asyncio.run(serve(args))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())